@@ -11,78 +11,496 @@ In a real application, you would use the actual Claude API client.
 """
 
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import orjson
 import sys
 import time
 import argparse
+import asyncio
+import re
+import warnings
+import hashlib
+from collections import OrderedDict
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None  # Only needed for the async batch API (redact_many)
 
 # MCP Redaction service settings
 MCP_BASE_URL = "http://localhost:6366"
 
+# Maximum number of redaction results kept in the local LRU cache
+REDACTION_CACHE_SIZE = 1024
+
+# Seconds a server health check result is trusted before re-checking
+HEALTH_CHECK_TTL = 2.0
+
+# Seconds between refreshes of the local rule prefilter; a refresh is a
+# conditional request, so keep this short enough for rule changes to show
+PREFILTER_TTL = 2.0
+
+# Paragraph separator used to split file input into batch redaction requests
+PARAGRAPH_SEPARATOR = "\n\n"
+
+# Conditions the prefilter compiles on their own: in the combined alternation
+# backreferences would point at the wrong group and inline global flags must lead it
+_UNFUSABLE_RE = re.compile(r"\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)")
+
+# Whitespace runs collapsed when normalizing text for fuzzy cache lookups
+_WHITESPACE_RE = re.compile(r"\s+")
+
 # Mock Claude API settings (in a real app, this would be the actual API endpoint)
 CLAUDE_API_URL = "https://api.anthropic.com/v1/messages"
 CLAUDE_API_KEY = "mock_api_key_for_demo"  # Replace with your actual API key in a real app
 
+def _normalize(text):
+    """Normalize text for fuzzy cache lookups (collapsed whitespace).
+    
+    Case is kept: rules are case-sensitive unless they say otherwise.
+    """
+    return _WHITESPACE_RE.sub(" ", text.strip())
+
 class RedactionMiddleware:
     """
     Middleware to redact sensitive information before sending to Claude API.
     """
     
-    def __init__(self, mcp_url=MCP_BASE_URL):
+    def __init__(self, mcp_url=MCP_BASE_URL, cache_size=REDACTION_CACHE_SIZE, transport="requests",
+                 fuzzy=False):
         self.mcp_url = mcp_url
-        # Check if MCP server is available
+        self.transport = transport
+        # Opt-in reuse of redactions for texts differing only in whitespace; a
+        # replayed redaction may cover more than the server would have
+        self.fuzzy = fuzzy
+        # Endpoint URLs and headers are built once rather than on every call
+        self._redact_url = f"{mcp_url}/redact_text"
+        self._batch_url = f"{mcp_url}/redact_text_batch"
+        self._health_url = f"{mcp_url}/health"
+        self._rules_url = f"{mcp_url}/rules"
+        self._json_headers = {"Content-Type": "application/json"}
+        # LRU cache of (redacted_text, matches) keyed by a hash of the text
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        # Matches of previous redactions keyed by a hash of the normalized text
+        self._fuzzy_cache = OrderedDict()
+        # Pending async requests keyed like the cache, shared by duplicate callers
+        self._inflight = {}
+        # Reuse one keep-alive connection pool for all requests to the server
+        self.session = requests.Session()
+        self.session.mount(mcp_url, HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        if transport == "httpx":
+            # Async keep-alive client; sync calls run on a private event loop
+            # so its connection pool is reused between them
+            import httpx
+            self._httpx = httpx
+            self._ahttp = None
+            self._ahttp_loop = None
+            self._loop = asyncio.new_event_loop()
+        # Errors that mean the server could not be reached; anything else is a
+        # bug on this side and must not be mistaken for the server being down
+        self._network_errors = (requests.RequestException, OSError)
+        if transport == "httpx":
+            self._network_errors += (httpx.HTTPError,)
+        # Check if MCP server is available; re-checked lazily once the
+        # cached result is older than the health TTL
+        self._health_ttl = HEALTH_CHECK_TTL
         self.server_available = self._check_server()
+        self._health_ts = time.monotonic()
         if not self.server_available:
             print("Warning: MCP redaction server is not available. Continuing without redaction.")
+        
+        # Local prefilter built from the server's rules; texts it cannot match
+        # skip the round-trip to the server entirely
+        self._prefilter = None
+        self._prefilter_ts = 0.0
+        self._rules_etag = None
+        self._rules = None
+        if self.server_available:
+            self._refresh_prefilter()
     
     def _check_server(self):
         """Check if the MCP server is running and healthy."""
         try:
-            response = requests.get(f"{self.mcp_url}/health", timeout=3)
+            if self.transport == "httpx":
+                response = self._run(self._get("/health", timeout=0.5))
+            else:
+                response = self.session.get(self._health_url, timeout=0.5)
             return response.status_code == 200
-        except Exception:
+        except self._network_errors:
             return False
     
-    def redact_text(self, text):
-        """Redact sensitive information from text using the MCP service."""
-        if not self.server_available:
-            return text  # Return original text if server is not available
+    async def _check_server_async(self):
+        """Async variant of _check_server() for use inside a running event loop."""
+        if self.transport != "httpx":
+            return await asyncio.get_running_loop().run_in_executor(None, self._check_server)
+        try:
+            response = await self._get("/health", timeout=0.5)
+            return response.status_code == 200
+        except self._network_errors:
+            return False
+    
+    def _available(self):
+        """Return the cached server health, re-checking it once the TTL expires."""
+        if time.monotonic() - self._health_ts > self._health_ttl:
+            self.server_available = self._check_server()
+            self._health_ts = time.monotonic()
+        return self.server_available
+    
+    async def _available_async(self):
+        """Async variant of _available() for use inside a running event loop."""
+        if time.monotonic() - self._health_ts > self._health_ttl:
+            self.server_available = await self._check_server_async()
+            self._health_ts = time.monotonic()
+        return self.server_available
+    
+    def _refresh_prefilter(self):
+        """Rebuild the prefilter from the server's active rules.
         
+        Uses the ETag from ``/rules`` so unchanged rules are not re-downloaded,
+        and drops cached redactions when the rules changed. On any failure the
+        prefilter is disabled and every text goes to the server.
+        """
+        self._prefilter_ts = time.monotonic()
+        headers = {"If-None-Match": self._rules_etag} if self._rules_etag else {}
         try:
-            response = requests.post(
-                f"{self.mcp_url}/redact_text",
-                json={"text": text},
-                headers={"Content-Type": "application/json"},
-                timeout=5
-            )
+            response = self.session.get(self._rules_url, headers=headers, timeout=3)
+            if response.status_code == 304:
+                return
             response.raise_for_status()
-            result = response.json()
             
-            # Return redacted text
-            return result.get("redacted_text", text)
+            rules = [(rule["condition"], rule.get("flags", 0))
+                     for rule in orjson.loads(response.content).get("rules", []) if rule.get("enabled", True)]
+            if self._rules is not None and rules != self._rules:
+                self.clear_cache()
+            self._rules = rules
+            
+            # Plain conditions share one alternation; no patterns means nothing can match
+            patterns = [re.compile(condition, flags) for condition, flags in rules
+                        if flags or _UNFUSABLE_RE.search(condition)]
+            plain = [condition for condition, flags in rules if not flags and not _UNFUSABLE_RE.search(condition)]
+            if plain:
+                try:
+                    patterns.insert(0, re.compile("|".join(f"(?:{c})" for c in plain)))
+                except re.error:
+                    # e.g. two conditions naming a group the same
+                    patterns[:0] = [re.compile(condition) for condition in plain]
+            self._prefilter = tuple(patterns)
+            self._rules_etag = response.headers.get("ETag")
+        except Exception:
+            self._prefilter = None
+            self._rules_etag = None
+    
+    def _may_match(self, text):
+        """Return False if no server rule can possibly match the text."""
+        if time.monotonic() - self._prefilter_ts > PREFILTER_TTL:
+            self._refresh_prefilter()
+        return self._prefilter is None or any(pattern.search(text) for pattern in self._prefilter)
+    
+    @staticmethod
+    def _cache_key(text):
+        """Hash text into a compact cache key."""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    
+    def _cache_put(self, key, redacted):
+        """Store a redaction result, evicting the least recently used entry."""
+        self._cache[key] = redacted
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+    
+    @staticmethod
+    def _replay(text, matches):
+        """Apply previously returned matches to a text that differs only in whitespace.
+        
+        Returns a ``(redacted_text, matches)`` tuple with the originals found in ``text``.
+        """
+        replayed = []
+        for match in matches:
+            original = match.get("original", "")
+            if not original.strip():
+                continue
+            
+            def replace(m):
+                replayed.append(dict(match, original=m.group(0)))
+                return match.get("replacement", "")
+            
+            pattern = r"\s+".join(re.escape(part) for part in original.split())
+            text = re.sub(pattern, replace, text)
+        return text, replayed
+    
+    def clear_cache(self):
+        """Drop all cached redactions (e.g. after the server's rules change)."""
+        self._cache.clear()
+        self._fuzzy_cache.clear()
+    
+    def _run(self, coro):
+        """Run a coroutine on the middleware's private event loop (httpx transport).
+        
+        Must not be called from inside a running event loop; use the async methods there.
+        """
+        try:
+            return self._loop.run_until_complete(coro)
+        finally:
+            coro.close()  # Not awaited if the loop refused to run it
+    
+    def _async_client(self):
+        """Return the httpx client for the running event loop, creating it if needed."""
+        loop = asyncio.get_running_loop()
+        if self._ahttp is None or self._ahttp_loop is not loop:
+            self._ahttp = self._httpx.AsyncClient(
+                base_url=self.mcp_url,
+                limits=self._httpx.Limits(max_connections=64, max_keepalive_connections=32)
+            )
+            self._ahttp_loop = loop
+        return self._ahttp
+    
+    async def _get(self, path, timeout):
+        """GET a path with the httpx client.
+        
+        The client is looked up inside the coroutine, where the loop it belongs to is running.
+        """
+        return await self._async_client().get(path, timeout=timeout)
+    
+    async def _post_json(self, path, payload):
+        """POST a JSON payload with the httpx client and return the decoded response."""
+        response = await self._async_client().post(
+            path,
+            content=orjson.dumps(payload),
+            headers=self._json_headers,
+            timeout=5
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    
+    def close(self):
+        """Close the underlying HTTP session(s)."""
+        self.session.close()
+        if self.transport == "httpx":
+            if self._ahttp is not None and self._ahttp_loop is self._loop:
+                self._run(self._ahttp.aclose())
+            self._loop.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def redact_and_get(self, text):
+        """Redact text and return the applied redactions in a single request.
+        
+        Returns a ``(redacted_text, matches)`` tuple. On any failure the
+        original text and an empty match list are returned.
+        """
+        if not self._available():
+            return text, []  # Return original text if server is not available
+        
+        if not self._may_match(text):
+            return text, []  # Nothing to redact, skip the server call
+        
+        key = self._cache_key(text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        
+        if self.fuzzy:
+            fuzzy_key = self._cache_key(_normalize(text))
+            matches = self._fuzzy_cache.get(fuzzy_key)
+            if matches:
+                # Only texts with matches are kept, as a miss says nothing about rules
+                # that look at whitespace; the replay is kept only if no rule still matches
+                self._fuzzy_cache.move_to_end(fuzzy_key)
+                replayed = self._replay(text, matches)
+                if self._prefilter is not None and not self._may_match(replayed[0]):
+                    return replayed
+        
+        try:
+            if self.transport == "httpx":
+                result = self._run(self._post_json("/redact_text", {"text": text}))
+            else:
+                response = self.session.post(
+                    self._redact_url,
+                    data=orjson.dumps({"text": text}),
+                    headers=self._json_headers,
+                    timeout=5
+                )
+                response.raise_for_status()
+                result = orjson.loads(response.content)
+            
+            redacted = (result.get("redacted_text", text), result.get("matches", []))
+            self._cache_put(key, redacted)
+            if self.fuzzy and redacted[1]:
+                self._fuzzy_cache[fuzzy_key] = redacted[1]
+                if len(self._fuzzy_cache) > self._cache_size:
+                    self._fuzzy_cache.popitem(last=False)
+            return redacted
         except Exception as e:
             print(f"Warning: Error redacting text: {str(e)}")
-            return text  # Return original text on error
+            return text, []  # Return original text on error
+    
+    def redact_text(self, text):
+        """Redact sensitive information from text using the MCP service.
+        
+        Deprecated: use redact_and_get(), which also returns the matches.
+        """
+        warnings.warn("redact_text() is deprecated, use redact_and_get()",
+                      DeprecationWarning, stacklevel=2)
+        return self.redact_and_get(text)[0]
     
     def get_redactions(self, text):
-        """Get the list of redactions that would be applied to the text."""
-        if not self.server_available:
-            return []
+        """Get the list of redactions that would be applied to the text.
+        
+        Deprecated: use redact_and_get(), which also returns the redacted text.
+        """
+        warnings.warn("get_redactions() is deprecated, use redact_and_get()",
+                      DeprecationWarning, stacklevel=2)
+        return self.redact_and_get(text)[1]
+
+    def redact_text_batch(self, texts):
+        """Redact a list of texts with a single request to the server.
+        
+        Returns a list of ``{"redacted_text": ..., "matches": [...]}`` dicts
+        aligned with the input. Falls back to one request per text if the
+        server has no batch endpoint.
+        """
+        if not self._available():
+            return [{"redacted_text": text, "matches": []} for text in texts]
         
         try:
-            response = requests.post(
-                f"{self.mcp_url}/redact_text",
-                json={"text": text},
-                headers={"Content-Type": "application/json"},
+            response = self.session.post(
+                self._batch_url,
+                data=orjson.dumps({"texts": texts}),
+                headers=self._json_headers,
                 timeout=5
             )
+            if response.status_code == 404:
+                # Older server without the batch endpoint
+                results = []
+                for text in texts:
+                    redacted_text, matches = self.redact_and_get(text)
+                    results.append({"redacted_text": redacted_text, "matches": matches})
+                return results
+            
             response.raise_for_status()
-            result = response.json()
+            return orjson.loads(response.content)["results"]
+        except Exception as e:
+            print(f"Warning: Error redacting text: {str(e)}")
+            return [{"redacted_text": text, "matches": []} for text in texts]
+    
+    async def _redact_one(self, post, sem, text):
+        """Redact a single text with the async ``post`` callable, bounded by a semaphore.
+        
+        Concurrent calls for the same text share one pending request.
+        """
+        if not self._may_match(text):
+            return text, []  # Nothing to redact, skip the server call
+        
+        key = self._cache_key(text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await pending
+        
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            async with sem:
+                try:
+                    result = await post({"text": text})
+                    redacted = (result.get("redacted_text", text), result.get("matches", []))
+                    self._cache_put(key, redacted)
+                except Exception as e:
+                    print(f"Warning: Error redacting text: {str(e)}")
+                    redacted = (text, [])
+            fut.set_result(redacted)
+            return redacted
+        finally:
+            if not fut.done():
+                fut.cancel()
+            self._inflight.pop(key, None)
+    
+    async def redact_many(self, texts, max_concurrency=32):
+        """Redact many texts concurrently.
+        
+        Returns a list of ``(redacted_text, matches)`` tuples in input order.
+        """
+        if not await self._available_async():
+            return [(text, []) for text in texts]
+        
+        sem = asyncio.Semaphore(max_concurrency)
+        
+        if self.transport == "httpx":
+            async def post(payload):
+                return await self._post_json("/redact_text", payload)
             
-            # Return list of matches
-            return result.get("matches", [])
-        except Exception:
-            return []
+            tasks = [self._redact_one(post, sem, text) for text in texts]
+            return await asyncio.gather(*tasks)
+        
+        if aiohttp is None:
+            raise RuntimeError("redact_many requires aiohttp: pip install aiohttp")
+        
+        connector = aiohttp.TCPConnector(limit=max_concurrency, keepalive_timeout=30)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async def post(payload):
+                async with session.post(
+                    self._redact_url,
+                    data=orjson.dumps(payload),
+                    headers=self._json_headers,
+                    timeout=aiohttp.ClientTimeout(total=5)
+                ) as response:
+                    response.raise_for_status()
+                    return orjson.loads(await response.read())
+            
+            tasks = [self._redact_one(post, sem, text) for text in texts]
+            return await asyncio.gather(*tasks)
+    
+    def redact_batch(self, texts, max_concurrency=32):
+        """Synchronous wrapper around redact_many()."""
+        if self.transport == "httpx":
+            return self._run(self.redact_many(texts, max_concurrency))
+        return asyncio.run(self.redact_many(texts, max_concurrency))
+
+def _chunks(path, size=64 * 1024):
+    """Yield paragraph-aligned chunks of roughly ``size`` characters from a file.
+    
+    Chunks keep their trailing separators, so joining them yields the file contents.
+    """
+    buffer = ""
+    with open(path, 'r') as f:
+        while True:
+            block = f.read(size)
+            if not block:
+                break
+            
+            buffer += block
+            cut = buffer.rfind(PARAGRAPH_SEPARATOR)
+            if cut == -1:
+                continue  # Keep reading until a paragraph boundary is found
+            
+            cut += len(PARAGRAPH_SEPARATOR)
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+    
+    if buffer:
+        yield buffer
+
+def redact_chunk(middleware, chunk):
+    """Redact a chunk of text, batching its paragraphs into a single request.
+    
+    Returns a ``(redacted_text, matches)`` tuple.
+    """
+    if PARAGRAPH_SEPARATOR not in chunk:
+        return middleware.redact_and_get(chunk)
+    
+    results = middleware.redact_text_batch(chunk.split(PARAGRAPH_SEPARATOR))
+    redacted_text = PARAGRAPH_SEPARATOR.join(r.get("redacted_text", "") for r in results)
+    matches = [match for r in results for match in r.get("matches", [])]
+    return redacted_text, matches
 
 def mock_claude_api_call(messages, model="claude-3-opus-20240229", api_key=CLAUDE_API_KEY):
     """
@@ -91,12 +509,18 @@ def mock_claude_api_call(messages, model="claude-3-opus-20240229", api_key=CLAUD
     This function simulates the API call and response structure, but doesn't actually
     make a network request to the Claude API.
     """
+    return asyncio.run(mock_claude_api_call_async(messages, model, api_key))
+
+async def mock_claude_api_call_async(messages, model="claude-3-opus-20240229", api_key=CLAUDE_API_KEY):
+    """
+    Async variant of mock_claude_api_call() so several calls can overlap.
+    """
     print("Sending request to Claude API...")
     print(f"Model: {model}")
     print(f"Message count: {len(messages)}")
     
     # Simulate API delay
-    time.sleep(1)
+    await asyncio.sleep(1)
     
     # Simulate API response
     return {
@@ -145,6 +569,66 @@ def real_claude_api_call(messages, model="claude-3-opus-20240229", api_key=CLAUD
     # For demonstration, we're using the mock instead
     return mock_claude_api_call(messages, model, api_key)
 
+async def run_concurrent(middleware, texts, model, concurrency, redact=True):
+    """Redact texts and send each one to Claude, with up to ``concurrency`` calls in flight."""
+    if redact:
+        redacted = await middleware.redact_many(texts, max_concurrency=concurrency)
+        texts = [redacted_text for redacted_text, _ in redacted]
+    
+    sem = asyncio.Semaphore(concurrency)
+    
+    async def call(text):
+        async with sem:
+            return await mock_claude_api_call_async([{"role": "user", "content": text}], model=model)
+    
+    return await asyncio.gather(*(call(text) for text in texts))
+
+async def run_pipeline(middleware, texts, model, batch_size=4, redact=True):
+    """Redact upcoming texts while earlier ones are being sent to Claude.
+    
+    A producer redacts texts in batches and queues them; a consumer sends them
+    to Claude one at a time, so redaction latency hides behind the API calls.
+    """
+    queue = asyncio.Queue(maxsize=4)
+    responses = []
+    
+    async def producer():
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            if redact:
+                redacted = await middleware.redact_many(batch, max_concurrency=batch_size)
+                batch = [redacted_text for redacted_text, _ in redacted]
+            for text in batch:
+                await queue.put(text)
+        await queue.put(None)  # End of input
+    
+    async def consumer():
+        while True:
+            text = await queue.get()
+            if text is None:
+                break
+            responses.append(await mock_claude_api_call_async([{"role": "user", "content": text}], model=model))
+    
+    await asyncio.gather(producer(), consumer())
+    return responses
+
+def print_response(response):
+    """Print a Claude API response and its token usage."""
+    print("\nClaude Response:")
+    print("---------------")
+    
+    if isinstance(response, dict) and "content" in response:
+        for content in response["content"]:
+            if content.get("type") == "text":
+                print(content.get("text", ""))
+    else:
+        print(str(response))
+    
+    # Display token usage
+    if isinstance(response, dict) and "usage" in response:
+        usage = response["usage"]
+        print(f"\nToken usage: {usage.get('input_tokens', 0)} input, {usage.get('output_tokens', 0)} output")
+
 def main():
     parser = argparse.ArgumentParser(description="MCP Redaction Integration with Claude API Example")
     parser.add_argument("-t", "--text", help="Text to redact and send to Claude")
@@ -152,94 +636,114 @@ def main():
     parser.add_argument("--no-redact", action="store_true", help="Skip redaction (for comparison)")
     parser.add_argument("-m", "--model", default="claude-3-opus-20240229", 
                         help="Claude model to use (default: claude-3-opus-20240229)")
+    parser.add_argument("--transport", choices=["requests", "httpx"], default="requests",
+                        help="HTTP client used to talk to the redaction server (default: requests)")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="Reuse redactions for texts that differ only in whitespace "
+                             "(may redact more than the server would)")
+    parser.add_argument("--concurrent", type=int, metavar="N",
+                        help="Send each paragraph as a separate request, up to N at a time")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Send each paragraph as a separate request, redacting ahead of the Claude calls")
     args = parser.parse_args()
     
     # Get text input
-    text = None
     if args.text:
-        text = args.text
+        chunks = [args.text]
     elif args.file:
-        try:
-            with open(args.file, 'r') as f:
-                text = f.read()
-        except Exception as e:
-            print(f"Error reading file: {str(e)}")
-            sys.exit(1)
+        # Stream the file in paragraph-aligned chunks instead of reading it whole
+        chunks = _chunks(args.file)
     else:
         # Interactive mode
         print("Enter text to send to Claude (press Ctrl+D when finished):")
         try:
-            text = sys.stdin.read()
+            chunks = [sys.stdin.read()]
         except KeyboardInterrupt:
             print("\nOperation cancelled")
             sys.exit(0)
     
-    if not text:
-        print("Error: No text provided")
-        sys.exit(1)
-    
     # Initialize redaction middleware
-    middleware = RedactionMiddleware()
-    
-    # Show original text
-    print("\nOriginal text:")
-    print("-------------")
-    print(text)
-    
-    if not args.no_redact:
-        # Get redactions before applying them
-        redactions = middleware.get_redactions(text)
-        
-        # Apply redaction
-        redacted_text = middleware.redact_text(text)
-        
-        # Show redacted text
-        print("\nRedacted text (sent to Claude):")
-        print("-----------------------------")
-        print(redacted_text)
-        
-        # Show redactions
-        if redactions:
-            print("\nRedactions applied:")
-            for match in redactions:
-                original = match.get("original", "")
-                replacement = match.get("replacement", "")
-                rule = match.get("rule_name", "Unknown rule")
-                print(f"- {original} → {replacement} ({rule})")
-        
-        # Use redacted text for API call
-        text_for_api = redacted_text
-    else:
-        print("\nSkipping redaction as requested")
-        text_for_api = text
-    
-    # Prepare message for Claude
-    messages = [
-        {
-            "role": "user",
-            "content": text_for_api
-        }
-    ]
-    
-    # Make the API call
-    print("\nCalling Claude API...")
-    response = real_claude_api_call(messages, model=args.model)
-    
-    # Display the response
-    print("\nClaude Response:")
-    print("---------------")
-    
-    if isinstance(response, dict) and "content" in response:
-        for content in response["content"]:
-            if content.get("type") == "text":
-                print(content.get("text", ""))
-    else:
-        print(str(response))
-    
-    # Display token usage
-    if isinstance(response, dict) and "usage" in response:
-        usage = response["usage"]
-        print(f"\nToken usage: {usage.get('input_tokens', 0)} input, {usage.get('output_tokens', 0)} output")
+    with RedactionMiddleware(transport=args.transport, fuzzy=args.fuzzy) as middleware:
+        if args.concurrent or args.pipeline:
+            try:
+                texts = [p for chunk in chunks for p in chunk.split(PARAGRAPH_SEPARATOR) if p.strip()]
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error reading file: {str(e)}")
+                sys.exit(1)
+            
+            if not texts:
+                print("Error: No text provided")
+                sys.exit(1)
+            
+            if args.pipeline:
+                print(f"\nProcessing {len(texts)} texts through the redaction pipeline...")
+                responses = asyncio.run(run_pipeline(middleware, texts, args.model,
+                                                     redact=not args.no_redact))
+            else:
+                print(f"\nProcessing {len(texts)} texts with concurrency {args.concurrent}...")
+                responses = asyncio.run(run_concurrent(middleware, texts, args.model, args.concurrent,
+                                                       redact=not args.no_redact))
+            for response in responses:
+                print_response(response)
+            return
+        
+        # Show original text, redacting it chunk by chunk as it is read
+        print("\nOriginal text:")
+        print("-------------")
+        
+        output_parts = []
+        redactions = []
+        try:
+            for chunk in chunks:
+                print(chunk, end="")
+                if args.no_redact:
+                    output_parts.append(chunk)
+                else:
+                    redacted_chunk, chunk_redactions = redact_chunk(middleware, chunk)
+                    output_parts.append(redacted_chunk)
+                    redactions.extend(chunk_redactions)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error reading file: {str(e)}")
+            sys.exit(1)
+        print()
+        
+        if not any(output_parts):
+            print("Error: No text provided")
+            sys.exit(1)
+        
+        text_for_api = "".join(output_parts)
+        
+        if not args.no_redact:
+            # Show redacted text
+            print("\nRedacted text (sent to Claude):")
+            print("-----------------------------")
+            print(text_for_api)
+            
+            # Show redactions
+            if redactions:
+                print("\nRedactions applied:")
+                for match in redactions:
+                    original = match.get("original", "")
+                    replacement = match.get("replacement", "")
+                    rule = match.get("rule_name", "Unknown rule")
+                    print(f"- {original} → {replacement} ({rule})")
+        else:
+            print("\nSkipping redaction as requested")
+        
+        # Prepare message for Claude
+        messages = [
+            {
+                "role": "user",
+                "content": text_for_api
+            }
+        ]
+        
+        # Make the API call
+        print("\nCalling Claude API...")
+        response = real_claude_api_call(messages, model=args.model)
+        
+        # Display the response
+        print_response(response)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
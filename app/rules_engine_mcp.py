@@ -5,10 +5,26 @@ import logging
 import json
 import re
 import uuid
+import bisect
+import atexit
+import threading
+import time
+import asyncio
+import contextlib
+import functools
+import importlib.util
+import multiprocessing
+import socket
+from collections import defaultdict
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Set, Union
 from datetime import datetime
 
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
 # Create log directories
 app_dir = os.path.dirname(os.path.abspath(__file__))
 log_dir = os.path.join(app_dir, 'RulesEngineMCP')
@@ -28,12 +44,11 @@ logger = logging.getLogger("RulesEngine")
 # Import MCP and other required libraries
 try:
     from mcp.server.fastmcp import FastMCP, Context
-    import uvicorn
-    from pydantic import BaseModel, Field
+    from pydantic import BaseModel, ConfigDict, Field, model_validator
     
     logger.info("Successfully imported required libraries")
 except ImportError as e:
-    logger.error(f"Failed to import required libraries: {e}")
+    logger.error("Failed to import required libraries: %s", e)
     logger.info("Installing required libraries...")
     
     try:
@@ -42,19 +57,66 @@ except ImportError as e:
         
         # Import again after installation
         from mcp.server.fastmcp import FastMCP, Context
-        import uvicorn
-        from pydantic import BaseModel, Field
+        from pydantic import BaseModel, ConfigDict, Field, model_validator
         
         logger.info("Successfully installed and imported required libraries")
     except Exception as e:
-        logger.error(f"Failed to install required libraries: {e}")
+        logger.error("Failed to install required libraries: %s", e)
         print(f"Error: Failed to install required libraries. Please install them manually: pip install mcp uvicorn pydantic")
         sys.exit(1)
 
+# Optional: Hyperscan scans for all rule patterns at once to skip rules that can't match
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# Optional: Aho-Corasick finds any number of literal conditions in one linear scan
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Optional: the regex module can combine conditions re can't, e.g. ones reusing a group name
+try:
+    import regex
+except ImportError:
+    regex = None
+
+# Optional: orjson serializes the saved configuration much faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: PCRE2 with JIT compilation runs the hot patterns on plain ASCII text
+try:
+    import pcre2
+except ImportError:
+    pcre2 = None
+
 # ----------------- Rule Models ------------------
 
+# re flags that can be written as inline flag letters, e.g. in a scoped group (?i:...)
+_FLAG_LETTERS = ((re.ASCII, "a"), (re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x"))
+
+# Leading global inline flags, which rules keep in their flags field instead
+_INLINE_FLAGS_RE = re.compile(r"^\(\?([aimsx]+)\)")
+
+_now_cache = [0, ""]  # [whole second, ISO timestamp for it]
+
+def _now_iso() -> str:
+    """Current local time in ISO format, at one-second resolution.
+    
+    The formatted string is reused for every call within the same second.
+    """
+    now = int(time.time())
+    if now != _now_cache[0]:
+        _now_cache[:] = [now, datetime.fromtimestamp(now).isoformat()]
+    return _now_cache[1]
+
 class Rule(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     name: str
     description: str = ""
     condition: str  # Regular expression or other matching condition
@@ -63,11 +125,23 @@ class Rule(BaseModel):
     parameters: Dict[str, Any] = {}  # Action-specific parameters
     enabled: bool = True
     priority: int = 0  # Higher priority rules run first
-    created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
-    updated_at: str = Field(default_factory=lambda: datetime.now().isoformat())
+    flags: int = 0  # re flags to compile the condition with, e.g. re.IGNORECASE | re.ASCII
+    created_at: Optional[str] = None  # Stamped when added to the engine
+    updated_at: Optional[str] = None
+    
+    @model_validator(mode="after")
+    def hoist_inline_flags(self) -> "Rule":
+        """Move leading inline flags such as (?i) from the condition into flags."""
+        match = _INLINE_FLAGS_RE.match(self.condition)
+        if match:
+            for flag, letter in _FLAG_LETTERS:
+                if letter in match.group(1):
+                    self.flags = int(self.flags | flag)
+            self.condition = self.condition[match.end():]
+        return self
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "name": "SSN",
                 "description": "US Social Security Number",
@@ -79,15 +153,16 @@ class Rule(BaseModel):
                 "priority": 10
             }
         }
+    )
 
 class RuleSet(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     name: str
     description: str = ""
     rules: List[str] = []  # List of rule IDs
     enabled: bool = True
-    created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
-    updated_at: str = Field(default_factory=lambda: datetime.now().isoformat())
+    created_at: Optional[str] = None  # Stamped when added to the engine
+    updated_at: Optional[str] = None
 
 class RuleEngineConfig(BaseModel):
     rules: Dict[str, Rule] = {}  # Using a dict for faster lookups by ID
@@ -99,56 +174,554 @@ config = RuleEngineConfig()
 
 # ----------------- Rules Engine ------------------
 
+# Default rules, added when there is no config file. The conditions are
+# compiled once at import and handed to the engine's pattern cache.
+_DEFAULT_RULE_TEMPLATES: List[Dict[str, Any]] = [
+    {
+        "name": "SSN",
+        "description": "US Social Security Number",
+        "condition": r"\b\d{3}-\d{2}-\d{4}\b",
+        "action": "redact",
+        "replacement": "<SSN>",
+        "priority": 100
+    },
+    {
+        "name": "Credit Card",
+        "description": "Credit Card Number",
+        "condition": r"\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b",
+        "action": "redact",
+        "replacement": "<CREDIT_CARD>",
+        "priority": 90
+    },
+    {
+        "name": "Email",
+        "description": "Email Address",
+        "condition": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
+        "action": "redact",
+        "replacement": "<EMAIL>",
+        "priority": 80
+    },
+    {
+        "name": "Phone",
+        "description": "Phone Number",
+        "condition": r"\b(?:\+\d{1,2}\s)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b",
+        "action": "redact",
+        "replacement": "<PHONE>",
+        "priority": 70
+    },
+    {
+        "name": "Credentials",
+        "description": "API Keys, Passwords, etc.",
+        "condition": r"(password|api[_-]?key|access[_-]?token|secret)[=:]\s*\S+",
+        "action": "redact",
+        "replacement": "<CREDENTIAL>",
+        "priority": 60,
+        "flags": re.IGNORECASE | re.ASCII
+    },
+    {
+        "name": "IP Address",
+        "description": "IPv4 Address",
+        "condition": r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b",
+        "action": "redact",
+        "replacement": "<IP_ADDRESS>",
+        "priority": 50
+    },
+    {
+        "name": "URL",
+        "description": "Web URL",
+        "condition": r"https?://(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&\/=]*)",
+        "action": "flag",
+        "replacement": "<URL>",
+        "parameters": {"flag_reason": "Contains URL", "severity": "info"},
+        "priority": 40
+    },
+    {
+        "name": "Profanity Block",
+        "description": "Block text with strong profanity",
+        "condition": r"\b(f\*\*k|sh\*t)\b",  # Simplified for example
+        "action": "block",
+        "parameters": {"reason": "Contains strong profanity", "severity": "high"},
+        "priority": 200  # Higher priority to block first
+    },
+    {
+        "name": "Date Transform",
+        "description": "Transform dates to standard format",
+        "condition": r"\b(0?[1-9]|1[0-2])/(0?[1-9]|[12][0-9]|3[01])/(19|20)\d{2}\b",
+        "action": "transform",
+        "parameters": {"transform_type": "date", "format": "%Y-%m-%d"},
+        "priority": 30
+    }
+]
+
+_DEFAULT_COMPILED: List[re.Pattern] = [
+    re.compile(template["condition"], template.get("flags", 0)) for template in _DEFAULT_RULE_TEMPLATES
+]
+
+# Conditions that can't be wrapped in a combined alternation: backreferences
+# would point at the wrong group and inline global flags must lead the pattern
+_UNFUSABLE_RE = re.compile(r"\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)")
+
+# Upper bound on cached combined patterns (one per distinct group of rules)
+_MAX_COMBINED_PATTERNS = 256
+
+# ASCII characters Python's \s matches but PCRE-style engines don't
+_NON_PCRE_SPACE_RE = re.compile(r"[\x1c-\x1f]")
+
+# Regex nodes PCRE-style engines read the way re does on plain ASCII text
+_PORTABLE_OPS = frozenset({sre_parse.LITERAL, sre_parse.NOT_LITERAL, sre_parse.ANY, sre_parse.IN,
+                           sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, sre_parse.SUBPATTERN,
+                           sre_parse.BRANCH, sre_parse.AT})
+_PORTABLE_SET_OPS = frozenset({sre_parse.LITERAL, sre_parse.RANGE, sre_parse.CATEGORY, sre_parse.NEGATE})
+_PORTABLE_ANCHORS = frozenset({sre_parse.AT_BEGINNING, sre_parse.AT_BEGINNING_STRING, sre_parse.AT_END,
+                               sre_parse.AT_BOUNDARY, sre_parse.AT_NON_BOUNDARY})
+_PORTABLE_FLAGS = re.IGNORECASE | re.MULTILINE | re.DOTALL | re.ASCII | re.UNICODE
+
+# Braces re doesn't read as the {n}, {n,} or {n,m} PCRE-style engines know, e.g. {,n} or { 1}
+_ODD_BRACE_RE = re.compile(r"\{(?!\d+(?:,\d*)?\})")
+
+# POSIX-style sets such as [[:alpha:]], which re reads as a set of plain characters
+_POSIX_SET_RE = re.compile(r"\[(?::|=|\.(?!\]))")
+
+# Character masks of what a condition's matches can contain: bits 0-127 stand
+# for the ASCII characters and bit 128 for every other character
+_NON_ASCII_CHARS = 1 << 128
+_ALL_CHARS = (1 << 129) - 1
+_CATEGORY_CHARS = {
+    sre_parse.CATEGORY_DIGIT: "0123456789",
+    sre_parse.CATEGORY_WORD: "0123456789_abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    sre_parse.CATEGORY_SPACE: " \t\n\r\f\v\x1c\x1d\x1e\x1f",
+}
+# ASCII letters that match non-ASCII characters case-insensitively, e.g. k and the Kelvin sign
+_NON_ASCII_FOLDS = "iksIKS"
+
+# Upper bound on cached plain-text matchers (PCRE2 JIT or ASCII-mode patterns)
+_MAX_PLAIN_MATCHERS = 512
+
+# Seconds to wait before writing the configuration, so bursts of edits are saved once
+_SAVE_DELAY = 0.5
+
+# Journal entries after which the configuration is rewritten and the journal emptied
+_JOURNAL_COMPACT_AT = 1000
+
+def _literal_requirements(items) -> List[tuple]:
+    """Collect the literals a parsed regex sequence can't match without.
+    
+    Each requirement is a tuple of alternatives, at least one of which must
+    appear in any text the sequence matches.
+    """
+    requirements = []
+    run = []
+    
+    def end_run():
+        if run:
+            requirements.append(("".join(run),))
+            run.clear()
+    
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        end_run()
+        if op is sre_parse.SUBPATTERN:
+            group, add_flags, del_flags, sub = av
+            if not add_flags & re.IGNORECASE:
+                requirements.extend(_literal_requirements(sub))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            low, high, sub = av
+            if low >= 1:
+                requirements.extend(_literal_requirements(sub))
+        elif op is sre_parse.BRANCH:
+            # Every alternative must contribute a literal, else the branch requires nothing
+            alternatives = []
+            for branch in av[1]:
+                found = _literal_requirements(branch)
+                if not found:
+                    alternatives = []
+                    break
+                alternatives.extend(max(found, key=lambda r: min(map(len, r))))
+            if alternatives:
+                requirements.append(tuple(alternatives))
+    end_run()
+    return requirements
+
+def _required_literals(condition: str, flags: int = 0) -> tuple:
+    """Extract the literals a condition needs in order to match anything.
+    
+    Returns a tuple of requirements; each is a tuple of substrings of which at
+    least one must be present. Case-insensitive or unparseable conditions
+    yield no requirements.
+    """
+    try:
+        parsed = sre_parse.parse(condition, flags)
+    except Exception:
+        return ()
+    if parsed.state.flags & re.IGNORECASE:
+        return ()
+    return tuple(dict.fromkeys(_literal_requirements(parsed)))
+
+def _literal_condition(condition: str, flags: int = 0) -> Optional[str]:
+    """Return the text a condition matches if it's a plain case-sensitive literal."""
+    try:
+        parsed = sre_parse.parse(condition, flags)
+    except Exception:
+        return None
+    if parsed.state.flags & re.IGNORECASE or not parsed.data:
+        return None
+    if any(op is not sre_parse.LITERAL for op, av in parsed):
+        return None
+    return "".join(chr(av) for op, av in parsed)
+
+def _portable_items(items) -> bool:
+    """Check a parsed regex sequence for nodes PCRE-style engines could read differently."""
+    for op, av in items:
+        if op not in _PORTABLE_OPS:
+            return False
+        if op in (sre_parse.LITERAL, sre_parse.NOT_LITERAL):
+            if av > 0x7f:
+                return False
+        elif op is sre_parse.IN:
+            for set_op, set_av in av:
+                if set_op not in _PORTABLE_SET_OPS:
+                    return False
+                if set_op is sre_parse.LITERAL and set_av > 0x7f:
+                    return False
+                if set_op is sre_parse.RANGE and set_av[1] > 0x7f:
+                    return False
+        elif op is sre_parse.AT:
+            if av not in _PORTABLE_ANCHORS:
+                return False
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            if not _portable_items(av[2]):
+                return False
+        elif op is sre_parse.SUBPATTERN:
+            group, add_flags, del_flags, sub = av
+            if (add_flags | del_flags) & ~_PORTABLE_FLAGS or not _portable_items(sub):
+                return False
+        elif op is sre_parse.BRANCH:
+            if not all(_portable_items(branch) for branch in av[1]):
+                return False
+    return True
+
+@functools.lru_cache(maxsize=1024)
+def _is_portable(condition: str, flags: int = 0) -> bool:
+    """Check whether PCRE-style engines (Hyperscan, PCRE2) match a condition exactly like re on plain ASCII text.
+    
+    Only an allowlist of regex features passes, written the one way all the
+    engines read alike: no {,n} quantifiers, no [[:alpha:]] sets, no \\Z.
+    """
+    if _ODD_BRACE_RE.search(condition) or _POSIX_SET_RE.search(condition):
+        return False
+    try:
+        parsed = sre_parse.parse(condition, flags)
+    except Exception:
+        return False
+    return not parsed.state.flags & ~_PORTABLE_FLAGS and _portable_items(parsed)
+
+def _char_mask(code: int, ignore_case: bool) -> int:
+    """Get the character mask of a literal character."""
+    if code > 0x7f:
+        # Some non-ASCII characters fold to ASCII ones, e.g. the Kelvin sign to k
+        return _ALL_CHARS if ignore_case else _NON_ASCII_CHARS
+    mask = 1 << code
+    if ignore_case and chr(code).isalpha():
+        mask |= 1 << ord(chr(code).swapcase())
+        if chr(code) in _NON_ASCII_FOLDS:
+            mask |= _NON_ASCII_CHARS
+    return mask
+
+def _set_mask(items, ignore_case: bool) -> int:
+    """Get the character mask of a parsed [...] set."""
+    mask = 0
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            mask |= _char_mask(av, ignore_case)
+        elif op is sre_parse.RANGE:
+            for code in range(av[0], min(av[1], 0x7f) + 1):
+                mask |= _char_mask(code, ignore_case)
+            if av[1] > 0x7f:
+                mask |= _char_mask(av[1], ignore_case)
+        elif op is sre_parse.CATEGORY and av in _CATEGORY_CHARS:
+            for char in _CATEGORY_CHARS[av]:
+                mask |= _char_mask(ord(char), ignore_case)
+            mask |= _NON_ASCII_CHARS
+        else:
+            return _ALL_CHARS  # Negated sets and categories
+    return mask
+
+def _consumed_mask(items, ignore_case: bool) -> int:
+    """Get the character mask of a parsed regex sequence; lookarounds and anchors consume nothing."""
+    mask = 0
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            mask |= _char_mask(av, ignore_case)
+        elif op is sre_parse.IN:
+            mask |= _set_mask(av, ignore_case)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            mask |= _consumed_mask(av[2], ignore_case)
+        elif op is sre_parse.SUBPATTERN:
+            group, add_flags, del_flags, sub = av
+            scoped = (ignore_case or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE
+            mask |= _consumed_mask(sub, scoped)
+        elif op is sre_parse.BRANCH:
+            for branch in av[1]:
+                mask |= _consumed_mask(branch, ignore_case)
+        elif op not in (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            return _ALL_CHARS  # Any character, backreferences and the like
+    return mask
+
+@functools.lru_cache(maxsize=1024)
+def _consumed_chars(condition: str, flags: int = 0) -> int:
+    """Get the character mask of the text a condition can match.
+    
+    Conditions that can match the empty string, or can't be parsed, get every
+    character: their matches can overlap anything's.
+    """
+    try:
+        parsed = sre_parse.parse(condition, flags)
+    except Exception:
+        return _ALL_CHARS
+    if parsed.getwidth()[0] == 0:
+        return _ALL_CHARS
+    return _consumed_mask(parsed, bool(parsed.state.flags & re.IGNORECASE))
+
+@functools.lru_cache(maxsize=256)
+def _overlapping_rules(conditions: tuple) -> frozenset:
+    """Get the indexes of the ``(condition, flags)`` pairs whose matches could overlap another pair's.
+    
+    Two matches can only overlap if they have a character in common, so pairs
+    sharing no character with the rest can never overlap.
+    """
+    masks = [_consumed_chars(condition, flags) for condition, flags in conditions]
+    seen = 0
+    shared = 0
+    for mask in masks:
+        shared |= seen & mask
+        seen |= mask
+    return frozenset(index for index, mask in enumerate(masks) if mask & shared)
+
+def _scoped_condition(rule: Rule) -> str:
+    """Get a rule's condition with its flags applied inline, for use in a combined pattern."""
+    letters = "".join(letter for flag, letter in _FLAG_LETTERS if rule.flags & flag)
+    return f"(?{letters}:{rule.condition})" if letters else rule.condition
+
+def _is_fusable(rule: Rule) -> bool:
+    """Check whether a rule's condition can be wrapped in a combined alternation.
+    
+    Verbose conditions can't: a trailing comment would swallow the rest of it.
+    """
+    return not _UNFUSABLE_RE.search(rule.condition) and not rule.flags & re.VERBOSE
+
+class _GroupMatch:
+    """The parts of a re.Match the engine uses, for matchers that aren't re patterns."""
+    __slots__ = ("string", "lastgroup", "_start", "_end")
+    
+    def __init__(self, string: str, start: int, end: int, lastgroup: str):
+        self.string = string
+        self.lastgroup = lastgroup
+        self._start = start
+        self._end = end
+    
+    def span(self) -> tuple:
+        return self._start, self._end
+    
+    def group(self, index: int = 0) -> str:
+        return self.string[self._start:self._end]
+
+class _LiteralMatcher:
+    """Aho-Corasick scanner standing in for the combined pattern of literal-only rules.
+    
+    Like the regex alternation it replaces, it reports leftmost non-overlapping
+    matches named ``r<index>``, with earlier rules winning at the same position.
+    """
+    def __init__(self, literals: List[str]):
+        automaton = ahocorasick.Automaton()
+        for index, literal in enumerate(literals):
+            if not automaton.exists(literal):
+                automaton.add_word(literal, (index, len(literal)))
+        automaton.make_automaton()
+        self._automaton = automaton
+    
+    def finditer(self, text: str):
+        hits = sorted((end - length + 1, index, end + 1) for end, (index, length) in self._automaton.iter(text))
+        position = 0
+        for start, index, end in hits:
+            if start >= position:
+                position = end
+                yield _GroupMatch(text, start, end, f"r{index}")
+    
+    def search(self, text: str) -> Optional[_GroupMatch]:
+        return next(self.finditer(text), None)
+
+class _RegexModuleMatcher:
+    """Combined pattern compiled with the regex module, which allows a group name
+    to appear in several conditions.
+    
+    With reused names regex's lastgroup can't be trusted, so matches report the
+    ``r<index>`` group of the rule that matched themselves.
+    """
+    def __init__(self, source: str, count: int):
+        self._pattern = regex.compile(source)
+        self._groups = [self._pattern.groupindex[f"r{i}"] for i in range(count)]
+    
+    def _wrap(self, match) -> _GroupMatch:
+        index = next(i for i, group in enumerate(self._groups) if match.start(group) != -1)
+        return _GroupMatch(match.string, match.start(), match.end(), f"r{index}")
+    
+    def finditer(self, text: str):
+        return map(self._wrap, self._pattern.finditer(text))
+    
+    def search(self, text: str) -> Optional[_GroupMatch]:
+        match = self._pattern.search(text)
+        return self._wrap(match) if match else None
+
 class RulesEngine:
     def __init__(self):
+        self._patterns: Dict[str, tuple] = {}  # (condition, flags, compiled pattern) by rule ID
+        self._combined: Dict[tuple, Optional[re.Pattern]] = {}  # Fused patterns by rule group
+        self._scanners: Dict[tuple, tuple] = {}  # Hyperscan databases by rule list
+        self._literals: Dict[str, tuple] = {}  # (condition, flags, required literals, literal text) by rule ID
+        self._plain_matchers: Dict[tuple, Any] = {}  # Patterns to use on plain ASCII text by (source, flags)
+        self._rules_by_set: Dict[str, List[Rule]] = {}  # Rules in each rule set, by rule set ID
+        self._sorted_by_set: Dict[str, List[Rule]] = {}  # Enabled rules by priority, by rule set ID
+        self._rule_dicts: Dict[str, tuple] = {}  # (rule, model_dump()) by rule ID
+        self._rule_set_dicts: Dict[str, tuple] = {}  # (rule set, model_dump()) by rule set ID
+        self._rule_to_sets: Dict[str, Set[str]] = defaultdict(set)  # Rule set IDs by rule ID
+        self._set_members: Dict[str, Set[str]] = {}  # Rule IDs last indexed for each rule set
+        self._save_lock = threading.RLock()
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty = False  # Configuration has changes not yet written to rules_config.json
+        self._journal_entries = 0  # Changes recorded in the journal since the last full save
+        atexit.register(self.flush_config)
         self.load_config()
     
     def load_config(self):
         """Load configuration from file."""
         global config
         
+        self._rules_by_set.clear()
+        self._sorted_by_set.clear()
+        self._rule_dicts.clear()
+        self._rule_set_dicts.clear()
         config_file = os.path.join(log_dir, 'rules_config.json')
         if os.path.exists(config_file):
             try:
-                with open(config_file, 'r') as f:
-                    data = json.load(f)
-                    # Convert dictionaries to model objects
-                    rules = {id: Rule(**rule) for id, rule in data.get('rules', {}).items()}
-                    rule_sets = {id: RuleSet(**rule_set) for id, rule_set in data.get('rule_sets', {}).items()}
-                    default_rule_set = data.get('default_rule_set', 'default')
-                    
-                    config = RuleEngineConfig(
-                        rules=rules,
-                        rule_sets=rule_sets,
-                        default_rule_set=default_rule_set
-                    )
-                logger.info(f"Loaded {len(config.rules)} rules and {len(config.rule_sets)} rule sets")
+                # Parse and validate the whole file in one pass in pydantic's core
+                with open(config_file, 'rb') as f:
+                    config = RuleEngineConfig.model_validate_json(f.read())
+                logger.info("Loaded %d rules and %d rule sets", len(config.rules), len(config.rule_sets))
             except Exception as e:
-                logger.error(f"Error loading configuration: {str(e)}")
+                logger.error("Error loading configuration: %s", e)
                 self.add_default_rules()
         else:
             # Add default rules if file doesn't exist
             self.add_default_rules()
             self.save_config()
+        
+        self._replay_journal()
+        
+        self._rule_to_sets.clear()
+        self._set_members.clear()
+        for rule_set_id, rule_set in config.rule_sets.items():
+            self._index_rule_set(rule_set_id, rule_set.rules)
+    
+    def _replay_journal(self):
+        """Apply the changes recorded in the journal since the last full save."""
+        journal_file = os.path.join(log_dir, 'rules_journal.jsonl')
+        if not os.path.exists(journal_file):
+            return
+        
+        entries = 0
+        with open(journal_file, 'rb') as f:
+            for line in f:
+                try:
+                    entry = orjson.loads(line) if orjson is not None else json.loads(line)
+                    op, key, data = entry["op"], entry["id"], entry.get("data")
+                    if op == "upsert_rule":
+                        config.rules[key] = Rule.model_validate(data)
+                    elif op == "delete_rule":
+                        config.rules.pop(key, None)
+                    elif op == "upsert_rule_set":
+                        config.rule_sets[key] = RuleSet.model_validate(data)
+                    elif op == "delete_rule_set":
+                        config.rule_sets.pop(key, None)
+                    elif op == "set_default_rule_set":
+                        config.default_rule_set = key
+                except Exception as e:
+                    # Most likely a line cut short by a crash; nothing after it can be trusted
+                    logger.warning("Stopping journal replay at entry %d: %s", entries + 1, e)
+                    break
+                entries += 1
+        
+        if entries:
+            logger.info("Replayed %d journal entries", entries)
+            self._journal_entries = entries
+            self.save_config()
+    
+    def _record(self, op: str, key: str, data: Optional[BaseModel] = None):
+        """Append one change to the journal instead of rewriting the whole configuration."""
+        entry = {"op": op, "id": key}
+        if data is not None:
+            entry["data"] = data.model_dump(mode="json")
+        line = orjson.dumps(entry) if orjson is not None else json.dumps(entry).encode("utf-8")
+        
+        with self._save_lock:
+            try:
+                with open(os.path.join(log_dir, 'rules_journal.jsonl'), 'ab') as f:
+                    f.write(line + b"\n")
+            except Exception as e:
+                logger.error("Error writing journal, saving full configuration: %s", e)
+                self.save_config()
+                return
+            
+            self._journal_entries += 1
+            if self._journal_entries >= _JOURNAL_COMPACT_AT:
+                self.save_config()
     
     def save_config(self):
-        """Save configuration to file."""
-        global config
+        """Schedule saving the configuration to file.
         
-        config_file = os.path.join(log_dir, 'rules_config.json')
-        try:
-            # Convert to dict for JSON serialization
-            data = {
-                'rules': {id: rule.model_dump() for id, rule in config.rules.items()},
-                'rule_sets': {id: rule_set.model_dump() for id, rule_set in config.rule_sets.items()},
-                'default_rule_set': config.default_rule_set
-            }
+        Saves are debounced: edits made within _SAVE_DELAY seconds of each
+        other are written once. Use flush_config() to write immediately.
+        """
+        with self._save_lock:
+            self._dirty = True
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(_SAVE_DELAY, self.flush_config)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+    
+    def flush_config(self):
+        """Write the configuration to file if it has unsaved changes, emptying the journal."""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._dirty and not self._journal_entries:
+                return
+            self._dirty = False
             
-            with open(config_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            logger.info(f"Saved {len(config.rules)} rules and {len(config.rule_sets)} rule sets")
-        except Exception as e:
-            logger.error(f"Error saving configuration: {str(e)}")
+            config_file = os.path.join(log_dir, 'rules_config.json')
+            tmp_file = config_file + '.tmp'
+            try:
+                data = config.model_dump(mode="json")
+                if orjson is not None:
+                    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+                else:
+                    payload = json.dumps(data, indent=2).encode("utf-8")
+                
+                # Write to a temporary file and swap it in so readers never see a partial file
+                with open(tmp_file, 'wb') as f:
+                    f.write(payload)
+                os.replace(tmp_file, config_file)
+                
+                # Everything in the journal is now part of the saved configuration
+                if self._journal_entries:
+                    open(os.path.join(log_dir, 'rules_journal.jsonl'), 'wb').close()
+                    self._journal_entries = 0
+                logger.info("Saved %d rules and %d rule sets", len(config.rules), len(config.rule_sets))
+            except Exception as e:
+                self._dirty = True
+                logger.error("Error saving configuration: %s", e)
     
     def add_default_rules(self):
         """Add default rules and rule sets."""
@@ -162,86 +735,19 @@ class RulesEngine:
             description="Default rule set with common patterns"
         )
         
-        # Add default rules
-        default_rules = [
-            Rule(
-                name="SSN",
-                description="US Social Security Number",
-                condition=r"\b\d{3}-\d{2}-\d{4}\b",
-                action="redact",
-                replacement="<SSN>",
-                priority=100
-            ),
-            Rule(
-                name="Credit Card",
-                description="Credit Card Number",
-                condition=r"\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b",
-                action="redact",
-                replacement="<CREDIT_CARD>",
-                priority=90
-            ),
-            Rule(
-                name="Email",
-                description="Email Address",
-                condition=r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
-                action="redact",
-                replacement="<EMAIL>",
-                priority=80
-            ),
-            Rule(
-                name="Phone",
-                description="Phone Number",
-                condition=r"\b(?:\+\d{1,2}\s)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b",
-                action="redact",
-                replacement="<PHONE>",
-                priority=70
-            ),
-            Rule(
-                name="Credentials",
-                description="API Keys, Passwords, etc.",
-                condition=r"(password|api[_-]?key|access[_-]?token|secret)[=:]\s*\S+",
-                action="redact",
-                replacement="<CREDENTIAL>",
-                priority=60
-            ),
-            Rule(
-                name="IP Address",
-                description="IPv4 Address",
-                condition=r"\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b",
-                action="redact",
-                replacement="<IP_ADDRESS>",
-                priority=50
-            ),
-            Rule(
-                name="URL",
-                description="Web URL",
-                condition=r"https?://(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&\/=]*)",
-                action="flag",
-                replacement="<URL>",
-                parameters={"flag_reason": "Contains URL", "severity": "info"},
-                priority=40
-            ),
-            Rule(
-                name="Profanity Block",
-                description="Block text with strong profanity",
-                condition=r"\b(f\*\*k|sh\*t)\b",  # Simplified for example
-                action="block",
-                parameters={"reason": "Contains strong profanity", "severity": "high"},
-                priority=200  # Higher priority to block first
-            ),
-            Rule(
-                name="Date Transform",
-                description="Transform dates to standard format",
-                condition=r"\b(0?[1-9]|1[0-2])/(0?[1-9]|[12][0-9]|3[01])/(19|20)\d{2}\b",
-                action="transform",
-                parameters={"transform_type": "date", "format": "%Y-%m-%d"},
-                priority=30
-            )
-        ]
+        # Add default rules, reusing the patterns compiled at import
+        default_rules = []
+        for template, pattern in zip(_DEFAULT_RULE_TEMPLATES, _DEFAULT_COMPILED):
+            rule = Rule(**template)
+            self._patterns[rule.id] = (rule.condition, rule.flags, pattern)
+            default_rules.append(rule)
         
         # Add rules to config
+        now = _now_iso()
+        default_set.created_at = default_set.updated_at = now
         rule_ids = []
         for rule in default_rules:
+            rule.created_at = rule.updated_at = now
             rule_id = rule.id
             config.rules[rule_id] = rule
             rule_ids.append(rule_id)
@@ -251,37 +757,448 @@ class RulesEngine:
         config.rule_sets[default_set_id] = default_set
         config.default_rule_set = default_set_id
         
-        logger.info(f"Added {len(default_rules)} default rules")
+        logger.info("Added %d default rules", len(default_rules))
+    
+    def _get_pattern(self, rule: Rule) -> re.Pattern:
+        """Get the compiled pattern for a rule, compiling it on first use."""
+        cached = self._patterns.get(rule.id)
+        if cached is None or cached[0] != rule.condition or cached[1] != rule.flags:
+            cached = (rule.condition, rule.flags, re.compile(rule.condition, rule.flags))
+            self._patterns[rule.id] = cached
+        return cached[2]
+    
+    def _get_matcher(self, pattern: re.Pattern, plain: bool):
+        """Get the fastest equivalent of a pattern for plain ASCII text.
+        
+        That's the PCRE2 JIT build when pcre2 is installed and the pattern
+        passes _is_portable, else the pattern recompiled with re.ASCII, which
+        skips Unicode character classification. Other texts always get the re
+        pattern.
+        """
+        if not plain or not isinstance(pattern, re.Pattern):
+            return pattern
+        
+        source = pattern.pattern
+        key = (source, pattern.flags)
+        matcher = self._plain_matchers.get(key)
+        if matcher is None:
+            matcher = pattern
+            if pcre2 is not None and _is_portable(source, pattern.flags):
+                letters = "".join(letter for flag, letter in _FLAG_LETTERS[1:] if pattern.flags & flag)
+                try:
+                    matcher = pcre2.compile(f"(?{letters}){source}" if letters else source, jit=True)
+                except Exception as e:
+                    logger.debug("PCRE2 can't compile pattern, using re: %s", e)
+            if matcher is pattern and source.isascii():
+                try:
+                    matcher = re.compile(source, pattern.flags & ~re.UNICODE | re.ASCII)
+                except (re.error, ValueError):
+                    pass  # e.g. an inline (?u) flag
+            if len(self._plain_matchers) >= _MAX_PLAIN_MATCHERS:
+                self._plain_matchers.clear()
+            self._plain_matchers[key] = matcher
+        return matcher
+    
+    @staticmethod
+    def _is_plain(text: str) -> bool:
+        """Check whether PCRE-style engines match the text the same way Python's re does."""
+        return text.isascii() and not _NON_PCRE_SPACE_RE.search(text)
+    
+    def _get_literals(self, rule: Rule) -> tuple:
+        """Get the literal requirements for a rule, extracting them on first use."""
+        return self._literal_info(rule)[2]
+    
+    def _get_literal_text(self, rule: Rule) -> Optional[str]:
+        """Get the text a rule's condition matches if it's a plain literal."""
+        return self._literal_info(rule)[3]
+    
+    def _literal_info(self, rule: Rule) -> tuple:
+        cached = self._literals.get(rule.id)
+        if cached is None or cached[0] != rule.condition or cached[1] != rule.flags:
+            cached = (rule.condition, rule.flags, _required_literals(rule.condition, rule.flags),
+                      _literal_condition(rule.condition, rule.flags))
+            self._literals[rule.id] = cached
+        return cached
+    
+    def _may_match(self, rule: Rule, text: str, introduced: Set[str] = frozenset()) -> bool:
+        """Check a rule's required literals against the text with plain substring scans.
+        
+        A literal sharing a character with ``introduced``, the characters
+        earlier replacements may have added, counts as present.
+        """
+        for alternatives in self._get_literals(rule):
+            if not any(literal in text or not introduced.isdisjoint(literal) for literal in alternatives):
+                return False
+        return True
+    
+    def _screen_rules(self, rules: List[Rule], text: str) -> List[Rule]:
+        """Drop the rules whose required literals are missing from the text.
+        
+        Rules after a kept redact or transform rule may see changed text, so a
+        literal an earlier kept replacement could complete is not required,
+        and after a transform, or a replacement that could join up the text
+        around it, no literal is. Block rules only ever see the original text.
+        """
+        kept = []
+        introduced = set()  # Characters kept replacements may add; None once any text could appear
+        for rule in rules:
+            if rule.action == "block":
+                if self._may_match(rule, text):
+                    kept.append(rule)
+                continue
+            if introduced is not None and not self._may_match(rule, text, introduced):
+                continue
+            kept.append(rule)
+            if rule.action == "redact" and introduced is not None and rule.replacement and "\\" not in rule.replacement:
+                introduced.update(rule.replacement)
+            elif rule.action in ("redact", "transform"):
+                introduced = None
+        return kept
+    
+    def _group_rules(self, rules: List[Rule]) -> List[tuple]:
+        """Group consecutive redact/flag rules that can share one combined pattern.
+        
+        Returns ``(action, rules)`` tuples in priority order; rules that can't be
+        combined get a group of their own. With Aho-Corasick available, plain
+        literal rules are kept in groups of their own so they can share one
+        automaton.
+        """
+        groups = []
+        last_fusable = False
+        last_literal = False
+        for rule in rules:
+            fusable = rule.action in ("redact", "flag") and _is_fusable(rule) and "\\" not in rule.replacement
+            literal = ahocorasick is not None and self._get_literal_text(rule) is not None
+            if fusable and last_fusable and groups[-1][0] == rule.action and literal == last_literal:
+                groups[-1][1].append(rule)
+            else:
+                groups.append((rule.action, [rule]))
+            last_fusable = fusable
+            last_literal = literal
+        return groups
+    
+    def _get_combined(self, rules: List[Rule]) -> Optional[re.Pattern]:
+        """Get a single alternation pattern matching any of the rules.
+        
+        Each rule's condition becomes the named group ``r<index>``; earlier
+        (higher priority) rules win when several match at the same position.
+        Groups of plain literals get an Aho-Corasick _LiteralMatcher instead, and
+        alternations re rejects are retried with the regex module. Returns None if the conditions can't be combined.
+        """
+        key = tuple((rule.id, rule.condition, rule.flags) for rule in rules)
+        if key not in self._combined:
+            if len(self._combined) >= _MAX_COMBINED_PATTERNS:
+                self._combined.clear()
+            literals = [self._get_literal_text(rule) for rule in rules]
+            if ahocorasick is not None and None not in literals:
+                self._combined[key] = _LiteralMatcher(literals)
+                return self._combined[key]
+            source = "|".join(f"(?P<r{i}>{_scoped_condition(rule)})" for i, rule in enumerate(rules))
+            try:
+                self._combined[key] = re.compile(source)
+            except re.error as e:
+                self._combined[key] = None
+                if regex is not None:
+                    try:
+                        self._combined[key] = _RegexModuleMatcher(source, len(rules))
+                    except regex.error:
+                        pass
+                if self._combined[key] is None:
+                    logger.warning("Cannot combine rules, applying them one by one: %s", e)
+        return self._combined[key]
+    
+    @staticmethod
+    def _fused_matches(rules: List[Rule], pattern, text: str):
+        """Find the matches of a fused group of rules, or None if they may differ from the rules' own.
+        
+        The alternation reports the leftmost match whatever its rule's priority,
+        so a match from a rule that can overlap another rule of the group may
+        hide a higher priority match; the group is then applied rule by rule.
+        """
+        overlapping = _overlapping_rules(tuple((rule.condition, rule.flags) for rule in rules))
+        if not overlapping:
+            return pattern.finditer(text)
+        matches = list(pattern.finditer(text))
+        if any(int(match.lastgroup[1:]) in overlapping for match in matches):
+            return None
+        return matches
+    
+    def _collect_redactions(self, rules: List[Rule], matches,
+                            edits: List[tuple], results: List[Dict[str, Any]]):
+        """Turn the matches of one rule or a fused group of rules into redactions.
+        
+        Matches become ``(start, end, replacement)`` edits against the text,
+        kept sorted by start; a match overlapping an edit from an earlier
+        (higher priority) rule is skipped.
+        """
+        starts = [edit[0] for edit in edits]
+        for match in matches:
+            rule = rules[int(match.lastgroup[1:])] if len(rules) > 1 else rules[0]
+            start, end = match.span()
+            index = bisect.bisect_right(starts, start)
+            if index and edits[index - 1][1] > start:
+                continue
+            if index < len(edits) and edits[index][0] < end:
+                continue
+            
+            replacement = match.expand(rule.replacement) if "\\" in rule.replacement else rule.replacement
+            edits.insert(index, (start, end, replacement))
+            starts.insert(index, start)
+            results.append({
+                "rule_id": rule.id,
+                "rule_name": rule.name,
+                "action": "redact",
+                "original": match.group(0),
+                "replacement": replacement
+            })
+    
+    def _find_block(self, rules: List[Rule], text: str, plain: bool,
+                    results: List[Dict[str, Any]]) -> Optional[Rule]:
+        """Find the highest priority block rule matching the text, checking all of them in one search if possible."""
+        combined = None
+        if len(rules) > 1 and all(_is_fusable(rule) for rule in rules):
+            combined = self._get_combined(rules)
+        if combined is not None:
+            match = self._get_matcher(combined, plain).search(text)
+            if match is None:
+                return None
+            # The leftmost match may come from a lower priority rule; a higher
+            # priority rule matching further on still wins
+            index = int(match.lastgroup[1:])
+            start = match.span()[0]
+            for rule in rules[:index]:
+                if self._get_matcher(self._get_pattern(rule), plain).search(text, start) is not None:
+                    return rule
+            return rules[index]
+        
+        for rule in rules:
+            try:
+                if self._get_matcher(self._get_pattern(rule), plain).search(text):
+                    return rule
+            except Exception as e:
+                logger.error("Error applying rule %s: %s", rule.name, e)
+                results.append({
+                    "rule_id": rule.id,
+                    "rule_name": rule.name,
+                    "action": "error",
+                    "error": str(e)
+                })
+        return None
+    
+    @staticmethod
+    def _apply_edits(text: str, edits: List[tuple]) -> str:
+        """Build the redacted text from sorted, non-overlapping edits in one join."""
+        out = []
+        position = 0
+        for start, end, replacement in edits:
+            out.append(text[position:start])
+            out.append(replacement)
+            position = end
+        out.append(text[position:])
+        return "".join(out)
+    
+    def _collect_flags(self, rules: List[Rule], matches, results: List[Dict[str, Any]]):
+        """Flag the matches of one rule or a fused group of rules."""
+        for match in matches:
+            rule = rules[int(match.lastgroup[1:])] if len(rules) > 1 else rules[0]
+            results.append({
+                "rule_id": rule.id,
+                "rule_name": rule.name,
+                "action": "flag",
+                "text": match.group(0),
+                "flag_reason": rule.parameters.get("flag_reason", "Flagged by rule"),
+                "severity": rule.parameters.get("severity", "info")
+            })
+    
+    def _get_scanner(self, rules: List[Rule]) -> tuple:
+        """Get a Hyperscan database reporting which of the rules match a text.
+        
+        Returns ``(database, always)``; ``always`` holds the indexes of rules
+        Hyperscan can't compile (backreferences, lookarounds, ...) or could read
+        differently from re, which must always be treated as possible matches.
+        """
+        key = tuple((rule.id, rule.condition, rule.flags) for rule in rules)
+        scanner = self._scanners.get(key)
+        if scanner is None:
+            expressions, ids, flags, always = [], [], [], set()
+            for index, rule in enumerate(rules):
+                if not _is_portable(rule.condition, rule.flags):
+                    always.add(index)
+                    continue
+                expression = rule.condition.encode("utf-8")
+                expression_flags = hyperscan.HS_FLAG_SINGLEMATCH
+                for flag, hs_flag in ((re.IGNORECASE, hyperscan.HS_FLAG_CASELESS),
+                                      (re.MULTILINE, hyperscan.HS_FLAG_MULTILINE),
+                                      (re.DOTALL, hyperscan.HS_FLAG_DOTALL)):
+                    if rule.flags & flag:
+                        expression_flags |= hs_flag
+                try:
+                    hyperscan.Database().compile(expressions=[expression], ids=[index], elements=1, flags=[expression_flags])
+                except hyperscan.error:
+                    always.add(index)
+                    continue
+                expressions.append(expression)
+                ids.append(index)
+                flags.append(expression_flags)
+            
+            database = None
+            if expressions:
+                database = hyperscan.Database()
+                database.compile(expressions=expressions, ids=ids, elements=len(ids), flags=flags)
+            scanner = (database, always)
+            self._scanners[key] = scanner
+        return scanner
+    
+    def _candidate_rules(self, rules: List[Rule], text: str) -> List[Rule]:
+        """Drop the rules that can't match the text, using a single Hyperscan pass.
+        
+        Only plain-ASCII texts are pre-scanned: Hyperscan's \\b, \\d and \\s
+        are ASCII-only, so for other texts it could miss matches Python's re finds.
+        Once a kept redact or transform rule may have changed the text, the
+        rules after it are kept too, except block rules, which only ever see
+        the original text.
+        """
+        if hyperscan is None or not rules or not self._is_plain(text):
+            return rules
+        
+        try:
+            database, always = self._get_scanner(rules)
+            hits = set(always)
+            if database is not None:
+                def on_match(index, start, end, flags, context):
+                    hits.add(index)
+                
+                database.scan(text.encode("ascii"), match_event_handler=on_match)
+        except Exception as e:
+            logger.warning("Hyperscan pre-scan failed, applying all rules: %s", e)
+            return rules
+        
+        kept = []
+        changed = False
+        for index, rule in enumerate(rules):
+            if index in hits or (changed and rule.action != "block"):
+                kept.append(rule)
+                if rule.action in ("redact", "transform"):
+                    changed = True
+        return kept
     
     def get_rule_by_id(self, rule_id: str) -> Optional[Rule]:
         """Get a rule by ID."""
         return config.rules.get(rule_id)
     
     def get_rules_by_set(self, rule_set_id: Optional[str] = None) -> List[Rule]:
-        """Get all rules in a rule set."""
+        """Get all rules in a rule set.
+        
+        The list is cached until the rule set or one of its rules changes and
+        must not be modified by callers.
+        """
         if rule_set_id is None:
             rule_set_id = config.default_rule_set
         
-        rule_set = config.rule_sets.get(rule_set_id)
-        if not rule_set:
-            return []
+        rules = self._rules_by_set.get(rule_set_id)
+        if rules is None:
+            rule_set = config.rule_sets.get(rule_set_id)
+            if not rule_set:
+                return []
+            
+            rules = [config.rules[rule_id] for rule_id in rule_set.rules if rule_id in config.rules]
+            self._rules_by_set[rule_set_id] = rules
+        return rules
+    
+    def _get_sorted_rules(self, rule_set_id: Optional[str] = None) -> List[Rule]:
+        """Get the enabled rules of a rule set, highest priority first.
+        
+        The list is cached until the rule set or one of its rules changes and
+        must not be modified by callers.
+        """
+        if rule_set_id is None:
+            rule_set_id = config.default_rule_set
         
-        return [config.rules[rule_id] for rule_id in rule_set.rules if rule_id in config.rules]
+        rules = self._sorted_by_set.get(rule_set_id)
+        if rules is None:
+            rules = [rule for rule in self.get_rules_by_set(rule_set_id) if rule.enabled]
+            rules.sort(key=lambda r: r.priority, reverse=True)
+            self._sorted_by_set[rule_set_id] = rules
+        return rules
+    
+    def get_rule_dict(self, rule: Rule) -> Dict[str, Any]:
+        """Get a rule as a plain dict, cached until the rule changes.
+        
+        The dict is shared between callers and must not be modified.
+        """
+        cached = self._rule_dicts.get(rule.id)
+        if cached is None or cached[0] is not rule:
+            cached = (rule, rule.model_dump())
+            self._rule_dicts[rule.id] = cached
+        return cached[1]
+    
+    def get_rule_set_dict(self, rule_set: RuleSet) -> Dict[str, Any]:
+        """Get a rule set as a plain dict, cached until the rule set changes.
+        
+        The dict is shared between callers and must not be modified.
+        """
+        cached = self._rule_set_dicts.get(rule_set.id)
+        if cached is None or cached[0] is not rule_set:
+            cached = (rule_set, rule_set.model_dump())
+            self._rule_set_dicts[rule_set.id] = cached
+        return cached[1]
+    
+    def _forget_rule_set(self, rule_set_id: str):
+        """Drop everything cached for a rule set that was changed or deleted."""
+        self._rules_by_set.pop(rule_set_id, None)
+        self._sorted_by_set.pop(rule_set_id, None)
+        self._rule_set_dicts.pop(rule_set_id, None)
+    
+    def _index_rule_set(self, rule_set_id: str, rule_ids: List[str]):
+        """Update the rule -> rule sets index for the rules a set now contains."""
+        old = self._set_members.pop(rule_set_id, set())
+        new = set(rule_ids)
+        for rule_id in old - new:
+            rule_set_ids = self._rule_to_sets.get(rule_id)
+            if rule_set_ids is not None:
+                rule_set_ids.discard(rule_set_id)
+                if not rule_set_ids:
+                    del self._rule_to_sets[rule_id]
+        for rule_id in new - old:
+            self._rule_to_sets[rule_id].add(rule_set_id)
+        if new:
+            self._set_members[rule_set_id] = new
+    
+    def _forget_rule(self, rule_id: str):
+        """Drop everything cached for a rule that was changed or deleted."""
+        self._rule_dicts.pop(rule_id, None)
+        self._patterns.pop(rule_id, None)
+        self._literals.pop(rule_id, None)
+        self._combined.clear()
+        self._scanners.clear()
+        for rule_set_id in self._rule_to_sets.get(rule_id, ()):
+            self._forget_rule_set(rule_set_id)
     
     def add_rule(self, rule: Rule) -> str:
         """Add a new rule and return its ID."""
         rule_id = rule.id
-        rule.updated_at = datetime.now().isoformat()
+        rule.updated_at = _now_iso()
+        if rule.created_at is None:
+            rule.created_at = rule.updated_at
         
         config.rules[rule_id] = rule
         
+        # Sets that already listed the ID now resolve it to this rule
+        for rule_set_id in self._rule_to_sets.get(rule_id, ()):
+            self._forget_rule_set(rule_set_id)
+        
         # Add to default rule set if no set is specified
         default_set_id = config.default_rule_set
         if default_set_id in config.rule_sets:
             config.rule_sets[default_set_id].rules.append(rule_id)
-            config.rule_sets[default_set_id].updated_at = datetime.now().isoformat()
+            config.rule_sets[default_set_id].updated_at = _now_iso()
+            self._rule_to_sets[rule_id].add(default_set_id)
+            self._set_members.setdefault(default_set_id, set()).add(rule_id)
+            self._forget_rule_set(default_set_id)
         
-        self.save_config()
+        self._record("upsert_rule", rule_id, rule)
+        if default_set_id in config.rule_sets:
+            self._record("upsert_rule_set", default_set_id, config.rule_sets[default_set_id])
         return rule_id
     
     def update_rule(self, rule_id: str, rule: Rule) -> bool:
@@ -290,10 +1207,12 @@ class RulesEngine:
             return False
         
         rule.id = rule_id  # Ensure ID doesn't change
-        rule.updated_at = datetime.now().isoformat()
+        rule.updated_at = _now_iso()
+        rule.hoist_inline_flags()  # The condition may have been assigned directly
         
         config.rules[rule_id] = rule
-        self.save_config()
+        self._forget_rule(rule_id)
+        self._record("upsert_rule", rule_id, rule)
         return True
     
     def delete_rule(self, rule_id: str) -> bool:
@@ -301,25 +1220,37 @@ class RulesEngine:
         if rule_id not in config.rules:
             return False
         
-        # Remove from all rule sets
-        for rule_set_id, rule_set in config.rule_sets.items():
-            if rule_id in rule_set.rules:
+        self._forget_rule(rule_id)
+        
+        # Remove from the rule sets that contain it
+        changed_sets = []
+        for rule_set_id in self._rule_to_sets.pop(rule_id, ()):
+            self._set_members.get(rule_set_id, set()).discard(rule_id)
+            rule_set = config.rule_sets.get(rule_set_id)
+            if rule_set is not None and rule_id in rule_set.rules:
                 rule_set.rules.remove(rule_id)
-                rule_set.updated_at = datetime.now().isoformat()
+                rule_set.updated_at = _now_iso()
+                changed_sets.append(rule_set)
         
         # Remove the rule
         del config.rules[rule_id]
         
-        self.save_config()
+        self._record("delete_rule", rule_id)
+        for rule_set in changed_sets:
+            self._record("upsert_rule_set", rule_set.id, rule_set)
         return True
     
     def add_rule_set(self, rule_set: RuleSet) -> str:
         """Add a new rule set and return its ID."""
         rule_set_id = rule_set.id
-        rule_set.updated_at = datetime.now().isoformat()
+        rule_set.updated_at = _now_iso()
+        if rule_set.created_at is None:
+            rule_set.created_at = rule_set.updated_at
         
         config.rule_sets[rule_set_id] = rule_set
-        self.save_config()
+        self._index_rule_set(rule_set_id, rule_set.rules)
+        self._forget_rule_set(rule_set_id)
+        self._record("upsert_rule_set", rule_set_id, rule_set)
         return rule_set_id
     
     def update_rule_set(self, rule_set_id: str, rule_set: RuleSet) -> bool:
@@ -328,10 +1259,12 @@ class RulesEngine:
             return False
         
         rule_set.id = rule_set_id  # Ensure ID doesn't change
-        rule_set.updated_at = datetime.now().isoformat()
+        rule_set.updated_at = _now_iso()
         
         config.rule_sets[rule_set_id] = rule_set
-        self.save_config()
+        self._index_rule_set(rule_set_id, rule_set.rules)
+        self._forget_rule_set(rule_set_id)
+        self._record("upsert_rule_set", rule_set_id, rule_set)
         return True
     
     def delete_rule_set(self, rule_set_id: str) -> bool:
@@ -344,7 +1277,9 @@ class RulesEngine:
             return False
         
         del config.rule_sets[rule_set_id]
-        self.save_config()
+        self._index_rule_set(rule_set_id, [])
+        self._forget_rule_set(rule_set_id)
+        self._record("delete_rule_set", rule_set_id)
         return True
     
     def set_default_rule_set(self, rule_set_id: str) -> bool:
@@ -353,7 +1288,7 @@ class RulesEngine:
             return False
         
         config.default_rule_set = rule_set_id
-        self.save_config()
+        self._record("set_default_rule_set", rule_set_id)
         return True
     
     def process_text(self, text: str, rule_set_ids: Optional[List[str]] = None,
@@ -362,138 +1297,131 @@ class RulesEngine:
         if not text:
             return {"processed_text": text, "results": [], "status": "success"}
         
-        # Get rules to apply
-        rules_to_apply = []
-        
-        if rule_set_ids:
-            # Get rules from specified rule sets
+        # Get enabled rules to apply, highest priority first
+        if rule_set_ids and len(rule_set_ids) > 1:
+            # Merge the rules from specified rule sets
+            rules_to_apply = []
             for rule_set_id in rule_set_ids:
-                rules_to_apply.extend(self.get_rules_by_set(rule_set_id))
+                rules_to_apply.extend(self._get_sorted_rules(rule_set_id))
+            rules_to_apply.sort(key=lambda r: r.priority, reverse=True)
+        elif rule_set_ids:
+            rules_to_apply = self._get_sorted_rules(rule_set_ids[0])
         else:
             # Get rules from default rule set
-            rules_to_apply = self.get_rules_by_set()
+            rules_to_apply = self._get_sorted_rules()
         
-        # Filter enabled rules and sort by priority
-        rules_to_apply = [rule for rule in rules_to_apply if rule.enabled]
-        rules_to_apply.sort(key=lambda r: r.priority, reverse=True)
+        return self.apply_rules(text, rules_to_apply)
+    
+    def apply_rules(self, text: str, rules_to_apply: List[Rule]) -> Dict[str, Any]:
+        """Apply enabled rules, sorted highest priority first, to text."""
+        # Skip rules that can't match anything in the text: first rules missing a
+        # required literal, then whatever a Hyperscan pass rules out
+        rules_to_apply = self._screen_rules(rules_to_apply, text)
+        rules_to_apply = self._candidate_rules(rules_to_apply, text)
         
         # Process text through rules
         processed_text = text
         results = []
+        edits = []  # Pending redactions against processed_text, sorted by start
+        plain = self._is_plain(processed_text)
         
-        for rule in rules_to_apply:
-            try:
-                # Apply rule based on action type
-                if rule.action == "block":
-                    # Check if text should be blocked
-                    if re.search(rule.condition, processed_text):
-                        reason = rule.parameters.get("reason", "Blocked by rule")
-                        severity = rule.parameters.get("severity", "high")
-                        
-                        return {
-                            "processed_text": "",
-                            "results": [{
-                                "rule_id": rule.id,
-                                "rule_name": rule.name,
-                                "action": "block",
-                                "reason": reason,
-                                "severity": severity
-                            }],
-                            "status": "blocked"
-                        }
-                
-                elif rule.action == "redact":
-                    # Redact matching text
-                    pattern = re.compile(rule.condition)
-                    matches = pattern.findall(processed_text)
-                    
-                    for match in matches:
-                        if isinstance(match, tuple):  # If capturing groups
-                            match = match[0]  # Use first group
-                        
-                        results.append({
-                            "rule_id": rule.id,
-                            "rule_name": rule.name,
-                            "action": "redact",
-                            "original": match,
-                            "replacement": rule.replacement
-                        })
-                    
-                    processed_text = pattern.sub(rule.replacement, processed_text)
+        # Check block rules first so blocked text doesn't go through any other rule
+        block_rules = [rule for rule in rules_to_apply if rule.action == "block"]
+        if block_rules:
+            rule = self._find_block(block_rules, text, plain, results)
+            if rule is not None:
+                return {
+                    "processed_text": "",
+                    "results": [{
+                        "rule_id": rule.id,
+                        "rule_name": rule.name,
+                        "action": "block",
+                        "reason": rule.parameters.get("reason", "Blocked by rule"),
+                        "severity": rule.parameters.get("severity", "high")
+                    }],
+                    "status": "blocked"
+                }
+            rules_to_apply = [rule for rule in rules_to_apply if rule.action != "block"]
+        
+        # Redactions and flags are resolved against the text as of the last
+        # transform; pending redactions are applied only once a transform rewrites it
+        for action, group in self._group_rules(rules_to_apply):
+            # Fused groups scan the text once for all of their rules
+            combined = self._get_combined(group) if len(group) > 1 else None
+            matches = None
+            if combined is not None:
+                matches = self._fused_matches(group, self._get_matcher(combined, plain), processed_text)
+            if matches is not None:
+                if action == "redact":
+                    self._collect_redactions(group, matches, edits, results)
+                else:
+                    self._collect_flags(group, matches, results)
+                continue
+            
+            for rule in group:
+                try:
+                    # Apply rule based on action type
+                    if rule.action == "redact":
+                        # Redact matching text
+                        pattern = self._get_matcher(self._get_pattern(rule), plain)
+                        self._collect_redactions([rule], pattern.finditer(processed_text), edits, results)
                 
-                elif rule.action == "flag":
-                    # Flag matching text without changing it
-                    pattern = re.compile(rule.condition)
-                    matches = pattern.findall(processed_text)
-                    
-                    for match in matches:
-                        if isinstance(match, tuple):  # If capturing groups
-                            match = match[0]  # Use first group
-                        
-                        results.append({
-                            "rule_id": rule.id,
-                            "rule_name": rule.name,
-                            "action": "flag",
-                            "text": match,
-                            "flag_reason": rule.parameters.get("flag_reason", "Flagged by rule"),
-                            "severity": rule.parameters.get("severity", "info")
-                        })
+                    elif rule.action == "flag":
+                        # Flag matching text without changing it
+                        pattern = self._get_matcher(self._get_pattern(rule), plain)
+                        self._collect_flags([rule], pattern.finditer(processed_text), results)
                 
-                elif rule.action == "transform":
-                    # Transform matching text
-                    transform_type = rule.parameters.get("transform_type")
+                    elif rule.action == "transform":
+                        # Transform matching text
+                        transform_type = rule.parameters.get("transform_type")
                     
-                    if transform_type == "date":
-                        # Date transformation example
-                        date_format = rule.parameters.get("format", "%Y-%m-%d")
+                        if transform_type == "date":
+                            # Date transformation example
+                            date_format = rule.parameters.get("format", "%Y-%m-%d")
                         
-                        def date_replacer(match):
-                            try:
+                            def date_replacer(match):
                                 # Simple US date format MM/DD/YYYY to format
-                                from datetime import datetime
                                 date_str = match.group(0)
-                                date = datetime.strptime(date_str, "%m/%d/%Y")
-                                return date.strftime(date_format)
-                            except:
-                                return match.group(0)
-                        
-                        pattern = re.compile(rule.condition)
-                        matches = pattern.findall(processed_text)
-                        
-                        for match in matches:
-                            if isinstance(match, tuple):  # If capturing groups
-                                match = match[0]  # Use first group
-                            
-                            try:
-                                from datetime import datetime
-                                date = datetime.strptime(match, "%m/%d/%Y")
-                                transformed = date.strftime(date_format)
+                                try:
+                                    transformed = datetime.strptime(date_str, "%m/%d/%Y").strftime(date_format)
+                                except ValueError:
+                                    return date_str  # Skip failed transformations
                                 
                                 results.append({
                                     "rule_id": rule.id,
                                     "rule_name": rule.name,
                                     "action": "transform",
-                                    "original": match,
+                                    "original": date_str,
                                     "transformed": transformed,
                                     "transform_type": transform_type
                                 })
-                            except:
-                                pass  # Skip failed transformations
+                                return transformed
                         
-                        processed_text = pattern.sub(date_replacer, processed_text)
+                            # The transform sees the redactions so far; if it changes
+                            # nothing they stay pending, as if it hadn't run
+                            pattern = self._get_pattern(rule)
+                            redacted_text = self._apply_edits(processed_text, edits)
+                            transformed_text = pattern.sub(date_replacer, redacted_text)
+                            if transformed_text != redacted_text:
+                                processed_text = transformed_text
+                                edits = []
+                                plain = self._is_plain(processed_text)
                     
-                    # Add more transformation types as needed
+                        # Add more transformation types as needed
                 
-                # Add more action types as needed
+                    # Add more action types as needed
             
-            except Exception as e:
-                logger.error(f"Error applying rule {rule.name}: {str(e)}")
-                results.append({
-                    "rule_id": rule.id,
-                    "rule_name": rule.name,
-                    "action": "error",
-                    "error": str(e)
-                })
+                except Exception as e:
+                    logger.error("Error applying rule %s: %s", rule.name, e)
+                    results.append({
+                        "rule_id": rule.id,
+                        "rule_name": rule.name,
+                        "action": "error",
+                        "error": str(e)
+                    })
+        
+        if edits:
+            processed_text = self._apply_edits(processed_text, edits)
         
         return {
             "processed_text": processed_text,
@@ -501,6 +1429,31 @@ class RulesEngine:
             "status": "success"
         }
 
+    def warmup(self):
+        """Build the rule indexes, dicts, patterns and scanners of every rule set ahead of the first request."""
+        for rule in list(config.rules.values()):
+            self.get_rule_dict(rule)
+        for rule_set_id, rule_set in list(config.rule_sets.items()):
+            self.get_rule_set_dict(rule_set)
+            self.get_rules_by_set(rule_set_id)
+            rules = self._get_sorted_rules(rule_set_id)
+            try:
+                for rule in rules:
+                    self._literal_info(rule)
+                    self._get_matcher(self._get_pattern(rule), True)
+                if hyperscan is not None and rules:
+                    self._get_scanner(rules)
+                
+                block_rules = [rule for rule in rules if rule.action == "block"]
+                if len(block_rules) > 1 and all(_is_fusable(rule) for rule in block_rules):
+                    self._get_matcher(self._get_combined(block_rules), True)
+                for action, group in self._group_rules([rule for rule in rules if rule.action != "block"]):
+                    if len(group) > 1:
+                        self._get_matcher(self._get_combined(group), True)
+            except Exception as e:
+                logger.warning("Error warming up rule set %s: %s", rule_set_id, e)
+        logger.info("Warmed up %d rule sets", len(config.rule_sets))
+
 # Initialize rules engine
 rules_engine = RulesEngine()
 
@@ -509,6 +1462,89 @@ rules_engine = RulesEngine()
 # Create an MCP server
 mcp_server = FastMCP("Rules Engine")
 
+def _use_orjson_content():
+    """Serialize dict tool results to text content with orjson instead of pydantic_core.
+    
+    FastMCP has no hook for this, so its converter is replaced; the output is the
+    same indented JSON. Results orjson can't serialize go through FastMCP as before.
+    """
+    from mcp.server.fastmcp.utilities import func_metadata
+    from mcp.types import TextContent
+    
+    convert_to_content = getattr(func_metadata, "_convert_to_content", None)
+    if convert_to_content is None:
+        return
+    
+    def orjson_convert_to_content(result):
+        if isinstance(result, dict):
+            try:
+                return [TextContent(type="text", text=orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())]
+            except TypeError:
+                pass
+        return convert_to_content(result)
+    
+    func_metadata._convert_to_content = orjson_convert_to_content
+
+if orjson is not None:
+    _use_orjson_content()
+
+# Results of the read-only tools keyed by (tool name, arguments), kept until a mutating tool runs
+_read_cache: Dict[tuple, Any] = {}
+_cache_version = 0  # Bumped on every invalidation so reads racing a mutation aren't cached
+
+# Maximum number of read tool results to keep cached
+_MAX_READ_CACHE = 4096
+
+def _cached_read(fn):
+    """Memoize a read-only tool until the next mutating tool call."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+        result = _read_cache.get(key)
+        if result is None:
+            version = _cache_version
+            result = fn(*args, **kwargs)
+            if version == _cache_version:
+                if len(_read_cache) >= _MAX_READ_CACHE:
+                    _read_cache.clear()
+                _read_cache[key] = result
+        return result
+    return wrapper
+
+def _rules_read_only() -> bool:
+    """Check whether rule changes are refused, which they are when several HTTP workers serve.
+    
+    Each worker process holds its own copy of the rules while all of them
+    share rules_config.json and the journal, so one worker saving would
+    overwrite and truncate what the others wrote.
+    """
+    return detect_transport() == "http" and get_worker_count() > 1
+
+def _mutating(fn):
+    """Refuse a tool that changes rules or rule sets while the rules are read-only."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _rules_read_only():
+            return {"error": "Rules are read-only with MCP_WORKERS > 1; run a single worker to change them"}
+        return fn(*args, **kwargs)
+    return wrapper
+
+def _invalidate_reads():
+    """Drop the cached read tool results after a rule or rule set changed."""
+    global _cache_version
+    _cache_version += 1
+    _read_cache.clear()
+
+@functools.lru_cache(maxsize=1024)
+def _success_payload(kind: str, rule_set_id: str) -> Dict[str, Any]:
+    """Get the success response of a rule set tool.
+    
+    The dict is shared between calls and must not be modified by callers.
+    """
+    if kind == "default":
+        return {"success": True, "default_rule_set": rule_set_id}
+    return {"success": True, "rule_set_id": rule_set_id}
+
 # ----------------- MCP Tools ------------------
 
 @mcp_server.tool()
@@ -536,20 +1572,11 @@ def redact_text(text: str) -> Dict[str, Any]:
         A dictionary containing redacted text and matches
     """
     # Get only redaction rules
-    redaction_rules = []
-    for rule_id, rule in config.rules.items():
-        if rule.action == "redact" and rule.enabled:
-            redaction_rules.append(rule_id)
-    
-    # Create a temporary rule set with only redaction rules
-    temp_rule_set = RuleSet(
-        id="temp_redaction",
-        name="Temporary Redaction Set",
-        rules=redaction_rules
-    )
+    redaction_rules = [rule for rule in config.rules.values() if rule.action == "redact" and rule.enabled]
+    redaction_rules.sort(key=lambda r: r.priority, reverse=True)
     
     # Process text with just redaction rules
-    result = rules_engine.process_text(text, ["temp_redaction"])
+    result = rules_engine.apply_rules(text, redaction_rules)
     
     # Format response to match legacy redact_text
     redacted_text = result.get("processed_text", text)
@@ -569,6 +1596,7 @@ def redact_text(text: str) -> Dict[str, Any]:
     }
 
 @mcp_server.tool()
+@_cached_read
 def get_rules(rule_set_id: Optional[str] = None) -> Dict[str, Any]:
     """Get all rules or rules in a specific rule set.
     
@@ -580,11 +1608,12 @@ def get_rules(rule_set_id: Optional[str] = None) -> Dict[str, Any]:
     """
     if rule_set_id:
         rules_list = rules_engine.get_rules_by_set(rule_set_id)
-        return {"rules": [rule.model_dump() for rule in rules_list]}
+        return {"rules": [rules_engine.get_rule_dict(rule) for rule in rules_list]}
     else:
-        return {"rules": [rule.model_dump() for rule in config.rules.values()]}
+        return {"rules": [rules_engine.get_rule_dict(rule) for rule in config.rules.values()]}
 
 @mcp_server.tool()
+@_cached_read
 def get_rule(rule_id: str) -> Dict[str, Any]:
     """Get a specific rule by ID.
     
@@ -599,12 +1628,13 @@ def get_rule(rule_id: str) -> Dict[str, Any]:
     if not rule:
         return {"error": f"Rule not found: {rule_id}"}
     
-    return {"rule": rule.model_dump()}
+    return {"rule": rules_engine.get_rule_dict(rule)}
 
 @mcp_server.tool()
+@_mutating
 def add_rule(name: str, condition: str, action: str, description: str = "", 
              replacement: str = "<REDACTED>", parameters: Dict[str, Any] = {}, 
-             priority: int = 0) -> Dict[str, Any]:
+             priority: int = 0, flags: int = 0) -> Dict[str, Any]:
     """Add a new rule.
     
     Args:
@@ -615,6 +1645,7 @@ def add_rule(name: str, condition: str, action: str, description: str = "",
         replacement: Replacement text for redaction rules
         parameters: Additional parameters for the action
         priority: Rule priority (higher runs first)
+        flags: Python re flags for the condition (e.g. 2 = IGNORECASE, 256 = ASCII)
         
     Returns:
         A dictionary containing the new rule ID and rule
@@ -628,27 +1659,31 @@ def add_rule(name: str, condition: str, action: str, description: str = "",
             action=action,
             replacement=replacement,
             parameters=parameters,
-            priority=priority
+            priority=priority,
+            flags=flags
         )
         
         # Validate regex
         try:
-            re.compile(rule.condition)
-        except re.error as e:
+            re.compile(rule.condition, rule.flags)
+        except (re.error, ValueError) as e:
             return {"error": f"Invalid regex pattern: {str(e)}"}
         
         # Add rule
         rule_id = rules_engine.add_rule(rule)
+        _invalidate_reads()
         
-        return {"rule_id": rule_id, "rule": rule.model_dump()}
+        return {"rule_id": rule_id, "rule": rules_engine.get_rule_dict(rule)}
     except Exception as e:
         return {"error": f"Error adding rule: {str(e)}"}
 
 @mcp_server.tool()
+@_mutating
 def update_rule(rule_id: str, name: Optional[str] = None, description: Optional[str] = None,
                 condition: Optional[str] = None, action: Optional[str] = None,
                 replacement: Optional[str] = None, parameters: Optional[Dict[str, Any]] = None,
-                enabled: Optional[bool] = None, priority: Optional[int] = None) -> Dict[str, Any]:
+                enabled: Optional[bool] = None, priority: Optional[int] = None,
+                flags: Optional[int] = None) -> Dict[str, Any]:
     """Update an existing rule.
     
     Args:
@@ -661,6 +1696,7 @@ def update_rule(rule_id: str, name: Optional[str] = None, description: Optional[
         parameters: Additional parameters for the action
         enabled: Whether the rule is enabled
         priority: Rule priority (higher runs first)
+        flags: Python re flags for the condition (e.g. 2 = IGNORECASE, 256 = ASCII)
         
     Returns:
         A dictionary containing the rule ID and updated rule
@@ -681,31 +1717,36 @@ def update_rule(rule_id: str, name: Optional[str] = None, description: Optional[
         ("replacement", replacement), 
         ("parameters", parameters), 
         ("enabled", enabled), 
-        ("priority", priority)
+        ("priority", priority),
+        ("flags", flags)
     ]:
         if value is not None:
             update_params[field] = value
     
+    # Validate regex before touching the rule, so a bad pattern leaves it unchanged
+    if condition is not None or flags is not None:
+        try:
+            re.compile(existing_rule.condition if condition is None else condition,
+                       existing_rule.flags if flags is None else flags)
+        except (re.error, ValueError) as e:
+            return {"error": f"Invalid regex pattern: {str(e)}"}
+    
     # Update rule fields
     for field, value in update_params.items():
         setattr(existing_rule, field, value)
     
-    # Validate regex
-    if condition is not None:
-        try:
-            re.compile(existing_rule.condition)
-        except re.error as e:
-            return {"error": f"Invalid regex pattern: {str(e)}"}
-    
     # Update rule
     success = rules_engine.update_rule(rule_id, existing_rule)
     
     if not success:
         return {"error": "Failed to update rule"}
     
-    return {"rule_id": rule_id, "rule": existing_rule.model_dump()}
+    _invalidate_reads()
+    
+    return {"rule_id": rule_id, "rule": rules_engine.get_rule_dict(existing_rule)}
 
 @mcp_server.tool()
+@_mutating
 def delete_rule(rule_id: str) -> Dict[str, Any]:
     """Delete a rule.
     
@@ -720,21 +1761,25 @@ def delete_rule(rule_id: str) -> Dict[str, Any]:
     if not success:
         return {"error": f"Failed to delete rule: {rule_id}"}
     
+    _invalidate_reads()
+    
     return {"success": True, "rule_id": rule_id}
 
 @mcp_server.tool()
+@_cached_read
 def get_rule_sets() -> Dict[str, Any]:
     """Get all rule sets.
     
     Returns:
         A dictionary containing all rule sets
     """
-    rule_sets = {id: rule_set.model_dump() for id, rule_set in config.rule_sets.items()}
+    rule_sets = {id: rules_engine.get_rule_set_dict(rule_set) for id, rule_set in config.rule_sets.items()}
     default_rule_set = config.default_rule_set
     
     return {"rule_sets": rule_sets, "default_rule_set": default_rule_set}
 
 @mcp_server.tool()
+@_cached_read
 def get_rule_set(rule_set_id: str) -> Dict[str, Any]:
     """Get a specific rule set.
     
@@ -753,12 +1798,13 @@ def get_rule_set(rule_set_id: str) -> Dict[str, Any]:
     rules_list = rules_engine.get_rules_by_set(rule_set_id)
     
     return {
-        "rule_set": rule_set.model_dump(),
-        "rules": [rule.model_dump() for rule in rules_list],
+        "rule_set": rules_engine.get_rule_set_dict(rule_set),
+        "rules": [rules_engine.get_rule_dict(rule) for rule in rules_list],
         "is_default": rule_set_id == config.default_rule_set
     }
 
 @mcp_server.tool()
+@_mutating
 def add_rule_set(name: str, description: str = "", rule_ids: List[str] = []) -> Dict[str, Any]:
     """Add a new rule set.
     
@@ -780,12 +1826,14 @@ def add_rule_set(name: str, description: str = "", rule_ids: List[str] = []) ->
         
         # Add rule set
         rule_set_id = rules_engine.add_rule_set(rule_set)
+        _invalidate_reads()
         
-        return {"rule_set_id": rule_set_id, "rule_set": rule_set.model_dump()}
+        return {"rule_set_id": rule_set_id, "rule_set": rules_engine.get_rule_set_dict(rule_set)}
     except Exception as e:
         return {"error": f"Error adding rule set: {str(e)}"}
 
 @mcp_server.tool()
+@_mutating
 def update_rule_set(rule_set_id: str, name: Optional[str] = None, 
                    description: Optional[str] = None, rule_ids: Optional[List[str]] = None,
                    enabled: Optional[bool] = None) -> Dict[str, Any]:
@@ -828,9 +1876,12 @@ def update_rule_set(rule_set_id: str, name: Optional[str] = None,
     if not success:
         return {"error": "Failed to update rule set"}
     
-    return {"rule_set_id": rule_set_id, "rule_set": existing_rule_set.model_dump()}
+    _invalidate_reads()
+    
+    return {"rule_set_id": rule_set_id, "rule_set": rules_engine.get_rule_set_dict(existing_rule_set)}
 
 @mcp_server.tool()
+@_mutating
 def delete_rule_set(rule_set_id: str) -> Dict[str, Any]:
     """Delete a rule set.
     
@@ -845,9 +1896,12 @@ def delete_rule_set(rule_set_id: str) -> Dict[str, Any]:
     if not success:
         return {"error": f"Failed to delete rule set: {rule_set_id}"}
     
-    return {"success": True, "rule_set_id": rule_set_id}
+    _invalidate_reads()
+    
+    return _success_payload("delete", rule_set_id)
 
 @mcp_server.tool()
+@_mutating
 def set_default_rule_set(rule_set_id: str) -> Dict[str, Any]:
     """Set the default rule set.
     
@@ -862,12 +1916,18 @@ def set_default_rule_set(rule_set_id: str) -> Dict[str, Any]:
     if not success:
         return {"error": f"Failed to set default rule set: {rule_set_id}"}
     
-    return {"success": True, "default_rule_set": rule_set_id}
+    _invalidate_reads()
+    
+    return _success_payload("default", rule_set_id)
 
 # ----------------- Main ------------------
 
+@functools.cache
 def detect_transport():
-    """Detect if we should use stdio or http transport based on environment."""
+    """Detect if we should use stdio or http transport based on environment.
+    
+    The result is cached, so reloads and respawned workers see the same transport.
+    """
     # Check if we're running through the MCP client which sets up specific environment
     # or if we're running directly (HTTP server mode)
     if os.environ.get("MCP_STDIO_TRANSPORT") == "true":
@@ -875,6 +1935,43 @@ def detect_transport():
     else:
         return "http"
 
+def get_worker_count() -> int:
+    """Get the number of HTTP worker processes from MCP_WORKERS (default: 1)."""
+    value = os.environ.get("MCP_WORKERS", "1")
+    if value == "auto":
+        return os.cpu_count() or 1
+    try:
+        return max(int(value), 1)
+    except ValueError:
+        logger.warning("Invalid MCP_WORKERS value %r, using 1 worker", value)
+        return 1
+
+_HTTP_APP = None  # The streamable HTTP ASGI app, built on first use
+
+def get_http_app():
+    """Get the streamable HTTP ASGI app, building it only once per process."""
+    global _HTTP_APP
+    if _HTTP_APP is None:
+        if get_worker_count() > 1:
+            # Sessions live in one worker process, so workers must serve stateless HTTP
+            mcp_server.settings.stateless_http = True
+        _HTTP_APP = mcp_server.streamable_http_app()
+        _HTTP_APP.router.lifespan_context = _warmup_lifespan(_HTTP_APP.router.lifespan_context)
+    return _HTTP_APP
+
+def _warmup_lifespan(lifespan):
+    """Wrap an ASGI lifespan to warm up the rules engine before the app serves requests."""
+    @contextlib.asynccontextmanager
+    async def warmup_lifespan(app):
+        await on_startup()
+        async with lifespan(app) as state:
+            yield state
+    return warmup_lifespan
+
+def build_app():
+    """Uvicorn's app factory in multi-worker mode."""
+    return get_http_app()
+
 def run_server():
     """Run the appropriate server based on the detected transport."""
     transport = detect_transport()
@@ -884,23 +1981,93 @@ def run_server():
         mcp_server.stdio()
     else:
         logger.info("Starting MCP server with HTTP transport")
-        app = mcp_server.streamable_http_app()
+        import uvicorn  # Only the HTTP transport needs it
         
         host = "0.0.0.0"
         port = 6366
+        workers = get_worker_count()
+        
+        # Bind to a Unix domain socket instead when the client runs on the same host
+        uds = os.environ.get("MCP_UDS_PATH")
+        bind = {"uds": uds} if uds else {"host": host, "port": port}
+        address = f"unix://{uds}" if uds else f"http://{host}:{port}"
         
-        # Run with uvicorn
-        logger.info(f"Server will run on http://{host}:{port}")
-        uvicorn.run(app, host=host, port=port)
+        # Run with uvicorn, on uvloop and the httptools parser when installed (uvicorn[standard])
+        loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+        http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+        logger.info("Server will run on %s (loop: %s, http: %s, workers: %d)", address, loop, http, workers)
+        
+        # MCP clients send bursts of short tool calls: keep their connections open between
+        # bursts, and cap concurrent connections so a stampede can't exhaust memory
+        options = dict(bind, loop=loop, http=http, access_log=False, log_level="warning",
+                       timeout_keep_alive=75, limit_concurrency=int(os.environ.get("MCP_MAX_CONC", "512")),
+                       backlog=2048)
+        
+        if workers > 1:
+            # Workers only read the rules: save pending changes and empty the journal
+            # now, so none of them has anything to replay and write back
+            logger.info("Rule changes are disabled while %d workers serve", workers)
+            rules_engine.flush_config()
+        
+        if workers > 1 and not uds and hasattr(socket, "SO_REUSEPORT"):
+            # Give every worker its own listening socket so the kernel spreads accept() across them
+            run_reuseport_workers(workers, options)
+        elif workers > 1:
+            # Every worker process imports this module and builds its own app and rules engine
+            uvicorn.run(f"{Path(__file__).stem}:build_app", factory=True, workers=workers, **options)
+        else:
+            serve(uvicorn.Server(uvicorn.Config(get_http_app(), workers=1, **options)))
+
+def serve(server, sockets=None):
+    """Run a uvicorn server until it exits, on uvloop if that's the configured loop."""
+    if server.config.loop == "uvloop":
+        import uvloop
+        uvloop.run(server.serve(sockets))
+    else:
+        asyncio.run(server.serve(sockets))
+
+def serve_reuseport(options: Dict[str, Any]):
+    """Serve HTTP in a worker process on its own SO_REUSEPORT socket."""
+    import uvicorn
+    
+    sock = socket.socket(socket.AF_INET6 if ":" in options["host"] else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((options["host"], options["port"]))
+    sock.set_inheritable(True)
+    serve(uvicorn.Server(uvicorn.Config(get_http_app(), workers=1, **options)), [sock])
+
+def run_reuseport_workers(workers: int, options: Dict[str, Any]):
+    """Run worker processes that each accept connections on their own SO_REUSEPORT socket.
+    
+    Uvicorn's own multi-worker mode shares one listening socket, which funnels
+    accept() through a single kernel queue.
+    """
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=serve_reuseport, args=(options,), name=f"worker-{index}")
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+async def on_startup():
+    """Preload the rules engine caches before the first request is accepted."""
+    rules_engine.warmup()
 
 if __name__ == "__main__":
     logger.info("Starting Rules Engine MCP Server...")
-    logger.info(f"Log directory: {log_dir}")
+    logger.info("Log directory: %s", log_dir)
     logger.info("MCP server is starting...")
     
     try:
         # Run appropriate server based on transport
         run_server()
-    except Exception as e:
-        logger.error(f"Error starting server: {str(e)}")
-        print(f"Error starting server: {str(e)}")
\ No newline at end of file
+    except Exception:
+        logger.exception("Error starting server")
\ No newline at end of file
@@ -1,28 +1,53 @@
 #!/usr/bin/env python3
+import asyncio
 import os
 import sys
 import logging
+import logging.handlers
 import json
 import re
 import uuid
+import hashlib
+import atexit
+import bisect
+import functools
+import heapq
+import importlib.util
+import queue
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Union
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Union, Mapping, Callable
 from datetime import datetime
 
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
 # Create log directories
 app_dir = os.path.dirname(os.path.abspath(__file__))
 log_dir = os.path.join(app_dir, 'RulesEngineMCP')
 os.makedirs(log_dir, exist_ok=True)
 
-# Configure logging
+# Configure logging; records are written by a listener thread, so logging
+# never blocks a request on file or console I/O
+_log_queue = queue.SimpleQueue()
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(log_dir, 'rules_engine.log')),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
+_log_listener = logging.handlers.QueueListener(
+    _log_queue,
+    logging.FileHandler(os.path.join(log_dir, 'rules_engine.log')),
+    logging.StreamHandler()
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger("RulesEngine")
 
 # Import MCP and other required libraries
@@ -30,7 +55,9 @@ try:
     from mcp.server.fastmcp import FastMCP, Context
     import uvicorn
     from fastapi import FastAPI, Request, Response
-    from pydantic import BaseModel, Field
+    from fastapi.responses import JSONResponse
+    from pydantic import BaseModel, ConfigDict, Field
+    from sse_starlette.sse import EventSourceResponse
     
     logger.info("Successfully imported required libraries")
 except ImportError as e:
@@ -39,20 +66,48 @@ except ImportError as e:
     
     try:
         import subprocess
-        subprocess.run([sys.executable, "-m", "pip", "install", "mcp", "uvicorn", "fastapi", "pydantic"], check=True)
+        subprocess.run([sys.executable, "-m", "pip", "install", "mcp", "uvicorn", "fastapi", "pydantic", "sse-starlette"], check=True)
         
         # Import again after installation
         from mcp.server.fastmcp import FastMCP, Context
         import uvicorn
         from fastapi import FastAPI, Request, Response
-        from pydantic import BaseModel, Field
+        from fastapi.responses import JSONResponse
+        from pydantic import BaseModel, ConfigDict, Field
+        from sse_starlette.sse import EventSourceResponse
         
         logger.info("Successfully installed and imported required libraries")
     except Exception as e:
         logger.error(f"Failed to install required libraries: {e}")
-        print(f"Error: Failed to install required libraries. Please install them manually: pip install mcp uvicorn fastapi pydantic")
+        print(f"Error: Failed to install required libraries. Please install them manually: pip install mcp uvicorn fastapi pydantic sse-starlette")
         sys.exit(1)
 
+# Optional: Aho-Corasick finds the required literals of all rules in one scan
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Optional: orjson reads and writes the configuration much faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: Hyperscan scans for all rule conditions at once to skip rules that can't match
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+# Optional: RE2 matches conditions prone to catastrophic backtracking in linear time, on plain ASCII text
+try:
+    import re2
+    _RE2_OPTIONS = re2.Options()
+    _RE2_OPTIONS.log_errors = False
+except ImportError:
+    re2 = None
+
 # ----------------- Rule Models ------------------
 
 class Rule(BaseModel):
@@ -68,8 +123,10 @@ class Rule(BaseModel):
     created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
     updated_at: str = Field(default_factory=lambda: datetime.now().isoformat())
     
-    class Config:
-        json_schema_extra = {
+    # Assignments in update_rule are plain attribute sets; conditions are validated by compiling them
+    model_config = ConfigDict(
+        validate_assignment=False,
+        json_schema_extra={
             "example": {
                 "name": "SSN",
                 "description": "US Social Security Number",
@@ -81,6 +138,7 @@ class Rule(BaseModel):
                 "priority": 10
             }
         }
+    )
 
 class RuleSet(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -90,6 +148,8 @@ class RuleSet(BaseModel):
     enabled: bool = True
     created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
     updated_at: str = Field(default_factory=lambda: datetime.now().isoformat())
+    
+    model_config = ConfigDict(validate_assignment=False)
 
 class RuleEngineConfig(BaseModel):
     rules: Dict[str, Rule] = {}  # Using a dict for faster lookups by ID
@@ -101,8 +161,411 @@ config = RuleEngineConfig()
 
 # ----------------- Rules Engine ------------------
 
+# Conditions that can't go into a combined alternation: backreferences would point
+# at the wrong group and global inline flags must start the whole pattern
+_UNFUSABLE_RE = re.compile(r"\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)")
+
+# Upper bound on cached combined patterns (one per distinct group of rules)
+_MAX_COMBINED_PATTERNS = 256
+
+# Upper bound on cached ASCII-mode patterns
+_MAX_ASCII_PATTERNS = 512
+
+# ASCII characters \s matches in Unicode mode but not in ASCII mode, and \v,
+# which RE2's \s leaves out
+_UNICODE_SPACE_RE = re.compile(r"[\x0b\x1c-\x1f]")
+
+# Regex nodes RE2 and Hyperscan read the way re does on plain ASCII text. $ isn't
+# one of them: RE2 reads it as the very end of the text, not also before a final newline
+_PORTABLE_OPS = frozenset({sre_parse.LITERAL, sre_parse.NOT_LITERAL, sre_parse.ANY, sre_parse.IN,
+                           sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, sre_parse.SUBPATTERN,
+                           sre_parse.BRANCH, sre_parse.AT})
+_PORTABLE_SET_OPS = frozenset({sre_parse.LITERAL, sre_parse.RANGE, sre_parse.CATEGORY, sre_parse.NEGATE})
+_PORTABLE_ANCHORS = frozenset({sre_parse.AT_BEGINNING, sre_parse.AT_BEGINNING_STRING,
+                               sre_parse.AT_BOUNDARY, sre_parse.AT_NON_BOUNDARY})
+_PORTABLE_FLAGS = re.IGNORECASE | re.MULTILINE | re.DOTALL | re.ASCII | re.UNICODE
+
+# Braces re doesn't read as the {n}, {n,} or {n,m} other engines know, e.g. {,n} or { 1}
+_ODD_BRACE_RE = re.compile(r"\{(?!\d+(?:,\d*)?\})")
+
+# POSIX-style sets such as [[:alpha:]], which re reads as a set of plain characters
+_POSIX_SET_RE = re.compile(r"\[(?::|=|\.(?!\]))")
+
+# Character masks of what a condition's matches can contain: bits 0-127 stand
+# for the ASCII characters and bit 128 for every other character
+_NON_ASCII_CHARS = 1 << 128
+_ALL_CHARS = (1 << 129) - 1
+_CATEGORY_CHARS = {
+    sre_parse.CATEGORY_DIGIT: "0123456789",
+    sre_parse.CATEGORY_WORD: "0123456789_abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    sre_parse.CATEGORY_SPACE: " \t\n\r\f\v\x1c\x1d\x1e\x1f",
+}
+# ASCII letters that match non-ASCII characters case-insensitively, e.g. k and the Kelvin sign
+_NON_ASCII_FOLDS = "iksIKS"
+
+# Joins the texts of a batch so they can be scanned together; \s and \b treat it
+# like the edge of a text
+_BATCH_SEPARATOR = "\x1e"
+_BATCH_SEPARATOR_RE = re.compile(_BATCH_SEPARATOR)
+
+# Seconds the writer thread waits after a change before saving, so bursts of edits are written once
+_SAVE_DELAY = 0.5
+
+def _parse(condition: str):
+    """Parse a condition like re.compile does, without the FutureWarning re gives for sets like [[:alpha:]].
+    
+    Rules are warned about once, when they're compiled; these parses only
+    inspect them.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        return sre_parse.parse(condition)
+
+def _literal_requirements(items) -> List[tuple]:
+    """Collect the literals a parsed regex sequence can't match without.
+    
+    Each requirement is a tuple of alternatives, at least one of which must
+    appear in any text the sequence matches.
+    """
+    requirements = []
+    run = []
+    
+    def end_run():
+        if run:
+            requirements.append(("".join(run),))
+            run.clear()
+    
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        end_run()
+        if op is sre_parse.SUBPATTERN:
+            group, add_flags, del_flags, sub = av
+            if not add_flags & re.IGNORECASE:
+                requirements.extend(_literal_requirements(sub))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            low, high, sub = av
+            if low >= 1:
+                requirements.extend(_literal_requirements(sub))
+        elif op is sre_parse.BRANCH:
+            # Every alternative must contribute a literal, else the branch requires nothing
+            alternatives = []
+            for branch in av[1]:
+                found = _literal_requirements(branch)
+                if not found:
+                    alternatives = []
+                    break
+                alternatives.extend(max(found, key=lambda r: min(map(len, r))))
+            if alternatives:
+                requirements.append(tuple(alternatives))
+    end_run()
+    return requirements
+
+def _required_literals(condition: str) -> tuple:
+    """Extract the literals a condition needs in order to match anything.
+    
+    Returns a tuple of requirements; each is a tuple of substrings of which at
+    least one must be present. Case-insensitive or unparseable conditions
+    yield no requirements.
+    """
+    try:
+        parsed = _parse(condition)
+    except Exception:
+        return ()
+    if parsed.state.flags & re.IGNORECASE:
+        return ()
+    return tuple(dict.fromkeys(_literal_requirements(parsed)))
+
+def _has_nested_repeat(items, in_unbounded: bool = False) -> bool:
+    """Check a parsed regex sequence for a repeat inside an unbounded repeat, e.g. (\\w+\\s?)*."""
+    for op, av in items:
+        if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            low, high, sub = av
+            if in_unbounded and high > 1:
+                return True
+            if _has_nested_repeat(sub, in_unbounded or high is sre_parse.MAXREPEAT):
+                return True
+        elif op is sre_parse.SUBPATTERN:
+            if _has_nested_repeat(av[3], in_unbounded):
+                return True
+        elif op is sre_parse.BRANCH:
+            if any(_has_nested_repeat(branch, in_unbounded) for branch in av[1]):
+                return True
+    return False
+
+def _is_context_free(items) -> bool:
+    """Check a parsed regex sequence for anchors and lookarounds, which look past the text a match spans."""
+    for op, av in items:
+        if op is sre_parse.AT:
+            if av not in (sre_parse.AT_BOUNDARY, sre_parse.AT_NON_BOUNDARY):
+                return False
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            return False
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            if not _is_context_free(av[2]):
+                return False
+        elif op is sre_parse.SUBPATTERN:
+            if not _is_context_free(av[3]):
+                return False
+        elif op is sre_parse.BRANCH:
+            if not all(_is_context_free(branch) for branch in av[1]):
+                return False
+        elif op is sre_parse.GROUPREF_EXISTS:
+            if not all(_is_context_free(branch) for branch in av[1:] if branch is not None):
+                return False
+    return True
+
+@functools.lru_cache(maxsize=1024)
+def _is_batchable(condition: str) -> bool:
+    """Check whether a condition matches the same in a batch of joined texts as in each text alone.
+    
+    Matches that run across the separator are caught when the batch is processed.
+    """
+    try:
+        return _is_context_free(_parse(condition))
+    except Exception:
+        return False
+
+@functools.lru_cache(maxsize=1024)
+def _literal_condition(condition: str) -> Optional[str]:
+    """Return the text a condition matches if it's a plain case-sensitive literal."""
+    try:
+        parsed = _parse(condition)
+    except Exception:
+        return None
+    if parsed.state.flags & re.IGNORECASE or not parsed.data:
+        return None
+    if any(op is not sre_parse.LITERAL for op, av in parsed):
+        return None
+    return "".join(chr(av) for op, av in parsed)
+
+@functools.lru_cache(maxsize=1024)
+def _hyperscan_supports(condition: str) -> bool:
+    """Check whether Hyperscan can compile a condition and reads it the way re does.
+    
+    Backreferences, lookarounds and the like don't compile; {,n} quantifiers
+    or [[:alpha:]] sets would compile with another meaning, see _is_portable.
+    """
+    if not _is_portable(condition):
+        return False
+    try:
+        hyperscan.Database().compile(expressions=[condition.encode("utf-8")], ids=[0], elements=1,
+                                     flags=[hyperscan.HS_FLAG_SINGLEMATCH])
+    except hyperscan.error:
+        return False
+    return True
+
+@functools.lru_cache(maxsize=1024)
+def _is_backtracking_prone(condition: str) -> bool:
+    """Check whether a condition has nested unbounded repeats, which can take exponential time under re."""
+    try:
+        return _has_nested_repeat(_parse(condition))
+    except Exception:
+        return False
+
+def _portable_items(items) -> bool:
+    """Check a parsed regex sequence for nodes other engines could read differently."""
+    for op, av in items:
+        if op not in _PORTABLE_OPS:
+            return False
+        if op in (sre_parse.LITERAL, sre_parse.NOT_LITERAL):
+            if av > 0x7f:
+                return False
+        elif op is sre_parse.IN:
+            for set_op, set_av in av:
+                if set_op not in _PORTABLE_SET_OPS:
+                    return False
+                if set_op is sre_parse.LITERAL and set_av > 0x7f:
+                    return False
+                if set_op is sre_parse.RANGE and set_av[1] > 0x7f:
+                    return False
+        elif op is sre_parse.AT:
+            if av not in _PORTABLE_ANCHORS:
+                return False
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            if not _portable_items(av[2]):
+                return False
+        elif op is sre_parse.SUBPATTERN:
+            group, add_flags, del_flags, sub = av
+            if (add_flags | del_flags) & ~_PORTABLE_FLAGS or not _portable_items(sub):
+                return False
+        elif op is sre_parse.BRANCH:
+            if not all(_portable_items(branch) for branch in av[1]):
+                return False
+    return True
+
+@functools.lru_cache(maxsize=1024)
+def _is_portable(condition: str) -> bool:
+    """Check whether RE2 and Hyperscan match a condition exactly like re does on plain ASCII text.
+    
+    Only an allowlist of regex features passes, written the one way all the
+    engines read alike: no {,n} quantifiers, no [[:alpha:]] sets, no $.
+    """
+    if _ODD_BRACE_RE.search(condition) or _POSIX_SET_RE.search(condition):
+        return False
+    try:
+        parsed = _parse(condition)
+    except Exception:
+        return False
+    return not parsed.state.flags & ~_PORTABLE_FLAGS and _portable_items(parsed)
+
+def _char_mask(code: int, ignore_case: bool) -> int:
+    """Get the character mask of a literal character."""
+    if code > 0x7f:
+        # Some non-ASCII characters fold to ASCII ones, e.g. the Kelvin sign to k
+        return _ALL_CHARS if ignore_case else _NON_ASCII_CHARS
+    mask = 1 << code
+    if ignore_case and chr(code).isalpha():
+        mask |= 1 << ord(chr(code).swapcase())
+        if chr(code) in _NON_ASCII_FOLDS:
+            mask |= _NON_ASCII_CHARS
+    return mask
+
+def _set_mask(items, ignore_case: bool) -> int:
+    """Get the character mask of a parsed [...] set."""
+    mask = 0
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            mask |= _char_mask(av, ignore_case)
+        elif op is sre_parse.RANGE:
+            for code in range(av[0], min(av[1], 0x7f) + 1):
+                mask |= _char_mask(code, ignore_case)
+            if av[1] > 0x7f:
+                mask |= _char_mask(av[1], ignore_case)
+        elif op is sre_parse.CATEGORY and av in _CATEGORY_CHARS:
+            for char in _CATEGORY_CHARS[av]:
+                mask |= _char_mask(ord(char), ignore_case)
+            mask |= _NON_ASCII_CHARS
+        else:
+            return _ALL_CHARS  # Negated sets and categories
+    return mask
+
+def _consumed_mask(items, ignore_case: bool) -> int:
+    """Get the character mask of a parsed regex sequence; lookarounds and anchors consume nothing."""
+    mask = 0
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            mask |= _char_mask(av, ignore_case)
+        elif op is sre_parse.IN:
+            mask |= _set_mask(av, ignore_case)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            mask |= _consumed_mask(av[2], ignore_case)
+        elif op is sre_parse.SUBPATTERN:
+            group, add_flags, del_flags, sub = av
+            scoped = (ignore_case or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE
+            mask |= _consumed_mask(sub, scoped)
+        elif op is sre_parse.BRANCH:
+            for branch in av[1]:
+                mask |= _consumed_mask(branch, ignore_case)
+        elif op not in (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            return _ALL_CHARS  # Any character, backreferences and the like
+    return mask
+
+def _reads_context(items) -> bool:
+    """Check whether a parsed regex sequence looks at text next to its match.
+    
+    Lookarounds, \\b and line anchors do; \\A and \\Z only look at the edges of the text.
+    """
+    for op, av in items:
+        if op is sre_parse.AT:
+            if av not in (sre_parse.AT_BEGINNING_STRING, sre_parse.AT_END_STRING):
+                return True
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            if _reads_context(av[2]):
+                return True
+        elif op is sre_parse.SUBPATTERN:
+            if _reads_context(av[3]):
+                return True
+        elif op is sre_parse.BRANCH:
+            if any(_reads_context(branch) for branch in av[1]):
+                return True
+        elif op not in (sre_parse.LITERAL, sre_parse.NOT_LITERAL, sre_parse.ANY, sre_parse.IN):
+            return True
+    return False
+
+@functools.lru_cache(maxsize=1024)
+def _condition_chars(condition: str) -> tuple:
+    """Get the character mask of the text a condition can match, and whether it reads the text around it.
+    
+    Conditions that can match the empty string, or can't be parsed, get every
+    character: their matches can overlap anything's.
+    """
+    try:
+        parsed = _parse(condition)
+    except Exception:
+        return _ALL_CHARS, True
+    context = _reads_context(parsed)
+    if parsed.getwidth()[0] == 0:
+        return _ALL_CHARS, context
+    return _consumed_mask(parsed, bool(parsed.state.flags & re.IGNORECASE)), context
+
+@functools.lru_cache(maxsize=256)
+def _fusion_hazards(conditions: tuple, replacements: Optional[tuple] = None) -> frozenset:
+    """Get the indexes of the rules of a combined group whose matches can make it differ from its rules applied one by one.
+    
+    Two matches can only overlap if they share a character, so a rule sharing
+    none with the rest of the group is safe. Redactions, given by their
+    replacements, also change what the rules after them see: a rule's matches
+    are only safe if no later rule can match characters of its replacement or
+    reads the text around its matches, and the replacement isn't empty.
+    """
+    masks = []
+    contexts = []
+    for condition in conditions:
+        mask, context = _condition_chars(condition)
+        masks.append(mask)
+        contexts.append(context)
+    seen = 0
+    shared = 0
+    for mask in masks:
+        shared |= seen & mask
+        seen |= mask
+    hazards = {index for index, mask in enumerate(masks) if mask & shared}
+    if replacements is not None:
+        later_mask = 0
+        later_context = False
+        for index in range(len(conditions) - 1, -1, -1):
+            replaced = 0
+            for char in replacements[index]:
+                replaced |= _char_mask(ord(char), False)
+            if later_context or later_mask & replaced or (later_mask and not replaced):
+                hazards.add(index)
+            later_mask |= masks[index]
+            later_context = later_context or contexts[index]
+    return frozenset(hazards)
+
+def _priority_key(rule: Rule) -> int:
+    """Sort key putting higher priority rules first."""
+    return -rule.priority
+
+def _is_fusable(rule: Rule) -> bool:
+    """Check whether a rule can share a combined pattern with other rules.
+    
+    Backtracking-prone rules can't: only they are matched with RE2.
+    """
+    return (not _UNFUSABLE_RE.search(rule.condition) and "\\" not in rule.replacement
+            and not _is_backtracking_prone(rule.condition))
+
 class RulesEngine:
     def __init__(self):
+        self._patterns: Dict[str, re.Pattern] = {}  # Compiled rule conditions by rule ID
+        self._combined: Dict[tuple, Optional[re.Pattern]] = {}  # Combined patterns by group of rules
+        self._screens: Dict[tuple, tuple] = {}  # Literal screens by list of rules
+        self._scanners: Dict[tuple, tuple] = {}  # Hyperscan databases by list of rules
+        self._ascii_patterns: Dict[str, Any] = {}  # Patterns to use on plain ASCII text by source
+        self._plan_cache: Dict[tuple, List[Rule]] = {}  # Enabled rules by priority, by tuple of several rule set IDs
+        self._set_rules_cache: Dict[str, List[Rule]] = {}  # Rules of each rule set, by rule set ID
+        self._active_by_set: Dict[str, List[Rule]] = {}  # Enabled rules of each rule set by priority, by rule set ID
+        self._rule_to_sets: Dict[str, set] = {}  # IDs of the rule sets containing each rule, by rule ID
+        self._set_members: Dict[str, set] = {}  # Rule IDs indexed for each rule set, by rule set ID
+        self._rule_dicts: Dict[str, tuple] = {}  # (rule, dumped rule) by rule ID
+        self._rule_set_dicts: Dict[str, tuple] = {}  # (rule set, dumped rule set) by rule set ID
+        self._save_lock = threading.Lock()
+        self._save_queue: queue.Queue = queue.Queue(maxsize=1)  # Pending save request, if any
+        self._dirty = False  # Whether the configuration has changes not yet written to file
+        threading.Thread(target=self._save_worker, name="RulesConfigWriter", daemon=True).start()
+        atexit.register(self.flush_config)
         self.load_config()
     
     def load_config(self):
@@ -112,8 +575,8 @@ class RulesEngine:
         config_file = os.path.join(log_dir, 'rules_config.json')
         if os.path.exists(config_file):
             try:
-                with open(config_file, 'r') as f:
-                    data = json.load(f)
+                with open(config_file, 'rb') as f:
+                    data = orjson.loads(f.read()) if orjson is not None else json.load(f)
                     # Convert dictionaries to model objects
                     rules = {id: Rule(**rule) for id, rule in data.get('rules', {}).items()}
                     rule_sets = {id: RuleSet(**rule_set) for id, rule_set in data.get('rule_sets', {}).items()}
@@ -131,26 +594,79 @@ class RulesEngine:
         else:
             # Add default rules if file doesn't exist
             self.add_default_rules()
-            self.save_config()
+            self._schedule_save()
+        
+        self._clear_rule_caches()
+        self._set_rules_cache.clear()
+        self._active_by_set.clear()
+        self._rule_dicts.clear()
+        self._rule_set_dicts.clear()
+        self._rule_to_sets.clear()
+        self._set_members.clear()
+        for rule_set_id, rule_set in config.rule_sets.items():
+            rule_set.rules = list(dict.fromkeys(rule_set.rules))
+            self._index_rule_set(rule_set_id, rule_set.rules)
+        
+        # Compile all rule conditions and rule set scanners up front
+        self._patterns.clear()
+        for rule in config.rules.values():
+            self._compile_rule(rule)
+        for rule_set_id in config.rule_sets:
+            self._prepare_rule_set(rule_set_id)
     
-    def save_config(self):
-        """Save configuration to file."""
-        global config
+    def _schedule_save(self):
+        """Ask the writer thread to save the configuration and return immediately.
         
-        config_file = os.path.join(log_dir, 'rules_config.json')
+        The queue holds at most one pending request, so bursts of changes
+        collapse into a single write.
+        """
+        self._dirty = True
         try:
-            # Convert to dict for JSON serialization
-            data = {
-                'rules': {id: rule.model_dump() for id, rule in config.rules.items()},
-                'rule_sets': {id: rule_set.model_dump() for id, rule_set in config.rule_sets.items()},
-                'default_rule_set': config.default_rule_set
-            }
+            self._save_queue.put_nowait(True)
+        except queue.Full:
+            pass  # A save is already pending and will pick up this change
+    
+    def _save_worker(self):
+        """Drain save requests and write the configuration, off the request path."""
+        while True:
+            self._save_queue.get()
+            time.sleep(_SAVE_DELAY)  # Let a burst of edits settle before writing
+            if not self.flush_config():
+                self._schedule_save()
+    
+    def flush_config(self) -> bool:
+        """Write the configuration to file if it has unsaved changes.
+        
+        The file is written to a temporary path, fsynced and renamed over the
+        old one, so a crash mid-write never leaves a truncated configuration.
+        Returns False if the write failed.
+        """
+        with self._save_lock:
+            if not self._dirty:
+                return True
+            self._dirty = False
             
-            with open(config_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            logger.info(f"Saved {len(config.rules)} rules and {len(config.rule_sets)} rule sets")
-        except Exception as e:
-            logger.error(f"Error saving configuration: {str(e)}")
+            config_file = os.path.join(log_dir, 'rules_config.json')
+            tmp_file = config_file + ".tmp"
+            try:
+                # Convert to JSON-ready dicts in one dump
+                data = config.model_dump(mode="json")
+                if orjson is not None:
+                    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+                else:
+                    payload = json.dumps(data, indent=2).encode("utf-8")
+                
+                with open(tmp_file, 'wb') as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, config_file)
+                logger.info(f"Saved {len(config.rules)} rules and {len(config.rule_sets)} rule sets")
+                return True
+            except Exception as e:
+                self._dirty = True
+                logger.error(f"Error saving configuration: {str(e)}")
+                return False
     
     def add_default_rules(self):
         """Add default rules and rule sets."""
@@ -255,39 +771,529 @@ class RulesEngine:
         
         logger.info(f"Added {len(default_rules)} default rules")
     
+    def _clear_rule_caches(self, rule_set_ids=()):
+        """Drop the cached plans, and the cached rule lists of the given rule sets, after a change."""
+        self._plan_cache.clear()
+        for rule_set_id in rule_set_ids:
+            self._set_rules_cache.pop(rule_set_id, None)
+            self._active_by_set.pop(rule_set_id, None)
+    
+    def _append_to_rule_caches(self, rule_set_id: str, rule: Rule):
+        """Add a rule that joined the end of a rule set to its cached lists, keeping priority order.
+        
+        Disabled rules only join the list of all of the rule set's rules.
+        
+        The lists are replaced rather than changed, since callers may hold them.
+        """
+        self._plan_cache.clear()
+        rules = self._set_rules_cache.get(rule_set_id)
+        if rules is not None:
+            self._set_rules_cache[rule_set_id] = rules + [rule]
+        rules = self._active_by_set.get(rule_set_id)
+        if rules is not None and rule.enabled:
+            rules = list(rules)
+            bisect.insort(rules, rule, key=_priority_key)  # After equal priorities, like a stable sort
+            self._active_by_set[rule_set_id] = rules
+    
+    def _index_rule_set(self, rule_set_id: str, rule_ids: List[str]):
+        """Point the reverse index at a rule set's current rules, undoing what was indexed for it before.
+        
+        Rule sets hold each rule ID once, so the indexed set of IDs answers
+        membership checks for the rule set's list.
+        """
+        old = self._set_members.get(rule_set_id, set())
+        new = set(rule_ids)
+        for rule_id in old - new:
+            rule_sets = self._rule_to_sets.get(rule_id)
+            if rule_sets is not None:
+                rule_sets.discard(rule_set_id)
+                if not rule_sets:
+                    del self._rule_to_sets[rule_id]
+        for rule_id in new - old:
+            self._rule_to_sets.setdefault(rule_id, set()).add(rule_set_id)
+        self._set_members[rule_set_id] = new
+    
+    def _get_plan(self, rule_set_ids: tuple) -> List[Rule]:
+        """Get the enabled rules of the rule sets sorted by priority, cached until the next change.
+        
+        The list is shared between calls and must not be modified by callers.
+        """
+        if len(rule_set_ids) == 1:
+            return self._get_active_rules(rule_set_ids[0])
+        
+        rules = self._plan_cache.get(rule_set_ids)
+        if rules is None:
+            # Merging the presorted rule sets keeps their order among equal priorities
+            rules = list(heapq.merge(*map(self._get_active_rules, rule_set_ids), key=_priority_key))
+            self._plan_cache[rule_set_ids] = rules
+        return rules
+    
+    def _get_active_rules(self, rule_set_id: str) -> List[Rule]:
+        """Get the enabled rules of a rule set sorted by priority, kept until the rule set or one of its rules changes.
+        
+        Disabled rules are left out here, once per change, rather than skipped
+        on every call. The list is shared between calls and must not be
+        modified by callers.
+        """
+        rules = self._active_by_set.get(rule_set_id)
+        if rules is None:
+            rules = sorted((rule for rule in self.get_rules_by_set(rule_set_id) if rule.enabled), key=_priority_key)
+            self._active_by_set[rule_set_id] = rules
+        return rules
+    
+    def _compile_rule(self, rule: Rule, pattern: Optional[re.Pattern] = None):
+        """Cache a rule's compiled condition by rule ID, compiling it unless given or already cached."""
+        if pattern is None:
+            pattern = self._patterns.get(rule.id)
+        if pattern is not None and pattern.pattern == rule.condition:
+            self._patterns[rule.id] = pattern
+            return
+        try:
+            self._patterns[rule.id] = re.compile(rule.condition)
+        except re.error as e:
+            self._patterns.pop(rule.id, None)
+            logger.error(f"Invalid condition in rule {rule.name}: {str(e)}")
+    
+    def _get_pattern(self, rule: Rule) -> re.Pattern:
+        """Get the compiled condition of a rule, recompiling it if the condition changed."""
+        pattern = self._patterns.get(rule.id)
+        if pattern is None or pattern.pattern != rule.condition:
+            pattern = re.compile(rule.condition)
+            self._patterns[rule.id] = pattern
+        return pattern
+    
+    def _get_matcher(self, pattern: re.Pattern, plain: bool):
+        """Get the fastest equivalent of a pattern for plain ASCII text.
+        
+        Backtracking-prone conditions get RE2, which matches in linear time,
+        when it reads them the way re does; others get the pattern recompiled
+        with re.ASCII, which skips Unicode character classification for \\b,
+        \\d, \\w and \\s. On plain ASCII text either matches exactly what the
+        Unicode pattern does. Other texts get the pattern unchanged, since
+        RE2's \\b, \\d and \\w only know ASCII.
+        """
+        if not plain:
+            return pattern
+        
+        source = pattern.pattern
+        matcher = self._ascii_patterns.get(source)
+        if matcher is None:
+            matcher = pattern
+            if re2 is not None and _is_backtracking_prone(source) and _is_portable(source):
+                try:
+                    matcher = re2.compile(source, _RE2_OPTIONS)
+                except re2.error:
+                    pass
+            if matcher is pattern and source.isascii():
+                try:
+                    matcher = re.compile(source, pattern.flags & ~re.UNICODE | re.ASCII)
+                except (re.error, ValueError):
+                    pass  # e.g. an inline (?u) flag
+            if len(self._ascii_patterns) >= _MAX_ASCII_PATTERNS:
+                self._ascii_patterns.clear()
+            self._ascii_patterns[source] = matcher
+        return matcher
+    
+    @staticmethod
+    def _is_plain(text: str) -> bool:
+        """Check whether ASCII-mode patterns and RE2 match the text the same way Unicode re patterns do."""
+        return text.isascii() and not _UNICODE_SPACE_RE.search(text)
+    
+    def _get_screen(self, rules: List[Rule]) -> tuple:
+        """Get the literal screen for a list of rules: ``(automaton, requirements per rule)``.
+        
+        A requirement is dropped when an earlier rule's replacement could make
+        its literal appear: a literal that wasn't in the text and is after a
+        replacement shares a character with it. Empty replacements and ones with
+        group references can join up anything, as can transforms, so the rules
+        after them keep no requirements. Block rules keep theirs, since they only
+        see the original text. The automaton is None without pyahocorasick or
+        when no rule has requirements.
+        """
+        key = tuple((rule.id, rule.condition, rule.action, rule.replacement) for rule in rules)
+        screen = self._screens.get(key)
+        if screen is None:
+            requirements = []
+            introduced = set()  # Characters earlier replacements add; None once anything could appear
+            for rule in rules:
+                if rule.action == "block":
+                    requirements.append(_required_literals(rule.condition))
+                    continue
+                if introduced is None:
+                    requirements.append(())
+                    continue
+                requirements.append(tuple(alternatives for alternatives in _required_literals(rule.condition)
+                                          if all(introduced.isdisjoint(literal) for literal in alternatives)))
+                if rule.action == "redact" and rule.replacement and "\\" not in rule.replacement:
+                    introduced.update(rule.replacement)
+                elif rule.action in ("redact", "transform"):
+                    introduced = None
+            
+            automaton = None
+            literals = {literal for requirement in requirements for alternatives in requirement for literal in alternatives}
+            if ahocorasick is not None and literals:
+                automaton = ahocorasick.Automaton()
+                for literal in literals:
+                    automaton.add_word(literal, literal)
+                automaton.make_automaton()
+            
+            if len(self._screens) >= _MAX_COMBINED_PATTERNS:
+                self._screens.clear()
+            screen = (automaton, requirements)
+            self._screens[key] = screen
+        return screen
+    
+    def _screen_rules(self, rules: List[Rule], text: str) -> List[Rule]:
+        """Drop the rules whose required literals don't all appear in the text."""
+        automaton, requirements = self._get_screen(rules)
+        if automaton is not None:
+            found = {literal for end, literal in automaton.iter(text)}
+            return [rule for rule, requirement in zip(rules, requirements)
+                    if all(any(literal in found for literal in alternatives) for alternatives in requirement)]
+        return [rule for rule, requirement in zip(rules, requirements)
+                if all(any(literal in text for literal in alternatives) for alternatives in requirement)]
+    
+    def _get_scanner(self, rules: List[Rule]) -> tuple:
+        """Get a Hyperscan database reporting which of the rules match a text.
+        
+        Returns ``(database, always, scratch)``; ``always`` holds the indexes of
+        rules Hyperscan can't compile (backreferences, lookarounds, ...) or could
+        read differently from re, which must always be treated as possible matches. A Hyperscan scratch space
+        can only serve one scan at a time, so ``scratch`` is a thread-local
+        holding each thread's own clone.
+        """
+        key = tuple((rule.id, rule.condition) for rule in rules)
+        scanner = self._scanners.get(key)
+        if scanner is None:
+            expressions, ids, always = [], [], set()
+            for index, rule in enumerate(rules):
+                if not _hyperscan_supports(rule.condition):
+                    always.add(index)
+                    continue
+                expressions.append(rule.condition.encode("utf-8"))
+                ids.append(index)
+            
+            database = None
+            if expressions:
+                database = hyperscan.Database()
+                database.compile(expressions=expressions, ids=ids, elements=len(ids),
+                                 flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(ids))
+            if len(self._scanners) >= _MAX_COMBINED_PATTERNS:
+                self._scanners.clear()
+            scanner = (database, always, threading.local())
+            self._scanners[key] = scanner
+        return scanner
+    
+    def _candidate_rules(self, rules: List[Rule], text: str, plain: bool,
+                         screened: Optional[List[Rule]] = None) -> List[Rule]:
+        """Drop the rules that can't match the text, using a single Hyperscan pass.
+        
+        Only plain ASCII texts are pre-scanned: Hyperscan's \\b, \\d and \\s are
+        ASCII-only, so for other texts it could miss matches Python's re finds.
+        Once a kept redact or transform rule may have changed the text, the
+        rules after it are kept too, except block rules, which only ever see
+        the original text.
+        
+        The scan always covers all of ``rules``, so a rule set's database is
+        compiled once rather than for every subset; ``screened``, a sublist of
+        ``rules`` already filtered otherwise, is then narrowed instead.
+        """
+        if screened is None:
+            screened = rules
+        if hyperscan is None or not rules or not plain:
+            return screened
+        
+        try:
+            database, always, local = self._get_scanner(rules)
+            hits = set(always)
+            if database is not None:
+                scratch = getattr(local, "scratch", None)
+                if scratch is None:
+                    scratch = local.scratch = database.scratch.clone()
+                
+                def on_match(index, start, end, flags, context):
+                    hits.add(index)
+                
+                database.scan(text.encode("ascii"), match_event_handler=on_match, scratch=scratch)
+        except Exception as e:
+            logger.warning(f"Hyperscan pre-scan failed, applying all rules: {str(e)}")
+            return screened
+        
+        kept = set()
+        changed = False
+        for index, rule in enumerate(rules):
+            if index in hits or (changed and rule.action != "block"):
+                kept.add(id(rule))
+                if rule.action in ("redact", "transform"):
+                    changed = True
+        return [rule for rule in screened if id(rule) in kept]
+    
+    def _prepare_rule_set(self, rule_set_id: str):
+        """Build the literal screen and Hyperscan database of a rule set's enabled rules before its first text."""
+        rules = self._get_active_rules(rule_set_id)
+        try:
+            self._get_screen(rules)
+            if hyperscan is not None and rules:
+                self._get_scanner(rules)
+        except Exception as e:
+            logger.warning(f"Could not prepare rule set {rule_set_id}: {str(e)}")
+    
+    @staticmethod
+    def _group_rules(rules: List[Rule]) -> List[tuple]:
+        """Group consecutive redact/flag rules with the same action into ``(action, rules)`` tuples.
+        
+        Other rules, and rules that can't be combined, get a group of their own.
+        """
+        groups = []
+        last_fusable = False
+        for rule in rules:
+            fusable = rule.action in ("redact", "flag") and _is_fusable(rule)
+            if fusable and last_fusable and groups[-1][0] == rule.action:
+                groups[-1][1].append(rule)
+            else:
+                groups.append((rule.action, [rule]))
+            last_fusable = fusable
+        return groups
+    
+    def _get_combined(self, rules: List[Rule]) -> Optional[re.Pattern]:
+        """Get one alternation pattern matching any of the rules.
+        
+        Each rule's condition becomes the named group ``r<index>``, so ``lastgroup``
+        tells which rule matched; earlier (higher priority) rules win when several
+        match at the same position. Returns None if the conditions can't be combined,
+        e.g. because their own group names collide.
+        """
+        key = tuple((rule.id, rule.condition) for rule in rules)
+        if key not in self._combined:
+            if len(self._combined) >= _MAX_COMBINED_PATTERNS:
+                self._combined.clear()
+            try:
+                self._combined[key] = re.compile("|".join(f"(?P<r{i}>{rule.condition})" for i, rule in enumerate(rules)))
+            except re.error as e:
+                logger.warning(f"Cannot combine rules, applying them one by one: {str(e)}")
+                self._combined[key] = None
+        return self._combined[key]
+    
+    def _find_block(self, rules: List[Rule], text: str, plain: bool,
+                    results: List[Dict[str, Any]]) -> Optional[Rule]:
+        """Find the highest priority block rule matching the text.
+        
+        All block rules are checked with one combined search when their conditions
+        can be combined; otherwise they're searched one by one.
+        """
+        combined = None
+        if len(rules) > 1 and all(_is_fusable(rule) for rule in rules):
+            combined = self._get_combined(rules)
+        if combined is not None:
+            match = self._get_matcher(combined, plain).search(text)
+            if match is None:
+                return None
+            # The leftmost match may come from a lower priority rule; a higher priority
+            # rule matching further on still wins
+            index = int(match.lastgroup[1:])
+            for rule in rules[:index]:
+                if self._get_matcher(self._get_pattern(rule), plain).search(text, match.start()):
+                    return rule
+            return rules[index]
+        
+        for rule in rules:
+            try:
+                literal = _literal_condition(rule.condition)
+                if literal is not None:
+                    matched = literal in text
+                else:
+                    matched = self._get_matcher(self._get_pattern(rule), plain).search(text)
+                if matched:
+                    return rule
+            except Exception as e:
+                logger.error(f"Error applying rule {rule.name}: {str(e)}")
+                results.append({
+                    "rule_id": rule.id,
+                    "rule_name": rule.name,
+                    "action": "error",
+                    "error": str(e)
+                })
+        return None
+    
+    @staticmethod
+    def _fused_matches(rules: List[Rule], pattern: re.Pattern, text: str):
+        """Find the matches of a combined group of rules in text.
+        
+        The alternation reports the leftmost match whatever its rule's priority,
+        and never rescans replaced text, so this returns None when a match came
+        from a rule _fusion_hazards lists; the group must then be applied rule by rule.
+        """
+        replacements = tuple(rule.replacement for rule in rules) if rules[0].action == "redact" else None
+        hazards = _fusion_hazards(tuple(rule.condition for rule in rules), replacements)
+        if not hazards:
+            return pattern.finditer(text)
+        matches = list(pattern.finditer(text))
+        if any(int(match.lastgroup[1:]) in hazards for match in matches):
+            return None
+        return matches
+    
+    @staticmethod
+    def _redact_matches(rules: List[Rule], matches, text: str,
+                        results: List[Dict[str, Any]], starts: Optional[List[int]] = None) -> str:
+        """Redact the matches in text of one rule or a combined group of rules.
+        
+        Returns text itself when there are no matches. The offset of each match
+        is appended to starts, if given.
+        """
+        parts = []
+        position = 0
+        for match in matches:
+            start, end = match.span()
+            if starts is not None:
+                starts.append(start)
+            rule = rules[int(match.lastgroup[1:])] if len(rules) > 1 else rules[0]
+            replacement = match.expand(rule.replacement) if "\\" in rule.replacement else rule.replacement
+            results.append({
+                "rule_id": rule.id,
+                "rule_name": rule.name,
+                "action": "redact",
+                "original": match.group(0),
+                "replacement": replacement
+            })
+            parts.append(text[position:start])
+            parts.append(replacement)
+            position = end
+        if not parts:
+            return text
+        parts.append(text[position:])
+        return "".join(parts)
+    
+    @staticmethod
+    def _flag_matches(rules: List[Rule], matches, results: List[Dict[str, Any]],
+                      starts: Optional[List[int]] = None):
+        """Flag the matches of one rule or a combined group of rules.
+        
+        The offset of each match is appended to starts, if given.
+        """
+        for match in matches:
+            if starts is not None:
+                starts.append(match.start())
+            rule = rules[int(match.lastgroup[1:])] if len(rules) > 1 else rules[0]
+            results.append({
+                "rule_id": rule.id,
+                "rule_name": rule.name,
+                "action": "flag",
+                "text": match.group(0),
+                "flag_reason": rule.parameters.get("flag_reason", "Flagged by rule"),
+                "severity": rule.parameters.get("severity", "info")
+            })
+    
+    @staticmethod
+    def _redact_literal(rule: Rule, literal: str, text: str, results: List[Dict[str, Any]]) -> str:
+        """Redact a literal condition with str.replace, which finds the same matches as re.sub."""
+        count = text.count(literal)
+        if not count:
+            return text
+        results.extend({
+            "rule_id": rule.id,
+            "rule_name": rule.name,
+            "action": "redact",
+            "original": literal,
+            "replacement": rule.replacement
+        } for _ in range(count))
+        return text.replace(literal, rule.replacement)
+    
+    @staticmethod
+    def _flag_literal(rule: Rule, literal: str, text: str, results: List[Dict[str, Any]]):
+        """Flag the occurrences of a literal condition, counted with str.count."""
+        count = text.count(literal)
+        if count:
+            flag_reason = rule.parameters.get("flag_reason", "Flagged by rule")
+            severity = rule.parameters.get("severity", "info")
+            results.extend({
+                "rule_id": rule.id,
+                "rule_name": rule.name,
+                "action": "flag",
+                "text": literal,
+                "flag_reason": flag_reason,
+                "severity": severity
+            } for _ in range(count))
+    
     def get_rule_by_id(self, rule_id: str) -> Optional[Rule]:
         """Get a rule by ID."""
         return config.rules.get(rule_id)
     
     def get_rules_by_set(self, rule_set_id: Optional[str] = None) -> List[Rule]:
-        """Get all rules in a rule set."""
+        """Get all rules in a rule set, cached until the next change.
+        
+        The list is shared between calls and must not be modified by callers.
+        """
         if rule_set_id is None:
             rule_set_id = config.default_rule_set
         
-        rule_set = config.rule_sets.get(rule_set_id)
-        if not rule_set:
-            return []
+        rules = self._set_rules_cache.get(rule_set_id)
+        if rules is None:
+            rule_set = config.rule_sets.get(rule_set_id)
+            if not rule_set:
+                return []
+            rules = [config.rules[rule_id] for rule_id in rule_set.rules if rule_id in config.rules]
+            self._set_rules_cache[rule_set_id] = rules
+        return rules
+    
+    def get_rule_dict(self, rule: Rule) -> Dict[str, Any]:
+        """Get a rule as a plain dict, cached until the rule changes.
+        
+        The dict is shared between callers and must not be modified.
+        """
+        cached = self._rule_dicts.get(rule.id)
+        if cached is None or cached[0] is not rule:
+            cached = (rule, rule.model_dump())
+            self._rule_dicts[rule.id] = cached
+        return cached[1]
+    
+    def get_rule_set_dict(self, rule_set: RuleSet) -> Dict[str, Any]:
+        """Get a rule set as a plain dict, cached until the rule set changes.
         
-        return [config.rules[rule_id] for rule_id in rule_set.rules if rule_id in config.rules]
+        The dict is shared between callers and must not be modified.
+        """
+        cached = self._rule_set_dicts.get(rule_set.id)
+        if cached is None or cached[0] is not rule_set:
+            cached = (rule_set, rule_set.model_dump())
+            self._rule_set_dicts[rule_set.id] = cached
+        return cached[1]
     
-    def add_rule(self, rule: Rule) -> str:
-        """Add a new rule and return its ID."""
+    def add_rule(self, rule: Rule, pattern: Optional[re.Pattern] = None) -> str:
+        """Add a new rule and return its ID.
+        
+        pattern is the rule's already compiled condition, if the caller has it.
+        """
         rule_id = rule.id
-        rule.updated_at = datetime.now().isoformat()
+        now = datetime.now().isoformat()
+        rule.updated_at = now
         
         config.rules[rule_id] = rule
+        self._compile_rule(rule, pattern)
         
         # Add to default rule set if no set is specified
         default_set_id = config.default_rule_set
-        if default_set_id in config.rule_sets:
+        appended = False
+        if default_set_id in config.rule_sets and rule_id not in self._set_members[default_set_id]:
             config.rule_sets[default_set_id].rules.append(rule_id)
-            config.rule_sets[default_set_id].updated_at = datetime.now().isoformat()
+            config.rule_sets[default_set_id].updated_at = now
+            self._rule_to_sets.setdefault(rule_id, set()).add(default_set_id)
+            self._set_members[default_set_id].add(rule_id)
+            self._rule_set_dicts.pop(default_set_id, None)
+            appended = True
+        self._rule_dicts.pop(rule_id, None)
         
-        self.save_config()
+        # A new rule that only joined the end of the default set extends its cached lists
+        if appended and self._rule_to_sets[rule_id] == {default_set_id}:
+            self._append_to_rule_caches(default_set_id, rule)
+        else:
+            self._clear_rule_caches(self._rule_to_sets.get(rule_id, ()))
+        self._schedule_save()
         return rule_id
     
-    def update_rule(self, rule_id: str, rule: Rule) -> bool:
-        """Update an existing rule."""
+    def update_rule(self, rule_id: str, rule: Rule, pattern: Optional[re.Pattern] = None) -> bool:
+        """Update an existing rule.
+        
+        pattern is the rule's already compiled condition, if the caller has it.
+        """
         if rule_id not in config.rules:
             return False
         
@@ -295,7 +1301,10 @@ class RulesEngine:
         rule.updated_at = datetime.now().isoformat()
         
         config.rules[rule_id] = rule
-        self.save_config()
+        self._compile_rule(rule, pattern)
+        self._rule_dicts.pop(rule_id, None)
+        self._clear_rule_caches(self._rule_to_sets.get(rule_id, ()))
+        self._schedule_save()
         return True
     
     def delete_rule(self, rule_id: str) -> bool:
@@ -303,16 +1312,23 @@ class RulesEngine:
         if rule_id not in config.rules:
             return False
         
-        # Remove from all rule sets
-        for rule_set_id, rule_set in config.rule_sets.items():
-            if rule_id in rule_set.rules:
-                rule_set.rules.remove(rule_id)
-                rule_set.updated_at = datetime.now().isoformat()
+        # Remove from the rule sets that contain it
+        now = datetime.now().isoformat()
+        rule_set_ids = self._rule_to_sets.pop(rule_id, ())
+        for rule_set_id in rule_set_ids:
+            self._set_members[rule_set_id].discard(rule_id)
+            rule_set = config.rule_sets[rule_set_id]
+            rule_set.rules.remove(rule_id)
+            rule_set.updated_at = now
+            self._rule_set_dicts.pop(rule_set_id, None)
         
         # Remove the rule
         del config.rules[rule_id]
+        self._patterns.pop(rule_id, None)
+        self._rule_dicts.pop(rule_id, None)
         
-        self.save_config()
+        self._clear_rule_caches(rule_set_ids)
+        self._schedule_save()
         return True
     
     def add_rule_set(self, rule_set: RuleSet) -> str:
@@ -320,8 +1336,13 @@ class RulesEngine:
         rule_set_id = rule_set.id
         rule_set.updated_at = datetime.now().isoformat()
         
+        rule_set.rules = list(dict.fromkeys(rule_set.rules))  # Each rule once, in order
         config.rule_sets[rule_set_id] = rule_set
-        self.save_config()
+        self._index_rule_set(rule_set_id, rule_set.rules)
+        self._rule_set_dicts.pop(rule_set_id, None)
+        self._clear_rule_caches((rule_set_id,))
+        self._prepare_rule_set(rule_set_id)
+        self._schedule_save()
         return rule_set_id
     
     def update_rule_set(self, rule_set_id: str, rule_set: RuleSet) -> bool:
@@ -332,8 +1353,13 @@ class RulesEngine:
         rule_set.id = rule_set_id  # Ensure ID doesn't change
         rule_set.updated_at = datetime.now().isoformat()
         
+        rule_set.rules = list(dict.fromkeys(rule_set.rules))  # Each rule once, in order
         config.rule_sets[rule_set_id] = rule_set
-        self.save_config()
+        self._index_rule_set(rule_set_id, rule_set.rules)
+        self._rule_set_dicts.pop(rule_set_id, None)
+        self._clear_rule_caches((rule_set_id,))
+        self._prepare_rule_set(rule_set_id)
+        self._schedule_save()
         return True
     
     def delete_rule_set(self, rule_set_id: str) -> bool:
@@ -346,7 +1372,11 @@ class RulesEngine:
             return False
         
         del config.rule_sets[rule_set_id]
-        self.save_config()
+        self._index_rule_set(rule_set_id, ())
+        del self._set_members[rule_set_id]
+        self._rule_set_dicts.pop(rule_set_id, None)
+        self._clear_rule_caches((rule_set_id,))
+        self._schedule_save()
         return True
     
     def set_default_rule_set(self, rule_set_id: str) -> bool:
@@ -355,7 +1385,8 @@ class RulesEngine:
             return False
         
         config.default_rule_set = rule_set_id
-        self.save_config()
+        self._clear_rule_caches()
+        self._schedule_save()
         return True
     
     def process_text(self, text: str, rule_set_ids: Optional[List[str]] = None,
@@ -365,144 +1396,214 @@ class RulesEngine:
             return {"processed_text": text, "results": [], "status": "success"}
         
         # Get rules to apply
-        rules_to_apply = []
+        rules_to_apply = self._get_plan(tuple(rule_set_ids) if rule_set_ids else (config.default_rule_set,))
         
-        if rule_set_ids:
-            # Get rules from specified rule sets
-            for rule_set_id in rule_set_ids:
-                rules_to_apply.extend(self.get_rules_by_set(rule_set_id))
-        else:
-            # Get rules from default rule set
-            rules_to_apply = self.get_rules_by_set()
-        
-        # Filter enabled rules and sort by priority
-        rules_to_apply = [rule for rule in rules_to_apply if rule.enabled]
-        rules_to_apply.sort(key=lambda r: r.priority, reverse=True)
+        # Skip rules whose required literals are missing from the text, and
+        # those a Hyperscan pass over the whole plan rules out
+        plain = self._is_plain(text)
+        screened = self._screen_rules(rules_to_apply, text)
+        rules_to_apply = self._candidate_rules(rules_to_apply, text, plain, screened)
         
         # Process text through rules
         processed_text = text
         results = []
         
-        for rule in rules_to_apply:
-            try:
-                # Apply rule based on action type
-                if rule.action == "block":
-                    # Check if text should be blocked
-                    if re.search(rule.condition, processed_text):
-                        reason = rule.parameters.get("reason", "Blocked by rule")
-                        severity = rule.parameters.get("severity", "high")
-                        
-                        return {
-                            "processed_text": "",
-                            "results": [{
-                                "rule_id": rule.id,
-                                "rule_name": rule.name,
-                                "action": "block",
-                                "reason": reason,
-                                "severity": severity
-                            }],
-                            "status": "blocked"
-                        }
-                
-                elif rule.action == "redact":
-                    # Redact matching text
-                    pattern = re.compile(rule.condition)
-                    matches = pattern.findall(processed_text)
-                    
-                    for match in matches:
-                        if isinstance(match, tuple):  # If capturing groups
-                            match = match[0]  # Use first group
-                        
-                        results.append({
-                            "rule_id": rule.id,
-                            "rule_name": rule.name,
-                            "action": "redact",
-                            "original": match,
-                            "replacement": rule.replacement
-                        })
+        # Check all block rules first, in one search if possible, so blocked text
+        # doesn't go through any other rule
+        block_rules = [rule for rule in rules_to_apply if rule.action == "block"]
+        if block_rules:
+            rule = self._find_block(block_rules, text, plain, results)
+            if rule is not None:
+                return {
+                    "processed_text": "",
+                    "results": [{
+                        "rule_id": rule.id,
+                        "rule_name": rule.name,
+                        "action": "block",
+                        "reason": rule.parameters.get("reason", "Blocked by rule"),
+                        "severity": rule.parameters.get("severity", "high")
+                    }],
+                    "status": "blocked"
+                }
+            rules_to_apply = [rule for rule in rules_to_apply if rule.action != "block"]
+        
+        for action, group in self._group_rules(rules_to_apply):
+            # Groups of redact/flag rules scan the text once for all of their rules
+            combined = self._get_combined(group) if len(group) > 1 else None
+            matches = None
+            if combined is not None:
+                matches = self._fused_matches(group, self._get_matcher(combined, plain), processed_text)
+            if matches is not None:
+                if action == "redact":
+                    redacted = self._redact_matches(group, matches, processed_text, results)
+                    # Without matches the text comes back as the same object; else
+                    # replacements may have brought in non-ASCII text
+                    if redacted is not processed_text:
+                        processed_text = redacted
+                        plain = plain and self._is_plain(processed_text)
+                else:
+                    self._flag_matches(group, matches, results)
+                continue
+            
+            for rule in group:
+                try:
+                    # Apply rule based on action type
+                    # Literal conditions are matched with plain string operations
+                    literal = _literal_condition(rule.condition) if rule.action in ("redact", "flag") else None
                     
-                    processed_text = pattern.sub(rule.replacement, processed_text)
-                
-                elif rule.action == "flag":
-                    # Flag matching text without changing it
-                    pattern = re.compile(rule.condition)
-                    matches = pattern.findall(processed_text)
+                    if rule.action == "redact":
+                        # Redact matching text, recording each match as it's replaced
+                        if literal is not None and "\\" not in rule.replacement:
+                            redacted = self._redact_literal(rule, literal, processed_text, results)
+                        else:
+                            pattern = self._get_matcher(self._get_pattern(rule), plain)
+                            redacted = self._redact_matches([rule], pattern.finditer(processed_text), processed_text, results)
+                        if redacted is not processed_text:
+                            processed_text = redacted
+                            plain = plain and self._is_plain(processed_text)
                     
-                    for match in matches:
-                        if isinstance(match, tuple):  # If capturing groups
-                            match = match[0]  # Use first group
-                        
-                        results.append({
-                            "rule_id": rule.id,
-                            "rule_name": rule.name,
-                            "action": "flag",
-                            "text": match,
-                            "flag_reason": rule.parameters.get("flag_reason", "Flagged by rule"),
-                            "severity": rule.parameters.get("severity", "info")
-                        })
-                
-                elif rule.action == "transform":
-                    # Transform matching text
-                    transform_type = rule.parameters.get("transform_type")
+                    elif rule.action == "flag":
+                        # Flag matching text without changing it
+                        if literal is not None:
+                            self._flag_literal(rule, literal, processed_text, results)
+                        else:
+                            pattern = self._get_matcher(self._get_pattern(rule), plain)
+                            self._flag_matches([rule], pattern.finditer(processed_text), results)
                     
-                    if transform_type == "date":
-                        # Date transformation example
-                        date_format = rule.parameters.get("format", "%Y-%m-%d")
-                        
-                        def date_replacer(match):
-                            try:
-                                # Simple US date format MM/DD/YYYY to format
-                                from datetime import datetime
-                                date_str = match.group(0)
-                                date = datetime.strptime(date_str, "%m/%d/%Y")
-                                return date.strftime(date_format)
-                            except:
-                                return match.group(0)
+                    elif rule.action == "transform":
+                        # Transform matching text
+                        transform_type = rule.parameters.get("transform_type")
                         
-                        pattern = re.compile(rule.condition)
-                        matches = pattern.findall(processed_text)
-                        
-                        for match in matches:
-                            if isinstance(match, tuple):  # If capturing groups
-                                match = match[0]  # Use first group
+                        if transform_type == "date":
+                            # Date transformation example: simple US date format MM/DD/YYYY to format
+                            input_format = "%m/%d/%Y"
+                            date_format = rule.parameters.get("format", "%Y-%m-%d")
+                            
+                            def date_replacer(match):
+                                try:
+                                    return datetime.strptime(match.group(0), input_format).strftime(date_format)
+                                except:
+                                    return match.group(0)
                             
-                            try:
-                                from datetime import datetime
-                                date = datetime.strptime(match, "%m/%d/%Y")
-                                transformed = date.strftime(date_format)
+                            pattern = self._get_pattern(rule)
+                            matches = pattern.findall(processed_text)
+                            
+                            for match in matches:
+                                if isinstance(match, tuple):  # If capturing groups
+                                    match = match[0]  # Use first group
                                 
-                                results.append({
-                                    "rule_id": rule.id,
-                                    "rule_name": rule.name,
-                                    "action": "transform",
-                                    "original": match,
-                                    "transformed": transformed,
-                                    "transform_type": transform_type
-                                })
-                            except:
-                                pass  # Skip failed transformations
+                                try:
+                                    transformed = datetime.strptime(match, input_format).strftime(date_format)
+                                    
+                                    results.append({
+                                        "rule_id": rule.id,
+                                        "rule_name": rule.name,
+                                        "action": "transform",
+                                        "original": match,
+                                        "transformed": transformed,
+                                        "transform_type": transform_type
+                                    })
+                                except:
+                                    pass  # Skip failed transformations
+                            
+                            if matches:
+                                processed_text = pattern.sub(date_replacer, processed_text)
+                                plain = plain and self._is_plain(processed_text)
                         
-                        processed_text = pattern.sub(date_replacer, processed_text)
+                        # Add more transformation types as needed
                     
-                    # Add more transformation types as needed
+                    # Add more action types as needed
                 
-                # Add more action types as needed
+                except Exception as e:
+                    logger.error(f"Error applying rule {rule.name}: {str(e)}")
+                    results.append({
+                        "rule_id": rule.id,
+                        "rule_name": rule.name,
+                        "action": "error",
+                        "error": str(e)
+                    })
             
-            except Exception as e:
-                logger.error(f"Error applying rule {rule.name}: {str(e)}")
-                results.append({
-                    "rule_id": rule.id,
-                    "rule_name": rule.name,
-                    "action": "error",
-                    "error": str(e)
-                })
-        
         return {
             "processed_text": processed_text,
             "results": results,
             "status": "success"
         }
 
+    def process_batch(self, texts: List[str], rule_set_ids: Optional[List[str]] = None,
+                      context: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Process many texts through rules engine, scanning them together where possible.
+        
+        Returns one process_text result per text. Batches the joined scan can't
+        handle exactly like separate calls fall back to process_text per text.
+        """
+        outputs = None
+        indexes = [i for i, text in enumerate(texts) if text]
+        if len(indexes) > 1:
+            try:
+                outputs = self._process_joined([texts[i] for i in indexes], rule_set_ids)
+            except Exception as e:
+                logger.warning(f"Cannot process texts as a batch, processing them one by one: {str(e)}")
+        if outputs is None:
+            return [self.process_text(text, rule_set_ids, context) for text in texts]
+        
+        batch = [{"processed_text": text, "results": [], "status": "success"} for text in texts]
+        for i, output in zip(indexes, outputs):
+            batch[i] = output
+        return batch
+    
+    def _process_joined(self, texts: List[str], rule_set_ids: Optional[List[str]]) -> Optional[List[Dict[str, Any]]]:
+        """Apply the rules to non-empty texts joined by _BATCH_SEPARATOR, one pass per group of rules.
+        
+        Each result is attributed to a text by the offset of its match. Returns
+        None when the outcome could differ from processing each text on its own:
+        a text containing the separator, transform rules, anchors or lookarounds,
+        any block rule matching, or a match running across the separator.
+        """
+        joined = _BATCH_SEPARATOR.join(texts)
+        if joined.count(_BATCH_SEPARATOR) != len(texts) - 1:
+            return None
+        
+        rules = self._get_plan(tuple(rule_set_ids) if rule_set_ids else (config.default_rule_set,))
+        rules = self._screen_rules(rules, joined)
+        if not all(rule.action in ("redact", "flag", "block") and _is_batchable(rule.condition)
+                   and _BATCH_SEPARATOR not in rule.replacement for rule in rules):
+            return None
+        
+        # A blocked text gets a result of its own, so leave blocks to process_text
+        block_rules = [rule for rule in rules if rule.action == "block"]
+        if block_rules:
+            errors = []
+            if self._find_block(block_rules, joined, False, errors) is not None or errors:
+                return None
+            rules = [rule for rule in rules if rule.action != "block"]
+        
+        processed_text = joined
+        results = [[] for _ in texts]
+        for action, group in self._group_rules(rules):
+            combined = self._get_combined(group) if len(group) > 1 else None
+            matches = self._fused_matches(group, combined, processed_text) if combined is not None else None
+            passes = [(group, matches)] if matches is not None else [([rule], None) for rule in group]
+            for pass_rules, matches in passes:
+                found = []
+                starts = []
+                separators = [match.start() for match in _BATCH_SEPARATOR_RE.finditer(processed_text)]
+                if matches is None:
+                    matches = self._get_pattern(pass_rules[0]).finditer(processed_text)
+                if action == "redact":
+                    processed_text = self._redact_matches(pass_rules, matches, processed_text, found, starts)
+                else:
+                    self._flag_matches(pass_rules, matches, found, starts)
+                for result, start in zip(found, starts):
+                    if _BATCH_SEPARATOR in result.get("original", result.get("text", "")):
+                        return None
+                    results[bisect.bisect_left(separators, start)].append(result)
+        
+        # Hand back the original strings when nothing was redacted
+        if processed_text is not joined:
+            texts = processed_text.split(_BATCH_SEPARATOR)
+        return [{"processed_text": text, "results": text_results, "status": "success"}
+                for text, text_results in zip(texts, results)]
+
 # Initialize rules engine
 rules_engine = RulesEngine()
 
@@ -511,6 +1612,9 @@ rules_engine = RulesEngine()
 class RedactTextRequest(BaseModel):
     text: str
 
+class RedactTextBatchRequest(BaseModel):
+    texts: List[str]
+
 class ProcessTextRequest(BaseModel):
     text: str
     rule_sets: Optional[List[str]] = None
@@ -527,131 +1631,76 @@ class CustomFastMCP(FastMCP):
 
     def stdio(self):
         """Add stdio transport support for direct integration with Claude."""
-        import json
-        import sys
-
         logger.info("Starting MCP server with stdio transport")
 
-        # Helper to handle MCP messages
-        def handle_message(message_str):
+        # Messages are read and written as UTF-8 bytes, with orjson if available
+        if orjson is not None:
+            loads, dumps = orjson.loads, orjson.dumps
+        else:
+            loads = json.loads
+
+            def dumps(obj):
+                return json.dumps(obj).encode("utf-8")
+
+        tool_map = _MCP_TOOL_MAP
+
+        # Helper to run a tool and build its JSON-RPC response
+        def _dispatch_tool(tool_name, params, message_id):
+            if tool_name not in tool_map:
+                logger.error(f"Tool not found: {tool_name}")
+                return {
+                    "jsonrpc": "2.0",
+                    "id": message_id,
+                    "error": {
+                        "code": -32601,
+                        "message": f"Tool not found: {tool_name}"
+                    }
+                }
+
             try:
-                message = json.loads(message_str)
-                logger.info(f"Received message: {message_str[:100]}...")
-
-                # Define a mapping of tool names to their functions
-                tool_map = {
-                    # Core tools
-                    "redact_text": redact_text,
-                    "process_text": process_text,
-
-                    # Rule management tools
-                    "get_rules": get_rules,
-                    "get_rule": get_rule,
-                    "add_rule": add_rule,
-                    "update_rule": update_rule,
-                    "delete_rule": delete_rule,
-
-                    # Rule set management tools
-                    "get_rule_sets": get_rule_sets,
-                    "get_rule_set": get_rule_set,
-                    "add_rule_set": add_rule_set,
-                    "update_rule_set": update_rule_set,
-                    "delete_rule_set": delete_rule_set,
-                    "set_default_rule_set": set_default_rule_set
+                result = tool_map[tool_name](**params)
+                return {
+                    "jsonrpc": "2.0",
+                    "id": message_id,
+                    "result": result
+                }
+            except Exception as e:
+                logger.error(f"Error executing tool {tool_name}: {str(e)}")
+                return {
+                    "jsonrpc": "2.0",
+                    "id": message_id,
+                    "error": {
+                        "code": -32603,
+                        "message": str(e)
+                    }
                 }
 
-                # Support both legacy and new MCP protocol formats
-                if message.get("method") == "execute":
-                    # Legacy format
+        # Helper to handle MCP messages
+        def handle_message(message_bytes):
+            try:
+                message = loads(message_bytes)
+                method = message.get("method")
+                debug = logger.isEnabledFor(logging.DEBUG)
+                if debug:
+                    logger.debug("Received message: %r...", message_bytes[:100])
+
+                # Support both legacy ("execute") and new ("tools/call") MCP protocol formats
+                if method in ("execute", "tools/call"):
                     tool_name = message.get("params", {}).get("name")
                     params = message.get("params", {}).get("parameters", {})
-                    message_id = message.get("id")
-
-                    logger.info(f"Executing tool: {tool_name} with params {params}")
-
-                    if tool_name in tool_map:
-                        try:
-                            result = tool_map[tool_name](**params)
-                            response = {
-                                "jsonrpc": "2.0",
-                                "id": message_id,
-                                "result": result
-                            }
-                        except Exception as e:
-                            logger.error(f"Error executing tool {tool_name}: {str(e)}")
-                            response = {
-                                "jsonrpc": "2.0",
-                                "id": message_id,
-                                "error": {
-                                    "code": -32603,
-                                    "message": str(e)
-                                }
-                            }
-                    else:
-                        logger.error(f"Tool not found: {tool_name}")
-                        response = {
-                            "jsonrpc": "2.0",
-                            "id": message_id,
-                            "error": {
-                                "code": -32601,
-                                "message": f"Tool not found: {tool_name}"
-                            }
-                        }
 
-                elif message.get("method") == "tools/call":
-                    # Newer format
-                    tool_name = message.get("params", {}).get("name")
-                    params = message.get("params", {}).get("parameters", {})
-                    message_id = message.get("id")
-
-                    logger.info(f"Executing tool (new protocol): {tool_name} with params {params}")
-
-                    if tool_name in tool_map:
-                        try:
-                            result = tool_map[tool_name](**params)
-                            response = {
-                                "jsonrpc": "2.0",
-                                "id": message_id,
-                                "result": result
-                            }
-                        except Exception as e:
-                            logger.error(f"Error executing tool {tool_name}: {str(e)}")
-                            response = {
-                                "jsonrpc": "2.0",
-                                "id": message_id,
-                                "error": {
-                                    "code": -32603,
-                                    "message": str(e)
-                                }
-                            }
-                    else:
-                        logger.error(f"Tool not found: {tool_name}")
-                        response = {
-                            "jsonrpc": "2.0",
-                            "id": message_id,
-                            "error": {
-                                "code": -32601,
-                                "message": f"Tool not found: {tool_name}"
-                            }
-                        }
+                    if debug:
+                        logger.debug("Executing tool (%s): %s with params %s", method, tool_name, params)
+                    response = _dispatch_tool(tool_name, params, message.get("id"))
 
                 # Direct method call (when method name matches a tool)
-                elif message.get("method") in tool_map:
-                    tool_name = message.get("method")
-                    params = message.get("params", {})
-                    message_id = message.get("id")
-
-                    logger.info(f"Executing tool via direct method call: {tool_name}")
-                    result = tool_map[tool_name](**params)
-
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": message_id,
-                        "result": result
-                    }
+                elif method in tool_map:
+                    if debug:
+                        logger.debug("Executing tool via direct method call: %s", method)
+                    response = _dispatch_tool(method, message.get("params", {}), message.get("id"))
 
                 # Handle method list request
-                elif message.get("method") == "rpc.discover":
+                elif method == "rpc.discover":
                     logger.info("Handling 'rpc.discover' method")
                     tools = []
                     for tool_name, tool_fn in tool_map.items():
@@ -661,7 +1710,7 @@ class CustomFastMCP(FastMCP):
                             "parameters": {}  # Would need more introspection to get params
                         })
 
-                    return {
+                    response = {
                         "jsonrpc": "2.0",
                         "id": message.get("id"),
                         "result": {
@@ -670,23 +1719,25 @@ class CustomFastMCP(FastMCP):
                     }
                 else:
                     # Unknown method
-                    logger.error(f"Unknown method: {message.get('method')}")
+                    logger.error(f"Unknown method: {method}")
                     response = {
                         "jsonrpc": "2.0",
                         "id": message.get("id"),
                         "error": {
                             "code": -32601,
-                            "message": f"Unknown method: {message.get('method')}"
+                            "message": f"Unknown method: {method}"
                         }
                     }
 
                 # Output the response
-                logger.info(f"Sending response: {json.dumps(response)[:100]}...")
-                return json.dumps(response)
-
-            except json.JSONDecodeError:
-                logger.error(f"Invalid JSON: {message_str}")
-                return json.dumps({
+                payload = dumps(response)
+                if debug:
+                    logger.debug("Sending response of %d bytes", len(payload))
+                return payload
+
+            except json.JSONDecodeError:  # Also raised by orjson
+                logger.error(f"Invalid JSON: {message_bytes.decode('utf-8', 'replace')}")
+                return dumps({
                     "jsonrpc": "2.0",
                     "error": {
                         "code": -32700,
@@ -695,7 +1746,7 @@ class CustomFastMCP(FastMCP):
                 })
             except Exception as e:
                 logger.error(f"Error processing message: {str(e)}")
-                return json.dumps({
+                return dumps({
                     "jsonrpc": "2.0",
                     "error": {
                         "code": -32603,
@@ -703,18 +1754,15 @@ class CustomFastMCP(FastMCP):
                     }
                 })
 
-        # Read input lines and process each one
+        # Read input lines and process each one, through a 64 KB buffer
         try:
             logger.info("Stdio transport ready, waiting for input...")
-            while True:
-                line = sys.stdin.readline()
-                if not line:
-                    logger.info("End of input, exiting...")
-                    break
-
-                response = handle_message(line.strip())
-                sys.stdout.write(response + "\n")
-                sys.stdout.flush()
+            stdin = open(sys.stdin.fileno(), "rb", buffering=65536, closefd=False)
+            stdout = sys.stdout.buffer
+            for line in stdin:
+                stdout.write(handle_message(line.strip()) + b"\n")
+                stdout.flush()
+            logger.info("End of input, exiting...")
 
         except KeyboardInterrupt:
             logger.info("Received keyboard interrupt, exiting...")
@@ -727,6 +1775,24 @@ mcp_server = CustomFastMCP("Rules Engine")
 
 # ----------------- MCP Tools ------------------
 
+def _rules_read_only() -> bool:
+    """Check whether rule changes are refused, which they are when several HTTP workers serve.
+    
+    Each worker process holds its own copy of the rules while all of them
+    save to the same rules_config.json, so one worker saving would overwrite
+    what the others wrote.
+    """
+    return detect_transport() == "http" and get_worker_count() > 1
+
+def _mutating(fn):
+    """Refuse a tool that changes rules or rule sets while the rules are read-only."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _rules_read_only():
+            return {"error": "Rules are read-only with MCP_WORKERS > 1; run a single worker to change them"}
+        return fn(*args, **kwargs)
+    return wrapper
+
 @mcp_server.tool()
 def process_text(text: str, rule_sets: Optional[List[str]] = None, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Process text through the rules engine.
@@ -741,10 +1807,8 @@ def process_text(text: str, rule_sets: Optional[List[str]] = None, context: Opti
     """
     return rules_engine.process_text(text, rule_sets, context)
 
-@mcp_server.tool()
-def redact_text(text: str) -> Dict[str, Any]:
-    # Patched for redaction functionality
-    result = rules_engine.process_text(text)
+def _redaction(text: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a process_text result as a redact_text result."""
     processed_text = result.get("processed_text", text)
     matches = []
 
@@ -761,6 +1825,23 @@ def redact_text(text: str) -> Dict[str, Any]:
         "matches": matches
     }
 
+@mcp_server.tool()
+def redact_text(text: str) -> Dict[str, Any]:
+    # Patched for redaction functionality
+    return _redaction(text, rules_engine.process_text(text))
+
+@mcp_server.tool()
+def redact_texts(texts: List[str]) -> Dict[str, Any]:
+    """Redact many texts at once, scanning them together where possible.
+    
+    Args:
+        texts: The texts to redact
+        
+    Returns:
+        A dictionary with one redact_text result per text
+    """
+    return {"results": [_redaction(text, result) for text, result in zip(texts, rules_engine.process_batch(texts))]}
+
 @mcp_server.tool()
 def get_rules(rule_set_id: Optional[str] = None) -> Dict[str, Any]:
     """Get all rules or rules in a specific rule set.
@@ -773,9 +1854,9 @@ def get_rules(rule_set_id: Optional[str] = None) -> Dict[str, Any]:
     """
     if rule_set_id:
         rules_list = rules_engine.get_rules_by_set(rule_set_id)
-        return {"rules": [rule.model_dump() for rule in rules_list]}
+        return {"rules": [rules_engine.get_rule_dict(rule) for rule in rules_list]}
     else:
-        return {"rules": [rule.model_dump() for rule in config.rules.values()]}
+        return {"rules": [rules_engine.get_rule_dict(rule) for rule in config.rules.values()]}
 
 @mcp_server.tool()
 def get_rule(rule_id: str) -> Dict[str, Any]:
@@ -792,9 +1873,10 @@ def get_rule(rule_id: str) -> Dict[str, Any]:
     if not rule:
         return {"error": f"Rule not found: {rule_id}"}
     
-    return {"rule": rule.model_dump()}
+    return {"rule": rules_engine.get_rule_dict(rule)}
 
 @mcp_server.tool()
+@_mutating
 def add_rule(name: str, condition: str, action: str, description: str = "", 
              replacement: str = "<REDACTED>", parameters: Dict[str, Any] = {}, 
              priority: int = 0) -> Dict[str, Any]:
@@ -824,20 +1906,24 @@ def add_rule(name: str, condition: str, action: str, description: str = "",
             priority=priority
         )
         
-        # Validate regex
+        # Validate regex, keeping the compiled pattern for the engine
         try:
-            re.compile(rule.condition)
+            pattern = re.compile(rule.condition)
         except re.error as e:
             return {"error": f"Invalid regex pattern: {str(e)}"}
         
         # Add rule
-        rule_id = rules_engine.add_rule(rule)
+        rule_id = rules_engine.add_rule(rule, pattern)
         
-        return {"rule_id": rule_id, "rule": rule.model_dump()}
+        return {"rule_id": rule_id, "rule": rules_engine.get_rule_dict(rule)}
     except Exception as e:
         return {"error": f"Error adding rule: {str(e)}"}
 
+# Rule fields the update_rule tool can change, in the order of its parameters
+_UPDATABLE_FIELDS = ("name", "description", "condition", "action", "replacement", "parameters", "enabled", "priority")
+
 @mcp_server.tool()
+@_mutating
 def update_rule(rule_id: str, name: Optional[str] = None, description: Optional[str] = None,
                 condition: Optional[str] = None, action: Optional[str] = None,
                 replacement: Optional[str] = None, parameters: Optional[Dict[str, Any]] = None,
@@ -864,41 +1950,30 @@ def update_rule(rule_id: str, name: Optional[str] = None, description: Optional[
     if not existing_rule:
         return {"error": f"Rule not found: {rule_id}"}
     
-    # Update rule fields
-    update_params = {}
-    for field, value in [
-        ("name", name), 
-        ("description", description), 
-        ("condition", condition), 
-        ("action", action), 
-        ("replacement", replacement), 
-        ("parameters", parameters), 
-        ("enabled", enabled), 
-        ("priority", priority)
-    ]:
-        if value is not None:
-            update_params[field] = value
-    
-    # Update rule fields
-    for field, value in update_params.items():
-        setattr(existing_rule, field, value)
-    
-    # Validate regex
+    # Validate regex before changing anything, keeping the compiled pattern for the engine
+    pattern = None
     if condition is not None:
         try:
-            re.compile(existing_rule.condition)
+            pattern = re.compile(condition)
         except re.error as e:
             return {"error": f"Invalid regex pattern: {str(e)}"}
     
+    # Update the given fields in one pass
+    for field, value in zip(_UPDATABLE_FIELDS, (name, description, condition, action,
+                                                replacement, parameters, enabled, priority)):
+        if value is not None:
+            setattr(existing_rule, field, value)
+    
     # Update rule
-    success = rules_engine.update_rule(rule_id, existing_rule)
+    success = rules_engine.update_rule(rule_id, existing_rule, pattern)
     
     if not success:
         return {"error": "Failed to update rule"}
     
-    return {"rule_id": rule_id, "rule": existing_rule.model_dump()}
+    return {"rule_id": rule_id, "rule": rules_engine.get_rule_dict(existing_rule)}
 
 @mcp_server.tool()
+@_mutating
 def delete_rule(rule_id: str) -> Dict[str, Any]:
     """Delete a rule.
     
@@ -922,7 +1997,7 @@ def get_rule_sets() -> Dict[str, Any]:
     Returns:
         A dictionary containing all rule sets
     """
-    rule_sets = {id: rule_set.model_dump() for id, rule_set in config.rule_sets.items()}
+    rule_sets = {id: rules_engine.get_rule_set_dict(rule_set) for id, rule_set in config.rule_sets.items()}
     default_rule_set = config.default_rule_set
     
     return {"rule_sets": rule_sets, "default_rule_set": default_rule_set}
@@ -946,12 +2021,13 @@ def get_rule_set(rule_set_id: str) -> Dict[str, Any]:
     rules_list = rules_engine.get_rules_by_set(rule_set_id)
     
     return {
-        "rule_set": rule_set.model_dump(),
-        "rules": [rule.model_dump() for rule in rules_list],
+        "rule_set": rules_engine.get_rule_set_dict(rule_set),
+        "rules": [rules_engine.get_rule_dict(rule) for rule in rules_list],
         "is_default": rule_set_id == config.default_rule_set
     }
 
 @mcp_server.tool()
+@_mutating
 def add_rule_set(name: str, description: str = "", rule_ids: List[str] = []) -> Dict[str, Any]:
     """Add a new rule set.
     
@@ -974,11 +2050,12 @@ def add_rule_set(name: str, description: str = "", rule_ids: List[str] = []) ->
         # Add rule set
         rule_set_id = rules_engine.add_rule_set(rule_set)
         
-        return {"rule_set_id": rule_set_id, "rule_set": rule_set.model_dump()}
+        return {"rule_set_id": rule_set_id, "rule_set": rules_engine.get_rule_set_dict(rule_set)}
     except Exception as e:
         return {"error": f"Error adding rule set: {str(e)}"}
 
 @mcp_server.tool()
+@_mutating
 def update_rule_set(rule_set_id: str, name: Optional[str] = None, 
                    description: Optional[str] = None, rule_ids: Optional[List[str]] = None,
                    enabled: Optional[bool] = None) -> Dict[str, Any]:
@@ -1021,9 +2098,10 @@ def update_rule_set(rule_set_id: str, name: Optional[str] = None,
     if not success:
         return {"error": "Failed to update rule set"}
     
-    return {"rule_set_id": rule_set_id, "rule_set": existing_rule_set.model_dump()}
+    return {"rule_set_id": rule_set_id, "rule_set": rules_engine.get_rule_set_dict(existing_rule_set)}
 
 @mcp_server.tool()
+@_mutating
 def delete_rule_set(rule_set_id: str) -> Dict[str, Any]:
     """Delete a rule set.
     
@@ -1041,6 +2119,7 @@ def delete_rule_set(rule_set_id: str) -> Dict[str, Any]:
     return {"success": True, "rule_set_id": rule_set_id}
 
 @mcp_server.tool()
+@_mutating
 def set_default_rule_set(rule_set_id: str) -> Dict[str, Any]:
     """Set the default rule set.
     
@@ -1057,287 +2136,287 @@ def set_default_rule_set(rule_set_id: str) -> Dict[str, Any]:
     
     return {"success": True, "default_rule_set": rule_set_id}
 
+# Tool dispatch table for the JSON-RPC transports, built once at import
+_MCP_TOOL_MAP: Mapping[str, Callable] = MappingProxyType({
+    # Core tools
+    "redact_text": redact_text,
+    "redact_texts": redact_texts,
+    "process_text": process_text,
+
+    # Rule management tools
+    "get_rules": get_rules,
+    "get_rule": get_rule,
+    "add_rule": add_rule,
+    "update_rule": update_rule,
+    "delete_rule": delete_rule,
+
+    # Rule set management tools
+    "get_rule_sets": get_rule_sets,
+    "get_rule_set": get_rule_set,
+    "add_rule_set": add_rule_set,
+    "update_rule_set": update_rule_set,
+    "delete_rule_set": delete_rule_set,
+    "set_default_rule_set": set_default_rule_set
+})
+
+# JSON-RPC methods that name the tool to call in their params: (key of the tool name, key of its arguments)
+_METHOD_ALIASES: Mapping[str, tuple] = MappingProxyType({
+    "execute": ("name", "parameters"),  # Legacy MCP protocol
+    "tools/call": ("name", "parameters")
+})
+
+def _resolve(method: str, params: Dict[str, Any], tool_map: Mapping[str, Callable]) -> tuple:
+    """Resolve a JSON-RPC call to ``(tool, arguments)``.
+    
+    A method named after a tool calls it with the params; the methods in
+    _METHOD_ALIASES name the tool inside the params instead. Raises KeyError
+    with the tool name when there is no such tool.
+    """
+    alias = _METHOD_ALIASES.get(method)
+    if alias is None:
+        name, arguments = method, params
+    else:
+        name, arguments = params.get(alias[0]), params.get(alias[1], {})
+    tool = tool_map.get(name)
+    if tool is None:
+        raise KeyError(name)
+    return tool, arguments
+
+# Tool descriptions served at /mcp-tools and by rpc.discover
+_MCP_TOOLS = [
+    {
+        "name": "redact_text",
+        "description": "Redacts sensitive information from text based on configured patterns.",
+        "parameters": {
+            "text": {
+                "type": "string",
+                "description": "The text to redact"
+            }
+        }
+    },
+    {
+        "name": "redact_texts",
+        "description": "Redacts many texts at once, scanning them together where possible.",
+        "parameters": {
+            "texts": {
+                "type": "array",
+                "description": "The texts to redact",
+                "items": {
+                    "type": "string"
+                }
+            }
+        }
+    },
+    {
+        "name": "process_text",
+        "description": "Processes text through rules engine with options for rule sets.",
+        "parameters": {
+            "text": {
+                "type": "string",
+                "description": "The text to process"
+            },
+            "rule_sets": {
+                "type": "array",
+                "description": "Optional IDs of rule sets to apply",
+                "items": {
+                    "type": "string"
+                }
+            },
+            "context": {
+                "type": "object",
+                "description": "Additional context for rule application"
+            }
+        }
+    }
+]
+
+def _encode_json(content: Any) -> bytes:
+    """Encode a JSON response body, with orjson if available."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content).encode("utf-8")
+
+# Bodies of the static responses, encoded once
+_MCP_TOOLS_JSON = _encode_json({"tools": _MCP_TOOLS})
+_ROOT_JSON = _encode_json({
+    "name": "Rules Engine MCP Server",
+    "version": "1.0.0",
+    "status": "active",
+    "endpoints": [
+        "/redact_text",
+        "/redact_text_batch",
+        "/rules",
+        "/process_text",
+        "/mcp",
+        "/sse",
+        "/mcp-tools",
+        "/health"
+    ]
+})
+_HEALTH_JSON = _encode_json({"status": "ok", "version": "1.0.0"})
+
 # ----------------- FastAPI App ------------------
 
+# Threads for the text processing endpoints. Rule matching is CPU-bound and mostly holds
+# the GIL, so threads beyond the number of cores would only contend for it
+_PROCESS_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="RulesEngineWorker")
+
+# Tools that match rules against text, run on _PROCESS_EXECUTOR when called through /mcp too
+_TEXT_TOOLS = frozenset({redact_text, redact_texts, process_text})
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
+
 def create_fastapi_app():
     """Create a FastAPI app with explicit endpoints for both MCP and direct access."""
-    app = FastAPI(title="Rules Engine MCP Server", version="1.0.0")
+    app = FastAPI(title="Rules Engine MCP Server", version="1.0.0", default_response_class=FastJSONResponse)
     
     # Root endpoint for service discovery
     @app.get("/")
     async def root():
-        return {
-            "name": "Rules Engine MCP Server",
-            "version": "1.0.0",
-            "status": "active",
-            "endpoints": [
-                "/redact_text",
-                "/process_text",
-                "/mcp",
-                "/sse",
-                "/mcp-tools",
-                "/health"
-            ]
-        }
+        return Response(content=_ROOT_JSON, media_type="application/json")
     
     # Health check endpoints
     @app.get("/health")
     async def health_check():
-        return {"status": "ok", "version": "1.0.0"}
+        return Response(content=_HEALTH_JSON, media_type="application/json")
 
     @app.get("/healthcheck")
     async def healthcheck():
-        return {"status": "ok", "version": "1.0.0"}
+        return Response(content=_HEALTH_JSON, media_type="application/json")
     
     # MCP tools endpoint
     @app.get("/mcp-tools")
     async def get_mcp_tools():
         logger.info("Tools info requested at /mcp-tools")
-        tools = []
-        # Get tools from registered functions
-        # The FastMCP library might have different attribute names in different versions
-        if hasattr(mcp_server, '_tools'):
-            tool_dict = mcp_server._tools
-        elif hasattr(mcp_server, '_tool_registry'):
-            tool_dict = mcp_server._tool_registry
-        else:
-            # Fallback to hardcoded tools if we can't find the registry
-            tool_dict = {
-                "redact_text": {"fn": redact_text},
-                "process_text": {"fn": process_text},
-                "get_rules": {"fn": get_rules},
-                "get_rule": {"fn": get_rule},
-                "add_rule": {"fn": add_rule},
-                "update_rule": {"fn": update_rule},
-                "delete_rule": {"fn": delete_rule},
-                "get_rule_sets": {"fn": get_rule_sets},
-                "get_rule_set": {"fn": get_rule_set},
-                "add_rule_set": {"fn": add_rule_set},
-                "update_rule_set": {"fn": update_rule_set},
-                "delete_rule_set": {"fn": delete_rule_set},
-                "set_default_rule_set": {"fn": set_default_rule_set}
-            }
-            logger.warning("Could not find MCP tool registry, using hardcoded tool list")
-
-        # Manually add our tools since we know which ones we've registered
-        tools = [
-            {
-                "name": "redact_text",
-                "description": "Redacts sensitive information from text based on configured patterns.",
-                "parameters": {
-                    "text": {
-                        "type": "string",
-                        "description": "The text to redact"
-                    }
-                }
-            },
-            {
-                "name": "process_text",
-                "description": "Processes text through rules engine with options for rule sets.",
-                "parameters": {
-                    "text": {
-                        "type": "string",
-                        "description": "The text to process"
-                    },
-                    "rule_sets": {
-                        "type": "array",
-                        "description": "Optional IDs of rule sets to apply",
-                        "items": {
-                            "type": "string"
-                        }
-                    },
-                    "context": {
-                        "type": "object",
-                        "description": "Additional context for rule application"
-                    }
-                }
-            }
-        ]
-
-        return {"tools": tools}
+        return Response(content=_MCP_TOOLS_JSON, media_type="application/json")
+    
+    # Active rules of the default rule set, used by clients to prefilter text
+    @app.get("/rules")
+    async def list_active_rules(request: Request):
+        rules = [rules_engine.get_rule_dict(rule) for rule in rules_engine.get_rules_by_set() if rule.enabled]
+        payload = {"rule_set": config.default_rule_set, "rules": rules}
+        body = _encode_json(payload)
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
     
     # Direct tool endpoints for simplified access
     @app.post("/redact_text")
     async def direct_redact_text(request: RedactTextRequest):
         logger.info(f"Direct redact_text request received with {len(request.text)} characters")
-        result = redact_text(request.text)
-        return result
+        result = await asyncio.get_running_loop().run_in_executor(_PROCESS_EXECUTOR, redact_text, request.text)
+        return FastJSONResponse(result)
+
+    # Batch redaction: many texts in a single request
+    @app.post("/redact_text_batch")
+    async def direct_redact_text_batch(request: RedactTextBatchRequest):
+        logger.info(f"Direct redact_text_batch request received with {len(request.texts)} texts")
+        result = await asyncio.get_running_loop().run_in_executor(_PROCESS_EXECUTOR, redact_texts, request.texts)
+        return FastJSONResponse(result)
 
     # Direct access to process_text
     @app.post("/process_text")
     async def direct_process_text(request: ProcessTextRequest):
         logger.info(f"Direct process_text request received with {len(request.text)} characters")
-        result = process_text(request.text, request.rule_sets, request.context)
-        return result
+        result = await asyncio.get_running_loop().run_in_executor(
+            _PROCESS_EXECUTOR, process_text, request.text, request.rule_sets, request.context)
+        return FastJSONResponse(result)
     
     # MCP JSON-RPC endpoint
     @app.post("/mcp")
     async def handle_mcp_request(request: Request):
         """Handle MCP JSON-RPC requests explicitly."""
         try:
-            data = await request.json()
+            # Parse the body with orjson's native parser when available
+            body = await request.body()
+            data = orjson.loads(body) if orjson is not None else json.loads(body)
             method = data.get("method")
             params = data.get("params", {})
             request_id = data.get("id")
 
-            logger.info(f"MCP endpoint received method: {method} with params keys: {list(params.keys())}")
-
-            # Define a mapping of tool names to their functions
-            tool_map = {
-                # Core tools
-                "redact_text": redact_text,
-                "process_text": process_text,
-
-                # Rule management tools
-                "get_rules": get_rules,
-                "get_rule": get_rule,
-                "add_rule": add_rule,
-                "update_rule": update_rule,
-                "delete_rule": delete_rule,
-
-                # Rule set management tools
-                "get_rule_sets": get_rule_sets,
-                "get_rule_set": get_rule_set,
-                "add_rule_set": add_rule_set,
-                "update_rule_set": update_rule_set,
-                "delete_rule_set": delete_rule_set,
-                "set_default_rule_set": set_default_rule_set
-            }
-
-            # If method is a direct tool call (when method name directly matches a tool)
-            if method in tool_map:
-                logger.info(f"Executing tool directly: {method}")
-                result = tool_map[method](**params)
-
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": result
-                }
-
-            # Handle legacy MCP protocol 'execute' method
-            elif method == "execute":
-                logger.info("Handling legacy 'execute' method")
-                tool_name = params.get("name")
-                tool_params = params.get("parameters", {})
-
-                if tool_name in tool_map:
-                    logger.info(f"Executing tool via legacy protocol: {tool_name}")
-                    result = tool_map[tool_name](**tool_params)
-
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": result
-                    }
-                else:
-                    logger.error(f"Tool not found: {tool_name}")
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "error": {
-                            "code": -32601,
-                            "message": f"Method not found: {tool_name}"
-                        }
-                    }
-
-            # Handle newer MCP protocol 'tools/call' method
-            elif method == "tools/call":
-                logger.info("Handling new 'tools/call' method")
-                tool_name = params.get("name")
-                tool_params = params.get("parameters", {})
-
-                if tool_name in tool_map:
-                    logger.info(f"Executing tool via new protocol: {tool_name}")
-                    result = tool_map[tool_name](**tool_params)
-
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "result": result
-                    }
-                else:
-                    logger.error(f"Tool not found: {tool_name}")
-                    return {
-                        "jsonrpc": "2.0",
-                        "id": request_id,
-                        "error": {
-                            "code": -32601,
-                            "message": f"Method not found: {tool_name}"
-                        }
-                    }
+            # Per-call logs only at DEBUG, as in the stdio transport: formatting them costs more than most tools
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("MCP endpoint received method: %s with params keys: %s", method, list(params))
 
             # Handle method list request
-            elif method == "rpc.discover":
+            if method == "rpc.discover":
                 logger.info("Handling 'rpc.discover' method")
                 # Return the tools listed in our /mcp-tools endpoint
-                tools_response = await get_mcp_tools()
-                tools = tools_response.get("tools", [])
-
-                return {
+                return FastJSONResponse({
                     "jsonrpc": "2.0",
                     "id": request_id,
                     "result": {
-                        "methods": tools
+                        "methods": _MCP_TOOLS
                     }
-                }
+                })
 
-            else:
-                logger.error(f"Unknown method: {method}")
-                return {
+            # Direct tool calls, and the legacy 'execute' and new 'tools/call' methods
+            try:
+                tool, arguments = _resolve(method, params, _MCP_TOOL_MAP)
+            except KeyError as e:
+                logger.error(f"Method not found: {e.args[0]}")
+                return FastJSONResponse({
                     "jsonrpc": "2.0",
                     "id": request_id,
                     "error": {
                         "code": -32601,
-                        "message": f"Method not found: {method}"
+                        "message": f"Method not found: {e.args[0]}"
                     }
-                }
+                })
+
+            if debug:
+                logger.debug("Executing tool %s for method: %s", tool.__name__, method)
+            if tool in _TEXT_TOOLS:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    _PROCESS_EXECUTOR, functools.partial(tool, **arguments))
+            else:
+                result = tool(**arguments)
+
+            return FastJSONResponse({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": result
+            })
 
         except Exception as e:
-            logger.error(f"Error handling MCP request: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return {
+            logger.exception("Error handling MCP request: %s", e)
+            return FastJSONResponse({
                 "jsonrpc": "2.0",
                 "id": data.get("id") if "data" in locals() else None,
                 "error": {
                     "code": -32603,
                     "message": f"Internal error: {str(e)}"
                 }
-            }
+            })
 
     # SSE (Server-Sent Events) endpoint for MCP streaming
     @app.get("/sse")
     async def mcp_sse(request: Request):
         """Handle Server-Sent Events (SSE) for MCP requests."""
-        from fastapi.responses import StreamingResponse
-        import asyncio
-        import json
-
         logger.info("SSE connection established")
 
         async def event_generator():
             # Send initial connected event
-            yield "event: connected\ndata: {}\n\n"
-
-            # Keep connection alive
-            while True:
-                # Send an empty comment to keep connection alive
-                yield ": keepalive\n\n"
-                await asyncio.sleep(30)
-
-        return StreamingResponse(
-            event_generator(),
-            media_type="text/event-stream",
-            headers={
-                'Cache-Control': 'no-cache',
-                'Connection': 'keep-alive',
-                'X-Accel-Buffering': 'no'
-            }
-        )
+            yield {"event": "connected", "data": "{}"}
+
+            # Stay open until the client disconnects; EventSourceResponse sends the keepalive pings
+            await asyncio.Event().wait()
+
+        return EventSourceResponse(event_generator(), ping=15)
     
     return app
 
+# Module-level app, so uvicorn worker processes can import it
+app = create_fastapi_app()
+
 # ----------------- Main ------------------
 
 def detect_transport():
@@ -1356,6 +2435,21 @@ def detect_os():
     logger.info(f"Detected operating system: {system}")
     return system
 
+def get_worker_count() -> int:
+    """Get the number of HTTP worker processes from MCP_WORKERS (default: 1).
+    
+    Every worker loads its own rules engine, so with more than one the rules
+    can't be changed; see _rules_read_only.
+    """
+    value = os.environ.get("MCP_WORKERS", "1")
+    if value == "auto":
+        return max((os.cpu_count() or 2) // 2, 1)
+    try:
+        return max(int(value), 1)
+    except ValueError:
+        logger.warning(f"Invalid MCP_WORKERS value {value!r}, using 1 worker")
+        return 1
+
 def run_server():
     """Run the appropriate server based on the detected transport."""
     transport = detect_transport()
@@ -1365,7 +2459,6 @@ def run_server():
         mcp_server.stdio()
     else:
         logger.info("Starting MCP server with HTTP transport")
-        app = create_fastapi_app()
 
         host = "0.0.0.0"
 
@@ -1376,9 +2469,19 @@ def run_server():
         else:
             port = 6366  # Linux/Unix port
 
-        # Run with uvicorn
-        logger.info(f"Server will run on http://{host}:{port}")
-        uvicorn.run(app, host=host, port=port)
+        # Run with uvicorn, on uvloop and the httptools parser when installed (uvicorn[standard])
+        workers = get_worker_count()
+        loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+        http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+        logger.info(f"Server will run on http://{host}:{port} (loop: {loop}, http: {http}, workers: {workers})")
+        if workers > 1:
+            # Every worker process imports this module and builds its own app and rules engine;
+            # they only read the rules, so write out any pending change before they load them
+            logger.info(f"Rule changes are disabled while {workers} workers serve")
+            rules_engine.flush_config()
+            uvicorn.run(f"{Path(__file__).stem}:app", host=host, port=port, workers=workers, loop=loop, http=http)
+        else:
+            uvicorn.run(app, host=host, port=port, loop=loop, http=http)
 
 if __name__ == "__main__":
     logger.info("Starting Rules Engine MCP Server...")
@@ -19,6 +19,41 @@ RED = "\033[91m"
 RESET = "\033[0m"
 BOLD = "\033[1m"
 
+# One session for all requests, so they reuse a kept-alive connection to the server
+_SESSION = requests.Session()
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Sensitive test data for the redaction API test, with its request body built once
+_TEST_DATA = {
+    "Email": "test@example.com",
+    "SSN": "123-45-6789",
+    "Credit Card": "4111-1111-1111-1111",
+    "Phone": "(555) 123-4567",
+    "API Key": "api_key=abcdef123456",
+    "IP Address": "192.168.1.1"
+}
+_TEST_TEXT = "Here's some sensitive information:\n" + "".join(f"{key}: {value}\n" for key, value in _TEST_DATA.items())
+_TEST_BODY = json.dumps({"text": _TEST_TEXT}).encode("utf-8")
+
+# Request bodies for the MCP protocol test, by protocol version
+_MCP_TEXT = "My credit card is 1234-5678-9012-3456"
+_MCP_BODIES = {
+    # Legacy protocol format
+    "legacy": json.dumps({
+        "jsonrpc": "2.0",
+        "id": "test-1",
+        "method": "execute",
+        "params": {"name": "redact_text", "parameters": {"text": _MCP_TEXT}}
+    }).encode("utf-8"),
+    # New protocol format
+    "tools/call": json.dumps({
+        "jsonrpc": "2.0",
+        "id": "test-2",
+        "method": "tools/call",
+        "params": {"name": "redact_text", "parameters": {"text": _MCP_TEXT}}
+    }).encode("utf-8")
+}
+
 def print_header(title):
     """Print a formatted header."""
     print(f"\n{BOLD}{'=' * 80}{RESET}")
@@ -39,10 +74,15 @@ def print_result(test_name, success, message=""):
     return success
 
 def run_command(cmd, capture=True, print_output=False):
-    """Run a shell command and return the output."""
+    """Run a command and return the output.
+    
+    A string runs through the shell; a list of arguments is executed
+    directly, without starting /bin/sh.
+    """
+    shell = isinstance(cmd, str)
     try:
         if capture:
-            result = subprocess.run(cmd, shell=True, check=False, 
+            result = subprocess.run(cmd, shell=shell, check=False, 
                                capture_output=True, text=True)
             if print_output and result.stdout:
                 print(result.stdout)
@@ -50,7 +90,7 @@ def run_command(cmd, capture=True, print_output=False):
                 print(f"{RED}{result.stderr}{RESET}")
             return result
         else:
-            return subprocess.run(cmd, shell=True, check=False)
+            return subprocess.run(cmd, shell=shell, check=False)
     except Exception as e:
         print(f"{RED}Error executing command: {cmd}{RESET}")
         print(f"{RED}{str(e)}{RESET}")
@@ -61,7 +101,7 @@ def test_mcp_server_running():
     print_section("MCP Server Status")
     
     try:
-        response = requests.get("http://localhost:6366/health", timeout=5)
+        response = _SESSION.get("http://localhost:6366/health", timeout=5)
         if response.status_code == 200:
             return print_result("MCP server is running", True, f"at http://localhost:6366")
         else:
@@ -87,7 +127,11 @@ def test_claude_mcp_config():
     """Test Claude CLI MCP configuration."""
     print_section("Claude MCP Configuration")
     
-    result = run_command("claude mcp get rules_engine")
+    result = run_command(["claude", "mcp", "get", "rules_engine"])
+    return check_claude_mcp_output(result)
+
+def check_claude_mcp_output(result):
+    """Check the output of `claude mcp get rules_engine` for the SSE configuration."""
     if not result or result.returncode != 0:
         return print_result("Claude MCP config not found", False)
     
@@ -104,13 +148,14 @@ def configure_claude_mcp():
     """Configure Claude CLI with MCP."""
     print_section("Configuring Claude MCP")
     
-    # Remove any existing configuration
-    run_command("claude mcp remove rules_engine -s local 2>/dev/null || true")
-    
-    # Add new configuration with SSE transport
-    result = run_command("claude mcp add rules_engine http://localhost:6366 --transport sse --scope local")
+    # Remove any existing configuration, add it again with SSE transport and
+    # read it back, all in one shell rather than a process per step
+    result = run_command(["sh", "-c",
+                          "claude mcp remove rules_engine -s local 2>/dev/null; "
+                          "claude mcp add rules_engine http://localhost:6366 --transport sse --scope local && "
+                          "claude mcp get rules_engine"])
     if result and result.returncode == 0:
-        return test_claude_mcp_config()
+        return check_claude_mcp_output(result)
     else:
         return print_result("Failed to configure Claude MCP", False)
 
@@ -118,26 +163,14 @@ def test_redaction_api(verbose=True):
     """Test the direct redaction API."""
     print_section("Direct Redaction API Test")
     
-    # Test data
-    test_data = {
-        "Email": "test@example.com",
-        "SSN": "123-45-6789",
-        "Credit Card": "4111-1111-1111-1111",
-        "Phone": "(555) 123-4567",
-        "API Key": "api_key=abcdef123456",
-        "IP Address": "192.168.1.1"
-    }
-    
-    # Build test text
-    test_text = "Here's some sensitive information:\n"
-    for key, value in test_data.items():
-        test_text += f"{key}: {value}\n"
+    test_data = _TEST_DATA
+    test_text = _TEST_TEXT
     
     try:
-        response = requests.post(
+        response = _SESSION.post(
             "http://localhost:6366/process_text",
-            headers={"Content-Type": "application/json"},
-            json={"text": test_text},
+            headers=_JSON_HEADERS,
+            data=_TEST_BODY,
             timeout=5
         )
         
@@ -182,38 +215,12 @@ def test_mcp_protocol():
     success = True
     
     # Test with both legacy and tools/call protocol versions
-    for protocol_version in ["legacy", "tools/call"]:
-        if protocol_version == "legacy":
-            # Legacy protocol format
-            payload = {
-                "jsonrpc": "2.0",
-                "id": "test-1",
-                "method": "execute",
-                "params": {
-                    "name": "redact_text",
-                    "parameters": {
-                        "text": "My credit card is 1234-5678-9012-3456"
-                    }
-                }
-            }
-        else:
-            # New protocol format
-            payload = {
-                "jsonrpc": "2.0",
-                "id": "test-2",
-                "method": "tools/call",
-                "params": {
-                    "name": "redact_text",
-                    "parameters": {
-                        "text": "My credit card is 1234-5678-9012-3456"
-                    }
-                }
-            }
-        
+    for protocol_version, body in _MCP_BODIES.items():
         try:
-            response = requests.post(
+            response = _SESSION.post(
                 "http://localhost:6366/mcp",
-                json=payload,
+                headers=_JSON_HEADERS,
+                data=body,
                 timeout=5
             )
             
@@ -7,16 +7,22 @@ for programmatic access to the redaction service.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import sys
 import argparse
 
 API_BASE_URL = "http://localhost:6366"
 
+# One session for all calls, so requests to the server reuse kept-alive connections
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=16))
+_SESSION.headers.update({"Content-Type": "application/json", "Connection": "keep-alive"})
+
 def check_server():
     """Check if the MCP server is running and healthy."""
     try:
-        response = requests.get(f"{API_BASE_URL}/health")
+        response = _SESSION.get(f"{API_BASE_URL}/health", timeout=(0.5, 2))
         if response.status_code == 200:
             return True
         return False
@@ -30,10 +36,9 @@ def redact_text(text):
         return None
     
     try:
-        response = requests.post(
+        response = _SESSION.post(
             f"{API_BASE_URL}/redact_text",
-            json={"text": text},
-            headers={"Content-Type": "application/json"}
+            json={"text": text}
         )
         response.raise_for_status()
         return response.json()
@@ -52,10 +57,9 @@ def process_text(text, rule_sets=None):
         data["rule_sets"] = rule_sets
     
     try:
-        response = requests.post(
+        response = _SESSION.post(
             f"{API_BASE_URL}/process_text",
-            json=data,
-            headers={"Content-Type": "application/json"}
+            json=data
         )
         response.raise_for_status()
         return response.json()
@@ -66,7 +70,7 @@ def process_text(text, rule_sets=None):
 def list_tools():
     """List available MCP tools."""
     try:
-        response = requests.get(f"{API_BASE_URL}/mcp-tools")
+        response = _SESSION.get(f"{API_BASE_URL}/mcp-tools")
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -79,15 +83,14 @@ def rpc_call(method, params=None):
         params = {}
     
     try:
-        response = requests.post(
+        response = _SESSION.post(
             f"{API_BASE_URL}/mcp",
             json={
                 "jsonrpc": "2.0",
                 "id": 1,
                 "method": method,
                 "params": params
-            },
-            headers={"Content-Type": "application/json"}
+            }
         )
         response.raise_for_status()
         return response.json()
@@ -14,6 +14,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger("MinimalMCP")
 
+# Optional: orjson parses and encodes the JSON-RPC messages much faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _loads, _dumps = orjson.loads, orjson.dumps
+else:
+    _loads = json.loads
+    
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 # Define tools with inputSchema format
 TOOLS = [
     {
@@ -53,6 +67,23 @@ TOOLS = [
     }
 ]
 
+# Response bodies and JSON-RPC results that never change, encoded once
+_HEALTH_JSON = _dumps({"status": "ok"})
+_NOT_FOUND_JSON = _dumps({"error": "Endpoint not found"})
+_DISCOVER_JSON = _dumps({"jsonrpc": "2.0", "id": 1, "result": {"methods": TOOLS}})
+_EMPTY_RESULT = _dumps({})
+_RESULTS = {
+    "rpc.discover": _dumps({"methods": TOOLS}),
+    "tools/list": _dumps({"tools": TOOLS}),
+    # Tool execution (minimal implementation)
+    "tools/call": _dumps({"message": "Tool execution successful"}),
+    "execute": _dumps({"message": "Tool execution successful"})
+}
+
+def _rpc_response(request_id, result: bytes) -> bytes:
+    """Encode a JSON-RPC response around an already encoded result."""
+    return b'{"jsonrpc":"2.0","id":' + _dumps(request_id) + b',"result":' + result + b'}'
+
 class MinimalHandler(http.server.BaseHTTPRequestHandler):
     def send_cors_headers(self):
         """Set CORS headers to allow all origins."""
@@ -75,7 +106,7 @@ class MinimalHandler(http.server.BaseHTTPRequestHandler):
             self.send_response(200)
             self.send_header("Content-Type", "application/json")
             self.end_headers()
-            self.wfile.write(json.dumps({"status": "ok"}).encode())
+            self.wfile.write(_HEALTH_JSON)
             
         elif self.path == "/mcp" or self.path == "/":
             # Tool discovery endpoint
@@ -83,20 +114,14 @@ class MinimalHandler(http.server.BaseHTTPRequestHandler):
             self.send_header("Content-Type", "application/json")
             self.send_cors_headers()
             self.end_headers()
-            
-            response = {
-                "jsonrpc": "2.0", 
-                "id": 1, 
-                "result": {"methods": TOOLS}
-            }
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(_DISCOVER_JSON)
             
         else:
             # Not found
             self.send_response(404)
             self.send_header("Content-Type", "application/json")
             self.end_headers()
-            self.wfile.write(json.dumps({"error": "Endpoint not found"}).encode())
+            self.wfile.write(_NOT_FOUND_JSON)
     
     def do_POST(self):
         """Handle POST requests."""
@@ -107,64 +132,34 @@ class MinimalHandler(http.server.BaseHTTPRequestHandler):
             self.send_response(404)
             self.send_header("Content-Type", "application/json")
             self.end_headers()
-            self.wfile.write(json.dumps({"error": "Endpoint not found"}).encode())
+            self.wfile.write(_NOT_FOUND_JSON)
             return
         
         # Read request body
         try:
             content_length = int(self.headers.get("Content-Length", 0))
-            post_data = self.rfile.read(content_length).decode('utf-8')
-            logger.info(f"Received data: {post_data[:200]}...")
+            post_data = self.rfile.read(content_length)
+            logger.info(f"Received data: {post_data[:200].decode('utf-8', 'replace')}...")
             
-            # Parse JSON
-            data = json.loads(post_data)
+            # Parse JSON straight from the bytes
+            data = _loads(post_data)
             method = data.get("method", "")
             request_id = data.get("id", 1)
             
             logger.info(f"Method: {method}")
             
+            # Every method has a fixed result; unknown methods get an empty one
+            payload = _rpc_response(request_id, _RESULTS.get(method, _EMPTY_RESULT))
+            
             # Set common headers
             self.send_response(200)
             self.send_header("Content-Type", "application/json")
             self.send_cors_headers()
             self.end_headers()
             
-            # Handle different method types
-            if method == "rpc.discover":
-                # RPC discover method
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {"methods": TOOLS}
-                }
-                
-            elif method == "tools/list":
-                # Tools/list method
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {"tools": TOOLS}
-                }
-                
-            elif method == "tools/call" or method == "execute":
-                # Tool execution (minimal implementation)
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {"message": "Tool execution successful"}
-                }
-                
-            else:
-                # Unknown method
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {}
-                }
-            
             # Send response
-            logger.info(f"Sending response: {json.dumps(response)[:200]}...")
-            self.wfile.write(json.dumps(response).encode())
+            logger.info(f"Sending response: {payload[:200].decode('utf-8', 'replace')}...")
+            self.wfile.write(payload)
             
         except Exception as e:
             # Handle errors
@@ -181,7 +176,7 @@ class MinimalHandler(http.server.BaseHTTPRequestHandler):
                     "message": f"Internal error: {str(e)}"
                 }
             }
-            self.wfile.write(json.dumps(error_response).encode())
+            self.wfile.write(_dumps(error_response))
 
 def main():
     """Run the server."""
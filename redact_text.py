@@ -4,9 +4,15 @@ Simple script to test the redaction functionality.
 """
 import argparse
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import sys
 
+# One session for all calls, so requests to the server reuse kept-alive connections
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=16))
+_SESSION.headers.update({"Content-Type": "application/json", "Connection": "keep-alive"})
+
 def redact_text(text):
     """Send text to the redaction API and return the redacted version."""
     url = "http://localhost:6366/redact_text"
@@ -16,7 +22,7 @@ def redact_text(text):
     }
     
     try:
-        response = requests.post(url, json=data)
+        response = _SESSION.post(url, json=data)
         if response.status_code == 200:
             result = response.json()
             redacted_text = result.get('redacted_text', '')
@@ -0,0 +1,115 @@
+"""Shared helpers for the test suite."""
+
+import atexit
+import importlib.util
+import json
+import re
+import shutil
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_DIR = ROOT / "app"
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+def load_app_module(filename):
+    """Import a module from app/ out of a temporary copy.
+    
+    The server modules keep their configuration, journal and logs next to
+    themselves, so the copy keeps the tests away from app/RulesEngineMCP.
+    """
+    directory = tempfile.mkdtemp(prefix="rules-engine-test-")
+    # Registered first so it runs after the module's own exit handlers have saved
+    atexit.register(shutil.rmtree, directory, True)
+    path = Path(shutil.copy(APP_DIR / filename, directory))
+    spec = importlib.util.spec_from_file_location(f"test_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def add_rule_set(module, *rules):
+    """Add rules to a server module's engine in a rule set of their own and return the set's ID.
+    
+    Each rule is a dict of Rule fields; the default rule set is left alone.
+    """
+    rule_ids = []
+    for fields in rules:
+        rule = module.Rule(**fields)
+        module.config.rules[rule.id] = rule
+        rule_ids.append(rule.id)
+    return module.rules_engine.add_rule_set(module.RuleSet(name="test", rules=rule_ids))
+
+class StubRedactionServer:
+    """Redaction server on a local port serving /health, /rules and /redact_text.
+    
+    ``rules`` maps conditions to replacements; ``requests`` counts the
+    requests received by path.
+    """
+    
+    def __init__(self, rules):
+        self.rules = dict(rules)
+        self.requests = {}
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def _send(self, status, payload=None, headers=()):
+                body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def do_GET(self):
+                stub.requests[self.path] = stub.requests.get(self.path, 0) + 1
+                if self.path == "/health":
+                    self._send(200, {"status": "ok"})
+                elif self.path == "/rules":
+                    etag = f'"{len(stub.rules)}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        self._send(304)
+                    else:
+                        rules = [{"condition": condition, "enabled": True} for condition in stub.rules]
+                        self._send(200, {"rules": rules}, [("ETag", etag)])
+                else:
+                    self._send(404, {"detail": "Not Found"})
+            
+            def do_POST(self):
+                stub.requests[self.path] = stub.requests.get(self.path, 0) + 1
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if self.path != "/redact_text":
+                    self._send(404, {"detail": "Not Found"})
+                    return
+                text = body["text"]
+                matches = []
+                for condition, replacement in stub.rules.items():
+                    for match in re.finditer(condition, text):
+                        matches.append({"original": match.group(0), "replacement": replacement,
+                                        "rule_name": condition})
+                    text = re.sub(condition, replacement, text)
+                self._send(200, {"redacted_text": text, "matches": matches})
+        
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,120 @@
+"""End-to-end tests of RedactionMiddleware against a stub redaction server."""
+
+import asyncio
+import importlib.util
+import unittest
+from unittest import mock
+
+from helpers import StubRedactionServer
+
+import api_integration_example
+from api_integration_example import RedactionMiddleware
+
+SSN_RULES = {r"\b\d{3}-\d{2}-\d{4}\b": "<SSN>"}
+
+class RedactionMiddlewareTest(unittest.TestCase):
+    transport = "requests"
+    
+    def _middleware(self, server, **kwargs):
+        middleware = RedactionMiddleware(mcp_url=server.url, transport=self.transport, **kwargs)
+        self.addCleanup(middleware.close)
+        return middleware
+    
+    def test_redacts_through_server(self):
+        with StubRedactionServer(SSN_RULES) as server:
+            middleware = self._middleware(server)
+            self.assertTrue(middleware.server_available)
+            
+            redacted, matches = middleware.redact_and_get("SSN 123-45-6789 on file")
+            self.assertEqual(redacted, "SSN <SSN> on file")
+            self.assertEqual([match["original"] for match in matches], ["123-45-6789"])
+            self.assertEqual(server.requests.get("/redact_text"), 1)
+    
+    def test_prefilter_skips_server(self):
+        with StubRedactionServer(SSN_RULES) as server:
+            middleware = self._middleware(server)
+            self.assertEqual(middleware.redact_and_get("nothing to see"), ("nothing to see", []))
+            self.assertIsNone(server.requests.get("/redact_text"))
+    
+    def test_prefilter_keeps_backreferences(self):
+        with StubRedactionServer({r"(b)x": "<B>", r"(a)\1": "<A>"}) as server:
+            middleware = self._middleware(server)
+            self.assertEqual(middleware.redact_and_get("aa")[0], "<A>")
+    
+    def test_rule_changes_picked_up(self):
+        with StubRedactionServer(SSN_RULES) as server, \
+                mock.patch.object(api_integration_example, "PREFILTER_TTL", 0):
+            middleware = self._middleware(server)
+            self.assertEqual(middleware.redact_and_get("secret 123-45-6789")[0], "secret <SSN>")
+            server.rules["secret"] = "<S>"
+            self.assertEqual(middleware.redact_and_get("secret 123-45-6789")[0], "<S> <SSN>")
+            self.assertEqual(middleware.redact_and_get("a secret")[0], "a <S>")
+    
+    def test_fuzzy_cache_ignores_whitespace_only(self):
+        with StubRedactionServer({"Secret": "<S>"}) as server:
+            middleware = self._middleware(server, fuzzy=True)
+            self.assertEqual(middleware.redact_and_get("Secret x secret")[0], "<S> x secret")
+            self.assertEqual(middleware.redact_and_get("Secret  x\nsecret")[0], "<S>  x\nsecret")
+            self.assertEqual(server.requests.get("/redact_text"), 1)
+            # Case differences are sent to the server, which leaves "secret" alone
+            self.assertEqual(middleware.redact_and_get("secret x Secret")[0], "secret x <S>")
+            self.assertEqual(server.requests.get("/redact_text"), 2)
+    
+    def test_health_recheck_inside_event_loop(self):
+        if self.transport == "requests" and api_integration_example.aiohttp is None:
+            self.skipTest("aiohttp is not installed")
+        with StubRedactionServer({r"secret\d+": "<S>"}) as server:
+            middleware = self._middleware(server)
+            middleware._health_ttl = 0  # Re-check on every call, from inside asyncio.run
+            redacted = asyncio.run(middleware.redact_many(["my secret456 here"]))
+            self.assertEqual(redacted[0][0], "my <S> here")
+            self.assertTrue(middleware.server_available)
+    
+    def test_async_path_uses_prefilter_and_lru(self):
+        if self.transport == "requests" and api_integration_example.aiohttp is None:
+            self.skipTest("aiohttp is not installed")
+        with StubRedactionServer(SSN_RULES) as server:
+            middleware = self._middleware(server, cache_size=2)
+            self.assertEqual(asyncio.run(middleware.redact_many(["nothing to see"])), [("nothing to see", [])])
+            self.assertIsNone(server.requests.get("/redact_text"))
+            
+            first, second, third = "a 111-11-1111", "b 222-22-2222", "c 333-33-3333"
+            asyncio.run(middleware.redact_many([first, second]))
+            asyncio.run(middleware.redact_many([first]))  # Hit; now the most recently used
+            asyncio.run(middleware.redact_many([third]))
+            self.assertEqual(server.requests.get("/redact_text"), 3)
+            self.assertIn(middleware._cache_key(first), middleware._cache)
+            self.assertNotIn(middleware._cache_key(second), middleware._cache)
+    
+    def test_fuzzy_cache_keeps_whitespace_rules(self):
+        with StubRedactionServer({"x": "<X>", "a\nb": "<AB>"}) as server:
+            middleware = self._middleware(server, fuzzy=True)
+            self.assertEqual(middleware.redact_and_get("a\nb")[0], "<AB>")
+            self.assertEqual(middleware.redact_and_get("x a b")[0], "<X> a b")
+            self.assertEqual(middleware.redact_and_get("x a\nb")[0], "<X> <AB>")
+            self.assertEqual(server.requests.get("/redact_text"), 3)
+    
+    def test_unavailable_server_passes_text_through(self):
+        with StubRedactionServer(SSN_RULES) as server:
+            url = server.url
+        middleware = RedactionMiddleware(mcp_url=url, transport=self.transport)
+        self.addCleanup(middleware.close)
+        self.assertFalse(middleware.server_available)
+
+class MainTest(unittest.TestCase):
+    
+    def test_middleware_closed(self):
+        argv = ["api_integration_example.py", "-t", "hello", "--no-redact"]
+        with mock.patch("sys.argv", argv), \
+                mock.patch.object(RedactionMiddleware, "close", autospec=True) as close, \
+                mock.patch.object(api_integration_example, "real_claude_api_call", return_value={}), \
+                mock.patch("builtins.print"):
+            api_integration_example.main()
+        close.assert_called_once()
+
+@unittest.skipUnless(importlib.util.find_spec("httpx"), "httpx is not installed")
+class HttpxRedactionMiddlewareTest(RedactionMiddlewareTest):
+    transport = "httpx"
+
+if __name__ == "__main__":
+    unittest.main()
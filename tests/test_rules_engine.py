@@ -0,0 +1,395 @@
+"""Tests of the rules engine in app/rules_engine_mcp.py."""
+
+import contextlib
+import json
+import os
+import random
+import re
+import unittest
+from unittest import mock
+
+from helpers import load_app_module
+
+engine_module = None
+
+def setUpModule():
+    global engine_module
+    engine_module = load_app_module("rules_engine_mcp.py")
+
+def apply(text, *rules):
+    """Apply the given rules, each a dict of Rule fields, to text."""
+    rules = sorted((engine_module.Rule(**fields) for fields in rules), key=lambda r: r.priority, reverse=True)
+    return engine_module.rules_engine.apply_rules(text, rules)
+
+DATE_TRANSFORM = {
+    "name": "Date Transform",
+    "condition": r"\b(0?[1-9]|1[0-2])/(0?[1-9]|[12][0-9]|3[01])/(19|20)\d{2}\b",
+    "action": "transform",
+    "parameters": {"transform_type": "date", "format": "%Y-%m-%d"},
+    "priority": 30
+}
+
+SSN_REDACTION = {"name": "SSN", "condition": r"\b\d{3}-\d{2}-\d{4}\b", "replacement": "<SSN>", "priority": 100}
+
+class ChangedTextTest(unittest.TestCase):
+    """Rules that only match once a transform changed the text must still run."""
+    
+    def _flags(self, result):
+        return [item["text"] for item in result["results"] if item["action"] == "flag"]
+    
+    def test_flag_after_transform(self):
+        flag = {"name": "Month", "condition": r"\d{4}-\d{2}", "action": "flag", "priority": 10}
+        self.assertEqual(self._flags(apply("on 12/25/2023", DATE_TRANSFORM, flag)), ["2023-12"])
+    
+    def test_transform_after_redaction(self):
+        redact = {"name": "Day", "condition": "Xmas", "replacement": "12/25/2023", "priority": 50}
+        flag = {"name": "Month", "condition": r"\d{4}-\d{2}", "action": "flag", "priority": 10}
+        result = apply("on Xmas", redact, DATE_TRANSFORM, flag)
+        self.assertEqual(result["processed_text"], "on 2023-12-25")
+        self.assertEqual(self._flags(result), ["2023-12"])
+    
+    def test_flags_see_text_before_redaction(self):
+        replacement = {"name": "Redacted SSN", "condition": "<SSN>", "action": "flag", "priority": 10}
+        area = {"name": "Area", "condition": r"\d{3}-\d{2}", "action": "flag", "priority": 10}
+        self.assertEqual(self._flags(apply("SSN 123-45-6789", SSN_REDACTION, replacement, area)), ["123-45"])
+    
+    def test_redactions_ignore_unrelated_rules(self):
+        # Redactions are resolved against the original text, whatever runs between them
+        high = {"name": "B", "condition": "b", "replacement": "@@", "priority": 5}
+        low = {"name": "At", "condition": "@", "replacement": "#", "priority": 1}
+        flag = {"name": "Digit", "condition": r"\d", "action": "flag", "priority": 3}
+        transform = dict(DATE_TRANSFORM, priority=3)
+        self.assertEqual(apply("b", high, low)["processed_text"], "@@")
+        self.assertEqual(apply("b", high, flag, low)["processed_text"], "@@")
+        self.assertEqual(apply("b", high, transform, low)["processed_text"], "@@")
+    
+    def test_block_sees_original_text(self):
+        block = {"name": "Block", "condition": "<SSN>", "action": "block", "priority": 1}
+        self.assertEqual(apply("SSN 123-45-6789", SSN_REDACTION, block)["status"], "success")
+
+class FusedGroupTest(unittest.TestCase):
+    """Rules applied in one combined pass must give what applying them one by one gives."""
+    
+    def test_higher_priority_overlap_wins(self):
+        high = {"name": "BC", "condition": "bc", "replacement": "F", "priority": 2}
+        low = {"name": "AB", "condition": "ab", "replacement": "E", "priority": 1}
+        self.assertEqual(apply("abc", high, low)["processed_text"], "aF")
+        self.assertEqual(apply("abc abc", high, low)["processed_text"], "aF aF")
+    
+    def test_longer_lower_priority_match(self):
+        high = {"name": "Y", "condition": "y", "replacement": "<Y>", "priority": 2}
+        low = {"name": "XYZ", "condition": "xyz", "replacement": "<XYZ>", "priority": 1}
+        self.assertEqual(apply("xyz", high, low)["processed_text"], "x<Y>z")
+    
+    def test_flags_of_overlapping_rules(self):
+        high = {"name": "BC", "condition": "bc", "action": "flag", "priority": 2}
+        low = {"name": "AB", "condition": "ab", "action": "flag", "priority": 1}
+        flags = [(item["rule_name"], item["text"]) for item in apply("abc", high, low)["results"]]
+        self.assertEqual(flags, [("BC", "bc"), ("AB", "ab")])
+    
+    def test_disjoint_rules_stay_fused(self):
+        digits = {"name": "Digits", "condition": r"\d+", "replacement": "#", "priority": 2}
+        word = {"name": "Word", "condition": "(?i)word", "replacement": "*", "priority": 1}
+        self.assertEqual(apply("Word 42 WORD", digits, word)["processed_text"], "* # *")
+        rules = [engine_module.Rule(**digits), engine_module.Rule(**word)]
+        self.assertFalse(engine_module._overlapping_rules(tuple((rule.condition, rule.flags) for rule in rules)))
+    
+    def test_overlap_detection(self):
+        overlapping = engine_module._overlapping_rules
+        self.assertEqual(overlapping((("bc", 0), ("ab", 0), ("x", 0))), {0, 1})
+        self.assertEqual(overlapping((("b", re.IGNORECASE), ("B", 0))), {0, 1})
+        self.assertEqual(overlapping((("(?i)k", 0), ("\u212a", 0))), {0, 1})
+        self.assertEqual(overlapping((("x?", 0), ("y", 0))), {0, 1})
+        self.assertEqual(overlapping((("[^a]", 0), ("b", 0))), {0, 1})
+        self.assertEqual(overlapping(((r"(?<=a)b", 0), ("a", 0))), set())
+
+class BlockTest(unittest.TestCase):
+    def test_highest_priority_block_reported(self):
+        high = {"name": "High", "condition": "bad", "action": "block", "priority": 9}
+        low = {"name": "Low", "condition": "hello", "action": "block", "priority": 1}
+        result = apply("xx hello bad", high, low)
+        self.assertEqual(result["status"], "blocked")
+        self.assertEqual(result["results"][0]["rule_name"], "High")
+    
+    def test_leftmost_block_when_higher_priority_misses(self):
+        high = {"name": "High", "condition": "worse", "action": "block", "priority": 9}
+        low = {"name": "Low", "condition": "hello", "action": "block", "priority": 1}
+        self.assertEqual(apply("xx hello bad", high, low)["results"][0]["rule_name"], "Low")
+
+class PrescanTest(unittest.TestCase):
+    """Conditions Hyperscan would read differently from re must not be ruled out by the pre-scan."""
+    
+    CASES = [
+        (r"a{,2}b", "xx aab"),
+        (r"x{,3}y", "xxy"),
+        (r"[[:alpha:]]", "a:]"),
+        (r"[[:digit:]]+", "value :]"),
+    ]
+    
+    def test_rule_kept(self):
+        for condition, text in self.CASES:
+            with self.subTest(condition=condition):
+                self.assertIsNotNone(re.search(condition, text))
+                rule = engine_module.Rule(name="rule", condition=condition)
+                self.assertEqual(engine_module.rules_engine._candidate_rules([rule], text), [rule])
+
+class PlainTextMatcherTest(unittest.TestCase):
+    """The matchers used on plain ASCII text (PCRE2 JIT or ASCII re) must find what re finds."""
+    
+    CONDITIONS = [
+        r"[[:alpha:]]",
+        r"[[:digit:]]+",
+        r"a{ 1}",
+        r"a{,2}b",
+        r"a{1,2 }",
+        r"x\Z",
+        r"(?i)secret[=:]\s*\S+",
+        r"\b\d{3}-\d{2}-\d{4}\b",
+        r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
+        r"^\w+$",
+        r"(a|ab)(c|bcd)",
+        r"\s+",
+    ]
+    
+    TEXTS = ["a]", "a{ 1} a", "aab a{,2}b", "a{1,2 }", "x\n", "x", "SECRET= hunter2", "123-45-6789",
+             "mail john.doe@example.com now", "word\n", "abcd", "a \t\x0b\x0cb"]
+    
+    def test_same_matches_as_re(self):
+        rules_engine = engine_module.rules_engine
+        for condition in self.CONDITIONS:
+            pattern = re.compile(condition)
+            matcher = rules_engine._get_matcher(pattern, True)
+            for text in self.TEXTS:
+                with self.subTest(condition=condition, text=text):
+                    self.assertTrue(rules_engine._is_plain(text))
+                    self.assertEqual([m.span() for m in matcher.finditer(text)],
+                                     [m.span() for m in pattern.finditer(text)])
+    
+    def test_redacts_like_re(self):
+        for condition, text in [(r"[[:alpha:]]", "a]"), (r"a{ 1}", "a{ 1}")]:
+            with self.subTest(condition=condition):
+                result = apply(text, {"name": "rule", "condition": condition, "replacement": "#"})
+                self.assertEqual(result["processed_text"], "#")
+
+class DifferentialTest(unittest.TestCase):
+    """The optional engines and fused rule groups must give what plain re gives rule by rule."""
+    
+    RULES = [
+        SSN_REDACTION,
+        DATE_TRANSFORM,
+        {"name": "Email", "condition": r"[\w.+-]+@[\w-]+\.[\w.]+", "replacement": "<EMAIL>", "priority": 80},
+        {"name": "Phone", "condition": r"\b(?:\+\d{1,2}\s)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b",
+         "replacement": "<PHONE>", "priority": 70},
+        {"name": "Key", "condition": r"api_key=\w+", "replacement": "<KEY>", "flags": re.IGNORECASE, "priority": 60},
+        {"name": "Secret", "condition": r"\bsecret\b", "replacement": "<S>", "priority": 50},
+        {"name": "Repeated", "condition": r"(\w)\1{2,}", "action": "flag", "priority": 40},
+        {"name": "Percent", "condition": r"\d+(?=%)", "replacement": "<PCT>", "priority": 35},
+        {"name": "BC", "condition": "bc", "replacement": "F", "priority": 22},
+        {"name": "AB", "condition": "ab", "replacement": "E", "priority": 21},
+        {"name": "Foo", "condition": "foo", "replacement": "bar", "priority": 20},
+        {"name": "Bar", "condition": "bar", "replacement": "baz", "priority": 19},
+        {"name": "Spaces", "condition": r"\s{2,}", "replacement": " ", "priority": 10},
+        {"name": "Sigma", "condition": r"(?i)σ\w*", "action": "flag", "priority": 5},
+        {"name": "Kelvin", "condition": "k+", "action": "flag", "flags": re.IGNORECASE, "priority": 3},
+        {"name": "Braces", "condition": r"x{,2}y", "action": "flag", "priority": 2},
+        {"name": "POSIX", "condition": r"[[:digit:]]+", "action": "flag", "priority": 2},
+        {"name": "Digits", "condition": r"\d{4}", "action": "flag", "priority": 1},
+    ]
+    
+    BLOCKS = [
+        {"name": "Password", "condition": r"password\s*[:=]", "action": "block", "flags": re.IGNORECASE, "priority": 9},
+        {"name": "Card", "condition": r"\b\d{4}(?:[- ]?\d{4}){3}\b", "action": "block", "priority": 5},
+        {"name": "Hello", "condition": "hello", "action": "block", "priority": 1},
+    ]
+    
+    TEXTS = [
+        "",
+        "nothing to see here",
+        "SSN 123-45-6789 and 987-65-4321",
+        "mail Joe.Doe+x@Example.com on 12/25/2023 and 13/45/2020",
+        "Call (555) 123-4567 or +1 555-987-6543",
+        "API_KEY=abc123 api_key=xyz secret secrets Secret",
+        "aaa bbbb 50% 7% foo bar foobar abc",
+        "xxy x{,2}y 7:] d",
+        "tabs\t\t and  spaces\x1c\x1c end\v\v",
+        "Σίσυφος σοφία ΣΟΦΊΑ",
+        "José 123-45-6789 ü joe@example.org",
+        "kelvin K k KK 1234",
+        "123-45-6789\n",
+        "hello Password: x 4111-1111-1111-1111",
+        "xx hello 4111 1111 1111 1111",
+    ]
+    
+    def _apply_all(self, rules, engines=True, fused=True):
+        """Apply the rules to every text with a fresh engine, sorting each result list."""
+        with contextlib.ExitStack() as stack:
+            if not engines:
+                for name in ("hyperscan", "ahocorasick", "regex", "pcre2"):
+                    stack.enter_context(mock.patch.object(engine_module, name, None))
+            if not fused:
+                stack.enter_context(mock.patch.object(engine_module, "_is_fusable", return_value=False))
+            # The configuration is already loaded; only the caches need to start empty
+            with mock.patch.object(engine_module.RulesEngine, "load_config"):
+                engine = engine_module.RulesEngine()
+            outputs = []
+            for text in self.TEXTS:
+                result = engine.apply_rules(text, rules)
+                result["results"] = sorted(json.dumps(item, sort_keys=True) for item in result["results"])
+                outputs.append(result)
+            return outputs
+    
+    def _check(self, fields):
+        rules = sorted((engine_module.Rule(**rule) for rule in fields), key=lambda r: r.priority, reverse=True)
+        expected = self._apply_all(rules, engines=False, fused=False)
+        for engines, fused in ((True, True), (True, False), (False, True)):
+            with self.subTest(engines=engines, fused=fused):
+                self.assertEqual(self._apply_all(rules, engines, fused), expected)
+    
+    def test_rules(self):
+        self._check(self.RULES)
+    
+    def test_blocks(self):
+        self._check(self.BLOCKS + self.RULES[:4])
+
+class ScreenDifferentialTest(unittest.TestCase):
+    """Rules the prefilters drop must not change the output of random rule lists."""
+    
+    CONDITIONS = ["a", "b", "ab", "ba", ".", r"\Aa", r"\AA", "(a)", "[ab]+", r"b\b", "@", "#", r"\d", "a\nb"]
+    REPLACEMENTS = ["", "@", "@@", "ab", "#", "<X>", "12/25/2023"]
+    PIECES = ["a", "b", "A", "@", "#", " ", "\n", "1/2/2000"]
+    
+    def _random_rules(self, rng):
+        rules = []
+        for priority in range(rng.randint(1, 6), 0, -1):
+            kind = rng.random()
+            if kind < 0.1:
+                rules.append(dict(DATE_TRANSFORM, priority=priority))
+                continue
+            condition = rng.choice(self.CONDITIONS)
+            fields = {"name": f"r{priority}", "condition": condition, "priority": priority}
+            if kind < 0.4:
+                fields["action"] = "flag"
+            else:
+                replacements = self.REPLACEMENTS + [r"[\1]"] if "(" in condition else self.REPLACEMENTS
+                fields["replacement"] = rng.choice(replacements)
+            rules.append(fields)
+        return [engine_module.Rule(**fields) for fields in rules]
+    
+    def _apply(self, rules, texts, screened):
+        with contextlib.ExitStack() as stack:
+            if not screened:
+                for name in ("hyperscan", "ahocorasick", "regex", "pcre2"):
+                    stack.enter_context(mock.patch.object(engine_module, name, None))
+                stack.enter_context(mock.patch.object(engine_module, "_is_fusable", return_value=False))
+                for method in ("_screen_rules", "_candidate_rules"):
+                    stack.enter_context(mock.patch.object(engine_module.RulesEngine, method,
+                                                          lambda self, rules, text: rules))
+            with mock.patch.object(engine_module.RulesEngine, "load_config"):
+                engine = engine_module.RulesEngine()
+            outputs = []
+            for text in texts:
+                result = engine.apply_rules(text, rules)
+                outputs.append((result["processed_text"], sorted(json.dumps(item, sort_keys=True)
+                                                                 for item in result["results"])))
+            return outputs
+    
+    def test_random_rules(self):
+        for seed in range(300):
+            rng = random.Random(seed)
+            rules = self._random_rules(rng)
+            texts = ["".join(rng.choice(self.PIECES) for _ in range(rng.randint(0, 8))) for _ in range(4)]
+            with self.subTest(seed=seed):
+                self.assertEqual(self._apply(rules, texts, True), self._apply(rules, texts, False))
+    
+    def test_dropped_flag_keeps_redactions(self):
+        rules = [engine_module.Rule(name="Any", condition=".", replacement="ab", priority=3),
+                 engine_module.Rule(name="Start", condition=r"\AA", action="flag", priority=2),
+                 engine_module.Rule(name="A", condition="(a)", replacement="<X>", priority=1)]
+        self.assertEqual(self._apply(rules, ["ab"], True), self._apply(rules, ["ab"], False))
+
+class JournalTest(unittest.TestCase):
+    """Changes must survive a crash before the configuration is saved."""
+    
+    def setUp(self):
+        # A server module of its own, so restarting its engine leaves the other tests alone
+        self.module = load_app_module("rules_engine_mcp.py")
+        self.module.rules_engine.flush_config()
+        self.journal = os.path.join(self.module.log_dir, "rules_journal.jsonl")
+    
+    def _crash(self):
+        """Drop the pending save, as a crash would, and start a new engine on the files left behind."""
+        engine = self.module.rules_engine
+        with engine._save_lock:
+            if engine._save_timer is not None:
+                engine._save_timer.cancel()
+                engine._save_timer = None
+            engine._dirty = False
+            engine._journal_entries = 0
+        return self.module.RulesEngine()
+    
+    def _add_rule(self, name, engine=None):
+        rule = self.module.Rule(name=name, condition=name.lower(), replacement=f"<{name}>")
+        return (engine or self.module.rules_engine).add_rule(rule)
+    
+    def test_unsaved_changes_replayed(self):
+        added = self._add_rule("Added")
+        deleted = self._add_rule("Deleted")
+        self.assertTrue(self.module.rules_engine.delete_rule(deleted))
+        self.assertTrue(os.path.getsize(self.journal))
+        
+        self._crash()
+        config = self.module.config
+        self.assertIn(added, config.rules)
+        self.assertNotIn(deleted, config.rules)
+        self.assertIn(added, config.rule_sets[config.default_rule_set].rules)
+    
+    def test_torn_last_entry_ignored(self):
+        added = self._add_rule("Added")
+        with open(self.journal, "ab") as f:
+            f.write(b'{"op": "upsert_rule", "id": "torn", "da')
+        
+        engine = self._crash()
+        self.assertIn(added, self.module.config.rules)
+        self.assertNotIn("torn", self.module.config.rules)
+        self.assertEqual(engine.get_rule_by_id(added).name, "Added")
+    
+    def test_leftover_temporary_file(self):
+        with open(os.path.join(self.module.log_dir, "rules_config.json.tmp"), "wb") as f:
+            f.write(b'{"rules": {"cut sho')
+        count = len(self.module.config.rules)
+        
+        engine = self._crash()
+        self.assertEqual(len(self.module.config.rules), count)
+        
+        # The next save replaces the leftover
+        added = self._add_rule("Added", engine)
+        engine.flush_config()
+        self.module.RulesEngine()
+        self.assertIn(added, self.module.config.rules)
+
+class WorkersTest(unittest.TestCase):
+    """Several HTTP workers share the configuration files, so they must not change rules."""
+    
+    def test_mutating_tools_refused(self):
+        count = len(engine_module.config.rules)
+        with mock.patch.dict(os.environ, {"MCP_WORKERS": "2"}), \
+                mock.patch.object(engine_module, "detect_transport", return_value="http"):
+            result = engine_module.add_rule(name="rule", condition="x", action="redact")
+            self.assertIn("error", result)
+            self.assertIn("error", engine_module.set_default_rule_set("default"))
+            self.assertIn("rules", engine_module.get_rules())
+        self.assertEqual(len(engine_module.config.rules), count)
+    
+    def test_single_worker_can_change_rules(self):
+        with mock.patch.dict(os.environ, {"MCP_WORKERS": "1"}):
+            result = engine_module.add_rule(name="rule", condition="x", action="flag")
+        self.assertIn("rule_id", result)
+        self.assertTrue(engine_module.delete_rule(result["rule_id"])["success"])
+    
+    def test_invalid_worker_count(self):
+        with mock.patch.dict(os.environ, {"MCP_WORKERS": "two"}), \
+                self.assertLogs("RulesEngine", "WARNING"):
+            self.assertEqual(engine_module.get_worker_count(), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,304 @@
+"""Tests of the rules engine in app/rules_engine_mcp_sse.py."""
+
+import contextlib
+import json
+import os
+import re
+import threading
+import unittest
+import warnings
+from unittest import mock
+
+from helpers import add_rule_set, load_app_module
+
+sse = None
+
+def setUpModule():
+    global sse
+    sse = load_app_module("rules_engine_mcp_sse.py")
+
+def process(text, *rules):
+    """Process text with the given rules only."""
+    return sse.rules_engine.process_text(text, [add_rule_set(sse, *rules)])
+
+class BacktrackingProneRuleTest(unittest.TestCase):
+    RULE = {"name": "Signature", "condition": r"(\w+\s?)+@corp", "replacement": "<SIG>", "priority": 5}
+    
+    def test_non_ascii_text_matches_like_re(self):
+        # RE2's \w is ASCII-only, so it would leave "José Mü" behind
+        text = "Sent by José Müller@corp today"
+        self.assertEqual(process(text, self.RULE)["processed_text"], "<SIG> today")
+    
+    def test_ascii_text(self):
+        text = "Sent by John Smith@corp today"
+        self.assertEqual(process(text, self.RULE)["processed_text"], "<SIG> today")
+    
+    def test_not_fused(self):
+        rules = [sse.Rule(name="a", condition=r"\d+"), sse.Rule(name="b", condition=self.RULE["condition"]),
+                 sse.Rule(name="c", condition="x")]
+        groups = sse.RulesEngine._group_rules(rules)
+        self.assertEqual([len(group) for action, group in groups], [1, 1, 1])
+
+class PrescanTest(unittest.TestCase):
+    """Conditions Hyperscan would read differently from re must not be ruled out by the pre-scan."""
+    
+    CASES = [
+        (r"a{,2}b", "xx aab"),
+        (r"x{,3}y", "xxy"),
+        (r"[[:alpha:]]", "a:]"),
+        (r"[[:digit:]]+", "value :]"),
+    ]
+    
+    def test_rule_kept(self):
+        for condition, text in self.CASES:
+            with self.subTest(condition=condition):
+                self.assertIsNotNone(re.search(condition, text))
+                rule = sse.Rule(name="rule", condition=condition)
+                self.assertEqual(sse.rules_engine._candidate_rules([rule], text, True), [rule])
+    
+    def test_matches_like_re(self):
+        for condition, text in self.CASES:
+            with self.subTest(condition=condition):
+                rule = {"name": "rule", "condition": condition, "replacement": "#"}
+                self.assertEqual(process(text, rule)["processed_text"], re.sub(condition, "#", text))
+
+class FusedGroupTest(unittest.TestCase):
+    """Rules applied in one combined pass must give what applying them one after another gives."""
+    
+    def _text(self, text, *rules):
+        return process(text, *rules)["processed_text"]
+    
+    def test_higher_priority_overlap_wins(self):
+        high = {"name": "BC", "condition": "bc", "replacement": "F", "priority": 2}
+        low = {"name": "AB", "condition": "ab", "replacement": "E", "priority": 1}
+        self.assertEqual(self._text("abc", high, low), "aF")
+        self.assertEqual(self._text("abc abc", high, low), "aF aF")
+    
+    def test_later_rule_sees_replacement(self):
+        high = {"name": "X", "condition": "x", "replacement": "yy", "priority": 2}
+        low = {"name": "YY", "condition": "yy", "replacement": "Z", "priority": 1}
+        self.assertEqual(self._text("x", high, low), "Z")
+    
+    def test_later_rule_sees_new_context(self):
+        high = {"name": "X", "condition": "x", "replacement": "-", "priority": 2}
+        low = {"name": "Foo", "condition": r"\bfoo", "replacement": "F", "priority": 1}
+        self.assertEqual(self._text("xfoo", high, low), "-F")
+    
+    def test_batch(self):
+        high = {"name": "BC", "condition": "bc", "replacement": "F", "priority": 2}
+        low = {"name": "AB", "condition": "ab", "replacement": "E", "priority": 1}
+        rule_set = add_rule_set(sse, high, low)
+        outputs = sse.rules_engine.process_batch(["abc", "xabc"], [rule_set])
+        self.assertEqual([output["processed_text"] for output in outputs], ["aF", "xaF"])
+    
+    def test_hazards(self):
+        hazards = sse._fusion_hazards
+        self.assertEqual(hazards(("bc", "ab", "x")), {0, 1})
+        self.assertEqual(hazards((r"\d+", "(?i)word")), set())
+        self.assertEqual(hazards((r"\d+", "(?i)word"), ("<N>", "<W>")), set())
+        self.assertEqual(hazards(("(?i)word", r"\d+"), ("W1", "<N>")), {0})
+        self.assertEqual(hazards((r"\d+", r"\bword"), ("<N>", "<W>")), {0})
+        self.assertEqual(hazards((r"\d+", "word"), ("", "<W>")), {0})
+
+SSN_REDACTION = {"name": "SSN", "condition": r"\b\d{3}-\d{2}-\d{4}\b", "replacement": "<SSN>", "priority": 100}
+
+class LiteralScreenTest(unittest.TestCase):
+    """Rules whose literals only appear once earlier rules changed the text must still run."""
+    
+    def _flags(self, result):
+        return [item["text"] for item in result["results"] if item["action"] == "flag"]
+    
+    def test_flag_on_replacement(self):
+        flag = {"name": "Redacted SSN", "condition": "<SSN>", "action": "flag", "priority": 10}
+        self.assertEqual(self._flags(process("SSN 123-45-6789", SSN_REDACTION, flag)), ["<SSN>"])
+    
+    def test_flag_across_replacement(self):
+        flag = {"name": "Labelled", "condition": r"N>:\w", "action": "flag", "priority": 10}
+        self.assertEqual(self._flags(process("123-45-6789:x", SSN_REDACTION, flag)), ["N>:x"])
+    
+    def test_empty_replacement_joins_text(self):
+        high = {"name": "X", "condition": "x", "replacement": "", "priority": 2}
+        low = {"name": "AB", "condition": "ab", "replacement": "Z", "priority": 1}
+        self.assertEqual(process("axb", high, low)["processed_text"], "Z")
+    
+    def test_block_sees_original_text(self):
+        block = {"name": "Block", "condition": "<SSN>", "action": "block", "priority": 1}
+        self.assertEqual(process("SSN 123-45-6789", SSN_REDACTION, block)["status"], "success")
+    
+    def test_updated_replacement(self):
+        first = sse.add_rule(name="X", condition="x", action="redact", replacement="--", priority=2)["rule_id"]
+        second = sse.add_rule(name="ZZZ", condition="zzz", action="redact", replacement="Y", priority=1)["rule_id"]
+        self.addCleanup(sse.delete_rule, first)
+        self.addCleanup(sse.delete_rule, second)
+        rule_set = sse.add_rule_set(name="test", rule_ids=[first, second])["rule_set_id"]
+        self.addCleanup(sse.delete_rule_set, rule_set)
+        self.assertEqual(sse.rules_engine.process_text("xz", [rule_set])["processed_text"], "--z")
+        sse.update_rule(first, replacement="zz")
+        self.assertEqual(sse.rules_engine.process_text("xz", [rule_set])["processed_text"], "Y")
+    
+    def test_posix_style_set_no_warning(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            sse._required_literals("[[:alpha:]]x")
+            sse._condition_chars.__wrapped__("[[:alpha:]]x")
+        self.assertEqual([str(warning.message) for warning in caught], [])
+
+class DifferentialTest(unittest.TestCase):
+    """The optional engines, combined rule groups and batches must give what plain re gives rule by rule."""
+    
+    RULES = [
+        SSN_REDACTION,
+        {"name": "Date Transform", "condition": r"\b(0?[1-9]|1[0-2])/(0?[1-9]|[12][0-9]|3[01])/(19|20)\d{2}\b",
+         "action": "transform", "parameters": {"transform_type": "date", "format": "%Y-%m-%d"}, "priority": 30},
+        {"name": "Email", "condition": r"[\w.+-]+@[\w-]+\.[\w.]+", "replacement": "<EMAIL>", "priority": 80},
+        {"name": "Phone", "condition": r"\b(?:\+\d{1,2}\s)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b",
+         "replacement": "<PHONE>", "priority": 70},
+        {"name": "Key", "condition": r"(?i)api_key=\w+", "replacement": "<KEY>", "priority": 60},
+        {"name": "Secret", "condition": r"\bsecret\b", "replacement": "<S>", "priority": 50},
+        {"name": "Signature", "condition": r"(\w+\s?)+@corp", "replacement": "<SIG>", "priority": 45},
+        {"name": "Repeated", "condition": r"(\w)\1{2,}", "action": "flag", "priority": 40},
+        {"name": "Percent", "condition": r"\d+(?=%)", "replacement": "<PCT>", "priority": 35},
+        {"name": "BC", "condition": "bc", "replacement": "F", "priority": 22},
+        {"name": "AB", "condition": "ab", "replacement": "E", "priority": 21},
+        {"name": "Foo", "condition": "foo", "replacement": "bar", "priority": 20},
+        {"name": "Bar", "condition": "bar", "replacement": "baz", "priority": 19},
+        {"name": "Spaces", "condition": r"\s{2,}", "replacement": " ", "priority": 10},
+        {"name": "Sigma", "condition": r"(?i)σ\w*", "action": "flag", "priority": 5},
+        {"name": "Kelvin", "condition": "(?i)k+", "action": "flag", "priority": 3},
+        {"name": "Braces", "condition": r"x{,2}y", "action": "flag", "priority": 2},
+        {"name": "POSIX", "condition": r"[[:digit:]]+", "action": "flag", "priority": 2},
+        {"name": "Digits", "condition": r"\d{4}", "action": "flag", "priority": 1},
+    ]
+    
+    BLOCKS = [
+        {"name": "Password", "condition": r"(?i)password\s*[:=]", "action": "block", "priority": 9},
+        {"name": "Card", "condition": r"\b\d{4}(?:[- ]?\d{4}){3}\b", "action": "block", "priority": 5},
+        {"name": "Hello", "condition": "hello", "action": "block", "priority": 1},
+    ]
+    
+    TEXTS = [
+        "nothing to see here",
+        "SSN 123-45-6789 and 987-65-4321",
+        "mail Joe.Doe+x@Example.com on 12/25/2023 and 13/45/2020",
+        "Call (555) 123-4567 or +1 555-987-6543",
+        "API_KEY=abc123 api_key=xyz secret secrets Secret",
+        "Sent by John Smith@corp and José Müller@corp",
+        "aaa bbbb 50% 7% foo bar foobar abc",
+        "xxy x{,2}y 7:] d",
+        "tabs\t\t and  spaces\x1c\x1c end\v\v",
+        "Σίσυφος σοφία ΣΟΦΊΑ",
+        "kelvin K k KK 1234",
+        "123-45-6789\n",
+        "hello Password: x 4111-1111-1111-1111",
+        "xx hello 4111 1111 1111 1111",
+    ]
+    
+    def _process_all(self, rule_set, engines=True, fused=True):
+        """Process every text with a fresh engine, one by one and as a batch, sorting each result list."""
+        with contextlib.ExitStack() as stack:
+            if not engines:
+                for name in ("hyperscan", "ahocorasick", "re2"):
+                    stack.enter_context(mock.patch.object(sse, name, None))
+            if not fused:
+                stack.enter_context(mock.patch.object(sse, "_is_fusable", return_value=False))
+            # The configuration is already loaded; only the caches need to start empty
+            with mock.patch.object(sse.RulesEngine, "load_config"):
+                engine = sse.RulesEngine()
+            outputs = [engine.process_text(text, [rule_set]) for text in self.TEXTS]
+            batch = engine.process_batch(self.TEXTS, [rule_set])
+        for output in outputs:
+            output["results"] = sorted(json.dumps(item, sort_keys=True) for item in output["results"])
+        for output in batch:
+            output["results"] = sorted(json.dumps(item, sort_keys=True) for item in output["results"])
+        self.assertEqual(batch, outputs)
+        return outputs
+    
+    def _check(self, rules):
+        rule_set = add_rule_set(sse, *rules)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            expected = self._process_all(rule_set, engines=False, fused=False)
+            for engines, fused in ((True, True), (True, False), (False, True)):
+                with self.subTest(engines=engines, fused=fused):
+                    self.assertEqual(self._process_all(rule_set, engines, fused), expected)
+    
+    def test_rules(self):
+        self._check(self.RULES)
+    
+    def test_blocks(self):
+        self._check(self.BLOCKS + self.RULES[:4])
+    
+    def test_batchable_rules(self):
+        # Without transforms and lookarounds a batch is processed as one joined text. Plain
+        # re takes exponential time on the backtracking-prone signature rule over all of it
+        self._check([rule for rule in self.RULES if rule.get("action") != "transform"
+                     and "(?=" not in rule["condition"] and rule["name"] != "Signature"])
+
+class UpdateRuleTest(unittest.TestCase):
+    def test_update_rule(self):
+        rule_id = sse.add_rule(name="Code", condition="c0de", action="redact", replacement="<C>")["rule_id"]
+        self.addCleanup(sse.delete_rule, rule_id)
+        result = sse.update_rule(rule_id, condition="k0de", replacement="<K>", enabled=True)
+        self.assertEqual(result["rule"]["replacement"], "<K>")
+        # Updated fields count as set, like fields given to the constructor
+        rule = sse.rules_engine.get_rule_by_id(rule_id)
+        self.assertIn("enabled", rule.model_fields_set)
+        rule_set = sse.rules_engine.add_rule_set(sse.RuleSet(name="test", rules=[rule_id]))
+        self.assertEqual(sse.rules_engine.process_text("c0de k0de", [rule_set])["processed_text"], "c0de <K>")
+    
+    def test_invalid_condition_changes_nothing(self):
+        rule_id = sse.add_rule(name="Code", condition="c0de", action="redact", replacement="<C>")["rule_id"]
+        self.addCleanup(sse.delete_rule, rule_id)
+        self.assertIn("error", sse.update_rule(rule_id, condition="(", replacement="<K>"))
+        self.assertEqual(sse.rules_engine.get_rule_by_id(rule_id).replacement, "<C>")
+
+class McpEndpointTest(unittest.TestCase):
+    def _call(self, method, params):
+        from fastapi.testclient import TestClient
+        with TestClient(sse.app) as client:
+            response = client.post("/mcp", json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params})
+        return response.json()
+    
+    def test_text_tools_run_off_the_event_loop(self):
+        threads = []
+        process_text = sse.rules_engine.process_text
+        
+        def record(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return process_text(*args, **kwargs)
+        
+        with mock.patch.object(sse.rules_engine, "process_text", side_effect=record):
+            result = self._call("tools/call", {"name": "redact_text", "parameters": {"text": "SSN 123-45-6789"}})
+        self.assertEqual(result["result"]["redacted_text"], "SSN <SSN>")
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith("RulesEngineWorker"))
+    
+    def test_other_tools(self):
+        self.assertIn("rules", self._call("get_rules", {})["result"])
+
+class WorkersTest(unittest.TestCase):
+    """Several HTTP workers share the configuration file, so they must not change rules."""
+    
+    def test_mutating_tools_refused(self):
+        count = len(sse.config.rules)
+        with mock.patch.dict(os.environ, {"MCP_WORKERS": "2"}), \
+                mock.patch.object(sse, "detect_transport", return_value="http"):
+            self.assertIn("error", sse.add_rule(name="rule", condition="x", action="redact"))
+            self.assertIn("error", sse.set_default_rule_set("default"))
+            self.assertIn("rules", sse.get_rules())
+            self.assertEqual(sse.redact_text("x")["redacted_text"], "x")
+        self.assertEqual(len(sse.config.rules), count)
+    
+    def test_single_worker_can_change_rules(self):
+        with mock.patch.dict(os.environ, {"MCP_WORKERS": "1"}):
+            result = sse.add_rule(name="rule", condition="x", action="flag")
+        self.assertIn("rule_id", result)
+        self.assertTrue(sse.delete_rule(result["rule_id"])["success"])
+    
+    def test_invalid_worker_count(self):
+        with mock.patch.dict(os.environ, {"MCP_WORKERS": "two"}), \
+                self.assertLogs("RulesEngine", "WARNING"):
+            self.assertEqual(sse.get_worker_count(), 1)
+
+if __name__ == "__main__":
+    unittest.main()